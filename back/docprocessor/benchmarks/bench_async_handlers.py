@@ -0,0 +1,216 @@
+"""Benchmark concurrent-request throughput of the sync and async split/encode handlers.
+
+The Cosmos DB, Blob Storage and Mistral clients are replaced, through the client
+registry, by an in-process mock backend that answers every call after a fixed latency.
+The sync handlers run on a thread pool the size of the Functions worker pool
+(PYTHON_THREADPOOL_THREAD_COUNT), the async handlers on a single event loop.
+
+usage (from the `back/docprocessor` directory):
+    python -m benchmarks.bench_async_handlers --requests 32 --latency-ms 20 --threads 1 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+os.environ.setdefault("MISTRAL_API_KEY", "bench")
+os.environ.setdefault("MISTRAL_MODEL_NAME", "bench")
+
+import azure.functions as func
+
+from src.api import encode, split
+from src.encode import encoder
+from src.store import blob, clients, cosmosdb, embedding_cache
+from src.store.embedding_cache import EmbeddingCache
+
+DIM = 8
+
+
+class Backend:
+    """Mock backend: documents of `pages` pages and `chunks` chunks, answered after `latency` seconds."""
+
+    def __init__(self, latency: float, pages: int, chunks: int) -> None:
+        self.latency = latency
+        self.pages = pages
+        self.chunks = chunks
+
+    def records(self, filename: str) -> list[dict]:
+        header = {"documentId": filename, "chunkingStrategy": "auto"}
+        return [header] + [
+            {"page_content": f"{filename} page {p} " + "lorem ipsum dolor sit amet " * 60}
+            for p in range(self.pages)
+        ]
+
+    def items(self, parameters: list[dict]) -> list[dict]:
+        document_id = next(p["value"] for p in parameters if p["name"] == "@documentId")
+        return [
+            {"id": f"{document_id}_{i}", "tenantId": "t", "documentId": document_id,
+             "text": f"{document_id} chunk {i}"}
+            for i in range(self.chunks)
+        ]
+
+    @staticmethod
+    def embeddings(inputs: list[str]) -> SimpleNamespace:
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[0.0] * DIM) for _ in inputs])
+
+
+class SyncContainer:
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+
+    def query_items(self, query, parameters, **kwargs):
+        time.sleep(self.backend.latency)
+        return iter(self.backend.items(parameters))
+
+    def execute_item_batch(self, batch_operations, partition_key):
+        time.sleep(self.backend.latency)
+        return [{"statusCode": 200} for _ in batch_operations]
+
+
+class AsyncContainer:
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+
+    def query_items(self, query, parameters, **kwargs):
+        async def items():
+            await asyncio.sleep(self.backend.latency)
+            for item in self.backend.items(parameters):
+                yield item
+        return items()
+
+    async def execute_item_batch(self, batch_operations, partition_key):
+        await asyncio.sleep(self.backend.latency)
+        return [{"statusCode": 200} for _ in batch_operations]
+
+
+class SyncBlobService:
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+
+    def get_blob_client(self, container, blob):
+        backend = self.backend
+
+        def chunks():
+            time.sleep(backend.latency)
+            yield b"\n".join(json.dumps(r).encode() for r in backend.records(blob))
+
+        return SimpleNamespace(download_blob=lambda **kwargs: SimpleNamespace(chunks=chunks))
+
+
+class AsyncBlobService:
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+
+    def get_blob_client(self, container, blob):
+        backend = self.backend
+
+        async def chunks():
+            await asyncio.sleep(backend.latency)
+            yield b"\n".join(json.dumps(r).encode() for r in backend.records(blob))
+
+        async def download_blob(**kwargs):
+            return SimpleNamespace(chunks=chunks)
+
+        return SimpleNamespace(download_blob=download_blob)
+
+
+class Mistral:
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+        self.embeddings = SimpleNamespace(create=self.create, create_async=self.create_async)
+
+    def create(self, model, inputs):
+        time.sleep(self.backend.latency)
+        return self.backend.embeddings(inputs)
+
+    async def create_async(self, model, inputs):
+        await asyncio.sleep(self.backend.latency)
+        return self.backend.embeddings(inputs)
+
+
+def register_sync(backend: Backend) -> None:
+    """Register the sync mock clients under the keys the stores look up."""
+    host, key = cosmosdb.COSMOSDB_NOSQL_HOST, cosmosdb.COSMOSDB_NOSQL_KEY
+    clients._CLIENTS[("cosmos", host, key)] = object()
+    clients._CLIENTS[("cosmos_container", host, cosmosdb.COSMOSDB_DATABASE_ID, cosmosdb.COSMOSDB_CONTAINER_ID)] = (
+        None, SyncContainer(backend),
+    )
+    clients._CLIENTS[("blob", blob.STORAGE_ACCOUNT_CONNECTION_STRING)] = SyncBlobService(backend)
+    clients._CLIENTS[("mistral", encoder.MISTRAL_API_KEY)] = Mistral(backend)
+
+
+def register_async(backend: Backend) -> None:
+    """Register the async mock clients of the running event loop."""
+    host, key = cosmosdb.COSMOSDB_NOSQL_HOST, cosmosdb.COSMOSDB_NOSQL_KEY
+    proxies = asyncio.get_running_loop().create_future()
+    proxies.set_result((None, AsyncContainer(backend)))
+    clients.get_or_create_for_loop(("cosmos_aio", host, key), object)
+    clients.get_or_create_for_loop((
+        "cosmos_aio_container", host, cosmosdb.COSMOSDB_DATABASE_ID, cosmosdb.COSMOSDB_CONTAINER_ID,
+    ), lambda: proxies)
+    clients.get_or_create_for_loop(
+        ("blob_aio", blob.STORAGE_ACCOUNT_CONNECTION_STRING), lambda: AsyncBlobService(backend),
+    )
+
+
+def make_request(route: str, document_id: str) -> func.HttpRequest:
+    return func.HttpRequest(
+        method="POST",
+        url=f"/api/{route}/t",
+        headers={"Content-Type": "application/json"},
+        body=json.dumps({"documentId": document_id}).encode(),
+    )
+
+
+def run_sync(module, route: str, n_requests: int, threads: int) -> float:
+    requests = [make_request(route, f"sync{threads}_{i}") for i in range(n_requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        responses = list(executor.map(lambda req: module.api_handler(req, "t", "bench"), requests))
+    elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses)
+    return elapsed
+
+
+def run_async(module, route: str, n_requests: int, backend: Backend) -> float:
+    async def main() -> float:
+        register_async(backend)
+        requests = [make_request(route, f"async_{i}") for i in range(n_requests)]
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(module.api_handler_async(req, "t", "bench") for req in requests))
+        elapsed = time.perf_counter() - start
+        assert all(r.status_code == 200 for r in responses)
+        return elapsed
+
+    return asyncio.run(main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--chunks", type=int, default=64)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    backend = Backend(latency=args.latency_ms / 1000, pages=args.pages, chunks=args.chunks)
+    register_sync(backend)
+    # texts are unique per request, disable the embedding cache so that every run calls the backend
+    embedding_cache._DEFAULT_CACHE = EmbeddingCache(max_size=0, path=None)
+
+    for route, module in [("split", split), ("encode", encode)]:
+        for threads in args.threads:
+            elapsed = run_sync(module, route, args.requests, threads)
+            print(f"{route} sync  ({threads:>2} threads): {args.requests / elapsed:8.1f} req/s")
+        elapsed = run_async(module, route, args.requests, backend)
+        print(f"{route} async (event loop): {args.requests / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark the native RecursiveChunker against LangChain's RecursiveCharacterTextSplitter.
+
+Both split a synthetic corpus of `--pages` pages of markdown-like text, with the chunk size,
+overlap and separators of each chunking strategy. Reports throughput, peak traced memory,
+whether the chunks are identical, and the import time of each splitter in a fresh interpreter.
+
+usage (from the `back/docprocessor` directory):
+    pip3 install -r requirements-bench.txt
+    python -m benchmarks.bench_chunker --pages 2000 --repeat 3
+"""
+import argparse
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.split.chunker import RecursiveChunker
+from src.split.spliter import MAX_CHUNK_SIZE, MAX_OVERLAP
+
+WORDS = (
+    "the of and to in is for on that with as by this are from be at or an which document "
+    "ingestion retrieval vector chunk page section table figure note step example"
+).split()
+
+STRATEGIES = {
+    "auto": None,
+    "headings": ["\n\n", "Section", "Chapter", "Table", "Figure", "Note", "Step", "Example"],
+}
+
+
+def make_page(rng: random.Random) -> str:
+    """A page of headed paragraphs, with sentences of random words."""
+    paragraphs = []
+    for _ in range(rng.randint(3, 8)):
+        sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize() + "."
+            for _ in range(rng.randint(2, 10))
+        ]
+        heading = f"## {rng.choice(['Section', 'Table', 'Figure', 'Note'])} {rng.randint(1, 99)}"
+        paragraphs.append(heading + "\n" + " ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+def measure(split_text, pages: list[str], repeat: int) -> tuple[float, float, list]:
+    """Best wall time (s) and peak traced memory (MB) of splitting every page."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = [split_text(page) for page in pages]
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    for page in pages:
+        split_text(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1e6, chunks
+
+
+def import_time(statement: str) -> float:
+    """Wall time (ms) of an import in a fresh interpreter."""
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return float(output) * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = [make_page(rng) for _ in range(args.pages)]
+    megabytes = sum(len(page) for page in pages) / 1e6
+    print(f"{args.pages} pages, {megabytes:.1f} MB")
+
+    for strategy, separators in STRATEGIES.items():
+        kwargs = {"separators": separators} if separators else {}
+        splitters = {
+            "langchain": RecursiveCharacterTextSplitter(
+                chunk_size=MAX_CHUNK_SIZE, chunk_overlap=MAX_OVERLAP, **kwargs,
+            ).split_text,
+            "native": RecursiveChunker(
+                chunk_size=MAX_CHUNK_SIZE, chunk_overlap=MAX_OVERLAP, **kwargs,
+            ).split_text,
+        }
+        results = {}
+        for name, split_text in splitters.items():
+            elapsed, peak, chunks = measure(split_text, pages, args.repeat)
+            results[name] = chunks
+            print(f"{strategy:<9} {name:<10} {megabytes / elapsed:7.2f} MB/s {peak:8.2f} MB peak")
+        print(f"{strategy:<9} identical chunks: {results['langchain'] == results['native']}")
+
+    print(f"import langchain.text_splitter {import_time('import langchain.text_splitter'):8.1f} ms")
+    print(f"import src.split.chunker       {import_time('import src.split.chunker'):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark the serialization of encode responses: time and peak traced memory per 10k chunks.
+
+Each path turns `--chunks` chunk items, with vectors as lists of floats as returned by the
+embedding API, into the bytes of a JSON response body:
+- legacy: a plain dataclass per chunk, `dataclasses.asdict` and `json.dumps(indent=2)`
+- slots: a slots `Chunk` per chunk, with a float32 vector, and `src.models.serialization.dumps`
+- batch: one `ChunkBatch`, with the vectors as one float32 matrix, and `src.models.serialization.dumps`
+
+usage (from the `back/docprocessor` directory):
+    python -m benchmarks.bench_models --chunks 10000 --dim 1024 --repeat 3
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+from src.models import serialization
+from src.models.chunk import Chunk, ChunkBatch
+
+
+@dataclass
+class LegacyChunk:
+    """The chunk model before slots and float32 vectors."""
+    text: str
+    vector: Optional[list[float]] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def legacy(items: list[dict]) -> bytes:
+    chunks = [LegacyChunk(text=item["text"], vector=item["vector"]) for item in items]
+    body = {"chunks": [chunk.to_dict() for chunk in chunks]}
+    return json.dumps(body, indent=2).encode("utf-8")
+
+
+def slots(items: list[dict]) -> bytes:
+    chunks = [Chunk(text=item["text"], vector=item["vector"]) for item in items]
+    return serialization.dumps({"chunks": [chunk.to_dict(arrays=True) for chunk in chunks]})
+
+
+def batch(items: list[dict]) -> bytes:
+    return serialization.dumps({"chunks": ChunkBatch.from_items(items).to_dicts(arrays=True)})
+
+
+def measure(fn: Callable[[list[dict]], bytes], items: list[dict], repeat: int) -> tuple[float, float, int]:
+    """Best time in seconds, peak traced memory in MB and response size in bytes."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(items)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(items)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1e6, len(body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=10_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    items = [
+        {"text": f"chunk {idx} " * 40, "vector": [rng.uniform(-0.1, 0.1) for _ in range(args.dim)]}
+        for idx in range(args.chunks)
+    ]
+    scale = 10_000 / args.chunks
+    backend = "orjson" if serialization.orjson is not None else "json"
+    print(f"{args.chunks} chunks x {args.dim} dims, serialization backend: {backend}")
+    for name, fn in [("legacy", legacy), ("slots", slots), ("batch", batch)]:
+        elapsed, peak, size = measure(fn, items, args.repeat)
+        print(
+            f"{name:<6}: {elapsed * scale:7.3f} s per 10k chunks, peak {peak * scale:8.1f} MB per 10k chunks,"
+            f" response {size / 1e6:7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,15 @@ import json
 import azure.durable_functions as df
 import azure.functions as func
 
-from src.api.load import api_handler as load_api_handler
-from src.api.split import api_handler as split_api_handler
-from src.api.encode import api_handler as encode_api_handler
+from src.api.load import api_handler_async as load_api_handler
+from src.api.split import api_handler_async as split_api_handler
+from src.api.encode import api_handler_async as encode_api_handler
+from src.api.ingest import api_handler as ingest_api_handler
+from src.api.orchestrate import api_handler as orchestrate_api_handler
+from src.pipeline import orchestration
 
-# use one of std_app or dur_app
-app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
-# dur_app = df.DFApp(http_auth_level=func.AuthLevel.ANONYMOUS)
+# DFApp serves both the HTTP routes and the Durable Functions triggers
+app = df.DFApp(http_auth_level=func.AuthLevel.ANONYMOUS)
 VERSION = "1.0.0"
 
 logger = logging.getLogger(__name__)
@@ -22,106 +24,77 @@ logger.addHandler(stdout_handler)
 
 
 @app.route(route="load/{tenant_id}")
-def load_entry(req: func.HttpRequest) -> func.HttpResponse:
-    """HTTP trigger function to process documents."""
+async def load_entry(req: func.HttpRequest) -> func.HttpResponse:
+    """HTTP trigger function to process documents, on the worker's event loop."""
     logger.info("Triggered %s ...", 'load_entry')
     tenant_id = req.route_params.get("tenant_id", 'unknown')
-    return load_api_handler(req, tenant_id, VERSION)
+    return await load_api_handler(req, tenant_id, VERSION)
 
 @app.route(route="split/{tenant_id}")
-def split_entry(req: func.HttpRequest) -> func.HttpResponse:
-    """HTTP trigger function to process documents."""
+async def split_entry(req: func.HttpRequest) -> func.HttpResponse:
+    """HTTP trigger function to process documents, on the worker's event loop."""
     logger.info("Triggered %s ...", 'split_entry')
     tenant_id = req.route_params.get("tenant_id", 'unknown')
-    return split_api_handler(req, tenant_id, VERSION)
+    return await split_api_handler(req, tenant_id, VERSION)
 
 @app.route(route="encode/{tenant_id}")
-def encode_entry(req: func.HttpRequest) -> func.HttpResponse:
-    """HTTP trigger function to process documents."""
+async def encode_entry(req: func.HttpRequest) -> func.HttpResponse:
+    """HTTP trigger function to process documents, on the worker's event loop."""
     logger.info("Triggered %s ...", 'encode_entry')
     tenant_id = req.route_params.get("tenant_id", 'unknown')
-    return encode_api_handler(req, tenant_id, VERSION)
-
-# # An HTTP-triggered function with a Durable Functions client binding
-# @dur_app.route(route="doc_processing")
-# @dur_app.durable_client_input(client_name="client")
-# async def doc_processing_entry(req: func.HttpRequest, client):
-#     """HTTP trigger function to start the orchestration."""
-#     logger.info("Triggered %s ...", 'doc_processing_entry')
-#     version = VERSION
-#     logger.info("(%s) request: %s", version, json.dumps({
-#         'method': req.method,
-#         'url': req.url,
-#         'headers': dict(req.headers),
-#         'params': dict(req.params),
-#         'get_body': req.get_body().decode()
-#     }, indent=2))
-#     orchestrator_name = "doc_processing_orchestrator"
-#     logger.info("Orchestrator name: %s", orchestrator_name)
-#     client_input = req.get_body.decode("utf-8") if req.get_body() else None
-#     logger.info("Client input: %s", client_input)
-#     instance_id = await client.start_new(
-#         orchestration_function_name=orchestrator_name,
-#         instance_id=None,
-#         client_input=client_input,
-#     )
-#     logger.info("Starting orchestration with ID = '%s'", instance_id)
-#     response = client.create_check_status_response(req, instance_id)
-#     logger.info("Response: %s", response)
-#     return response
-
-# # Orchestrator
-# @dur_app.orchestration_trigger(context_name="context")
-# def doc_processing_orchestrator(context):
-#     """Orchestrate the workflow."""
-#     logger.info("Orchestrator (%s) started...", 'doc_processing_orchestrator')
-#     result1 = yield context.call_activity("load", "Seattle")
-#     logger.info("Result of load: %s", result1)
-#     result2 = yield context.call_activity("split", "Tokyo")
-#     logger.info("Result of split: %s", result2)
-#     result3 = yield context.call_activity("encode", "London")
-#     logger.info("Result of encode: %s", result3)
-#     return {"content": "done"}
-
-# # Activity
-# @dur_app.activity_trigger(input_name="payload")
-# def load(payload: str):
-#     """Activity function to load documents."""
-#     logger.info("Activity (%s) started...", 'load')
-#     req = func.HttpRequest(
-#         method="POST",
-#         url="https://example.com",
-#         route_params={"tenant_id": "unknown"},
-#         body=payload.encode("utf-8"),
-#         headers={},
-#     )
-#     tenant_id = req.route_params.get("tenant_id", 'unknown')
-#     return load_api_handler(req, tenant_id, VERSION)
-
-# @dur_app.activity_trigger(input_name="payload")
-# def split(payload: str):
-#     """Activity function to split documents."""
-#     logger.info("Activity (%s) started...", 'split')
-#     req = func.HttpRequest(
-#         method="POST",
-#         url="https://example.com",
-#         route_params={"tenant_id": "unknown"},
-#         body=payload.encode("utf-8"),
-#         headers={},
-#     )
-#     tenant_id = req.route_params.get("tenant_id", 'unknown')
-#     return split_api_handler(req, tenant_id, VERSION)
-
-# @dur_app.activity_trigger(input_name="payload")
-# def encode(payload: str):
-#     """Activity function to encode documents."""
-#     logger.info("Activity (%s) started...", 'encode')
-#     req = func.HttpRequest(
-#         method="POST",
-#         url="https://example.com",
-#         route_params={"tenant_id": "unknown"},
-#         body=payload.encode("utf-8"),
-#         headers={},
-#     )
-#     tenant_id = req.route_params.get("tenant_id", 'unknown')
-#     return encode_api_handler(req, tenant_id, VERSION)
+    return await encode_api_handler(req, tenant_id, VERSION)
+
+@app.route(route="ingest/{tenant_id}")
+def ingest_entry(req: func.HttpRequest) -> func.HttpResponse:
+    """HTTP trigger function to load, split and encode documents in one request."""
+    logger.info("Triggered %s ...", 'ingest_entry')
+    tenant_id = req.route_params.get("tenant_id", 'unknown')
+    return ingest_api_handler(req, tenant_id, VERSION)
+
+# An HTTP-triggered function with a Durable Functions client binding
+@app.route(route="doc_processing/{tenant_id}")
+@app.durable_client_input(client_name="client")
+async def doc_processing_entry(req: func.HttpRequest, client) -> func.HttpResponse:
+    """HTTP trigger function to start the orchestration."""
+    logger.info("Triggered %s ...", 'doc_processing_entry')
+    tenant_id = req.route_params.get("tenant_id", 'unknown')
+    return await orchestrate_api_handler(req, client, tenant_id, VERSION)
+
+# Orchestrator
+@app.orchestration_trigger(context_name="context")
+def doc_processing_orchestrator(context: df.DurableOrchestrationContext):
+    """Orchestrate the workflow."""
+    logger.info("Orchestrator (%s) started...", 'doc_processing_orchestrator')
+    result = yield from orchestration.doc_processing_orchestrator(context)
+    return result
+
+# Activities
+@app.activity_trigger(input_name="payload")
+def plan_document(payload: dict) -> dict:
+    """Activity function to count the pages of a document."""
+    logger.info("Activity (%s) started...", 'plan_document')
+    return orchestration.plan_document(payload)
+
+@app.activity_trigger(input_name="payload")
+def ocr_pages(payload: dict) -> dict:
+    """Activity function to load a page range of a document."""
+    logger.info("Activity (%s) started...", 'ocr_pages')
+    return orchestration.ocr_pages(payload)
+
+@app.activity_trigger(input_name="payload")
+def split_pages(payload: dict) -> dict:
+    """Activity function to split a page group of a document."""
+    logger.info("Activity (%s) started...", 'split_pages')
+    return orchestration.split_pages(payload)
+
+@app.activity_trigger(input_name="payload")
+def encode_chunks(payload: dict) -> dict:
+    """Activity function to encode a batch of document chunks."""
+    logger.info("Activity (%s) started...", 'encode_chunks')
+    return orchestration.encode_chunks(payload)
+
+@app.activity_trigger(input_name="payload")
+def delete_stale_chunks(payload: dict) -> dict:
+    """Activity function to delete the chunks a re-ingestion no longer produces."""
+    logger.info("Activity (%s) started...", 'delete_stale_chunks')
+    return orchestration.delete_stale_chunks(payload)
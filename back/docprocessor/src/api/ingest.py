@@ -0,0 +1,67 @@
+from __future__ import annotations
+import logging
+
+import azure.functions as func
+from src.api.load import is_url, log_input, parse_request, resolve_document_id
+from src.load.loader import download_file, resolve_mime_type
+from src.pipeline.ingest import doc_ingest
+from src.models.serialization import dumps
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+try:
+    import dotenv
+    dotenv.load_dotenv(".env.local")
+except Exception as e:
+    logger.info("dotenv not loaded: %s", e)
+
+CHECKPOINT_FIELDS = {"checkpoint_pages": False, "checkpoint_chunks": False}
+
+def api_handler(
+    req: func.HttpRequest,
+    tenant_id: str,
+    version: str,
+) -> func.HttpResponse:
+    """"HTTP triggered function to load, split and encode doc in one pass."""
+    logger.info("(%s) Starting '%s' ...", version, __name__)
+    params = parse_request(req, version, extra=CHECKPOINT_FIELDS)
+    
+    # Validate input
+    if params["file"] is None:
+        return func.HttpResponse(
+            body="Invalid input",
+            status_code=400,
+        )
+    
+    if is_url(params):
+        logger.info("(%s) download: %s ...", version, params["file"])
+        file_content = download_file(url=params["file"])
+    else:
+        file_content = params["file"]
+    document_id = resolve_document_id(tenant_id, params, file_content)
+    params["mime_type"] = resolve_mime_type(params["mime_type"], file_content)
+
+    # Log the input
+    log_input(version, tenant_id, document_id, params, file_content)
+    for name in CHECKPOINT_FIELDS:
+        logger.info("(%s) %s: %s", version, name, params[name])
+
+    # load, split and encode the document, pipelined in process
+    response_body = doc_ingest(
+        document_id=document_id,
+        tenant_id=tenant_id,
+        label=params["label"],
+        file_content=file_content,
+        mime_type=params["mime_type"],
+        created_at=params["created_at"],
+        chunking_strategy=params["chunking_strategy"],
+        checkpoint_pages=params["checkpoint_pages"],
+        checkpoint_chunks=params["checkpoint_chunks"],
+    )
+
+    return func.HttpResponse(
+        body=dumps(response_body),
+        mimetype="application/json",
+        status_code=200,
+    )
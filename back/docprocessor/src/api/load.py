@@ -1,12 +1,19 @@
 from __future__ import annotations
 import json
-import uuid
 import logging
 from datetime import datetime
 from typing import Optional
 
 import azure.functions as func
-from src.load.loader import download_file, doc_loader
+from src.load.loader import (
+    doc_loader,
+    doc_loader_async,
+    download_file,
+    download_file_async,
+    resolve_mime_type,
+    stable_document_id,
+)
+from src.models.serialization import dumps
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -17,13 +24,13 @@ try:
 except Exception as e:
     logger.info("dotenv not loaded: %s", e)
 
-def api_handler(
+def parse_request(
     req: func.HttpRequest,
-    tenant_id: str,
     version: str,
-) -> func.HttpResponse:
-    """"HTTP triggered function to load doc."""
-    logger.info("(%s) Starting '%s' ...", version, __name__)
+    extra: Optional[dict] = None,
+) -> dict:
+    """Log the request and get the load parameters from its body, with the `extra` body fields
+    of an endpoint, defaulting to the given values."""
     logger.info("(%s) request: %s", version, json.dumps({
         'method': req.method,
         'url': req.url,
@@ -37,74 +44,174 @@ def api_handler(
     logger.info("(%s) Content-Type: %s", version, content_type)
 
     file: Optional[str] = None
+    document_id: Optional[str] = None
     created_at = datetime.now()
     label = created_at.strftime("%Y%m%dT%H%M%S")
     mime_type = "application/octet-stream"
     chunking_strategy = "auto"
+    extra = dict(extra or {})
     try:
         req_body = req.get_json()
     except ValueError:
         logger.info("(%s) Invalid JSON body", version)    
         file = req.get_body()
+        # a raw body declares its mime type in the header, sniffed from the content when generic
+        mime_type = content_type
     else:
         file = req_body.get("url", req_body.get("content", None))
+        document_id = req_body.get('documentId', document_id)
         label = req_body.get('label', label)
         mime_type = req_body.get('mime_type', mime_type)
         chunking_strategy = req_body.get('chunking_strategy', chunking_strategy)
-    
-    document_id = uuid.uuid4().hex
+        extra = {name: req_body.get(name, default) for name, default in extra.items()}
+
+    return {
+        **extra,
+        "content_type": content_type,
+        "file": file,
+        "document_id": document_id,
+        "label": label,
+        "mime_type": mime_type,
+        "chunking_strategy": chunking_strategy,
+        "created_at": created_at,
+    }
+
+def is_url(params: dict) -> bool:
+    """Whether the file of the request is a URL to download."""
+    file = params["file"]
+    return isinstance(file, str) and (file.startswith("https://") or file.startswith("http://"))
+
+def resolve_document_id(
+    tenant_id: str,
+    params: dict,
+    file_content: bytes,
+) -> str:
+    """Document id of the request, else derived from the source URL or the content."""
+    return params["document_id"] or stable_document_id(
+        tenant_id=tenant_id,
+        url=params["file"] if is_url(params) else None,
+        file_content=file_content,
+    )
+
+def log_input(
+    version: str,
+    tenant_id: str,
+    document_id: str,
+    params: dict,
+    file_content: bytes,
+) -> None:
+    """Log the input of the load."""
+    logger.info("(%s) tenant_id: %s", version, tenant_id)
+    logger.info("(%s) document_id: %s", version, document_id)
+    if isinstance(file_content, str):
+        logger.info("(%s) file_content: %s", version, file_content)
+    else:
+        logger.info("(%s) file_content: %s", version, "binary content")
+    logger.info("(%s) mime_type: %s", version, params["mime_type"])
+    logger.info("(%s) label: %s", version, params["label"])
+    logger.info("(%s) created_at: %s", version, params["created_at"])
+    logger.info("(%s) chunking_strategy: %s", version, params["chunking_strategy"])
+
+def load_response(
+    tenant_id: str,
+    document_id: str,
+    params: dict,
+) -> func.HttpResponse:
+    """Response of a load request."""
+    created_at = params["created_at"]
+    response_body = {
+        "tenantId": tenant_id,
+        "documentId": document_id,
+        "label": params["label"],
+        "mimeType": params["mime_type"],
+        "status": "pending",
+        "createdAt": created_at.strftime("%Y-%m-%dT%H:%M:%S"),
+        "updatedAt": created_at.strftime("%Y-%m-%dT%H:%M:%S"),
+        "chunking_strategy": params["chunking_strategy"]
+    }
+
+    return func.HttpResponse(
+        body=dumps(response_body),
+        mimetype="application/json",
+        status_code=200,
+    )
+
+def api_handler(
+    req: func.HttpRequest,
+    tenant_id: str,
+    version: str,
+) -> func.HttpResponse:
+    """"HTTP triggered function to load doc."""
+    logger.info("(%s) Starting '%s' ...", version, __name__)
+    params = parse_request(req, version)
     
     # Validate input
-    if file is None:
+    if params["file"] is None:
         return func.HttpResponse(
             body="Invalid input",
             status_code=400,
         )
     
-    if (
-        content_type != "application/octet-stream" 
-        and (file.startswith("https://") or file.startswith("http://"))
-    ):
-        logger.info("(%s) download: %s ...", version, file)
-        file_content = download_file(url=file)
+    if is_url(params):
+        logger.info("(%s) download: %s ...", version, params["file"])
+        file_content = download_file(url=params["file"])
     else:
-        file_content = file
+        file_content = params["file"]
+    document_id = resolve_document_id(tenant_id, params, file_content)
+    params["mime_type"] = resolve_mime_type(params["mime_type"], file_content)
 
     # Log the input
-    logger.info("(%s) tenant_id: %s", version, tenant_id)
-    logger.info("(%s) document_id: %s", version, document_id)
-    if content_type != "application/octet-stream":
-        logger.info("(%s) file_content: %s", version, file_content)
-    else:
-        logger.info("(%s) file_content: %s", version, "binary content")
-    logger.info("(%s) mime_type: %s", version, mime_type)
-    logger.info("(%s) label: %s", version, label)
-    logger.info("(%s) created_at: %s", version, created_at)
-    logger.info("(%s) chunking_strategy: %s", version, chunking_strategy)
+    log_input(version, tenant_id, document_id, params, file_content)
 
     # load the document and save to blob
     doc_loader(
         document_id=document_id,
         tenant_id=tenant_id,
-        label=label,
+        label=params["label"],
         file_content=file_content,
-        mime_type=mime_type,
-        created_at=created_at,
-        chunking_strategy=chunking_strategy,
+        mime_type=params["mime_type"],
+        created_at=params["created_at"],
+        chunking_strategy=params["chunking_strategy"],
     )
 
-    response_body = {
-        "tenantId": tenant_id,
-        "documentId": document_id,
-        "label": label,
-        "mimeType": mime_type,
-        "status": "pending",
-        "createdAt": created_at.strftime("%Y-%m-%dT%H:%M:%S"),
-        "updatedAt": created_at.strftime("%Y-%m-%dT%H:%M:%S"),
-        "chunking_strategy": chunking_strategy
-    }
+    return load_response(tenant_id, document_id, params)
 
-    return func.HttpResponse(
-        body=json.dumps(response_body, indent=2),
-        status_code=200,
-    )
\ No newline at end of file
+async def api_handler_async(
+    req: func.HttpRequest,
+    tenant_id: str,
+    version: str,
+) -> func.HttpResponse:
+    """HTTP triggered function to load doc, without blocking the worker."""
+    logger.info("(%s) Starting '%s' (async) ...", version, __name__)
+    params = parse_request(req, version)
+    
+    # Validate input
+    if params["file"] is None:
+        return func.HttpResponse(
+            body="Invalid input",
+            status_code=400,
+        )
+    
+    if is_url(params):
+        logger.info("(%s) download: %s ...", version, params["file"])
+        file_content = await download_file_async(url=params["file"])
+    else:
+        file_content = params["file"]
+    document_id = resolve_document_id(tenant_id, params, file_content)
+    params["mime_type"] = resolve_mime_type(params["mime_type"], file_content)
+
+    # Log the input
+    log_input(version, tenant_id, document_id, params, file_content)
+
+    # load the document and save to blob
+    await doc_loader_async(
+        document_id=document_id,
+        tenant_id=tenant_id,
+        label=params["label"],
+        file_content=file_content,
+        mime_type=params["mime_type"],
+        created_at=params["created_at"],
+        chunking_strategy=params["chunking_strategy"],
+    )
+
+    return load_response(tenant_id, document_id, params)
\ No newline at end of file
@@ -0,0 +1,67 @@
+from __future__ import annotations
+import logging
+
+import azure.functions as func
+from src.api.load import is_url, log_input, parse_request, resolve_document_id
+from src.load.loader import download_file_async, resolve_mime_type
+from src.store.blob_aio import save_bytes
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+try:
+    import dotenv
+    dotenv.load_dotenv(".env.local")
+except Exception as e:
+    logger.info("dotenv not loaded: %s", e)
+
+ORCHESTRATOR_NAME = "doc_processing_orchestrator"
+
+async def api_handler(
+    req: func.HttpRequest,
+    client,
+    tenant_id: str,
+    version: str,
+) -> func.HttpResponse:
+    """"HTTP triggered function to start the doc processing orchestration."""
+    logger.info("(%s) Starting '%s' ...", version, __name__)
+    params = parse_request(req, version)
+    
+    # Validate input
+    if params["file"] is None:
+        return func.HttpResponse(
+            body="Invalid input",
+            status_code=400,
+        )
+    
+    if is_url(params):
+        logger.info("(%s) download: %s ...", version, params["file"])
+        file_content = await download_file_async(url=params["file"])
+    else:
+        file_content = params["file"]
+    document_id = resolve_document_id(tenant_id, params, file_content)
+    params["mime_type"] = resolve_mime_type(params["mime_type"], file_content)
+
+    # Log the input
+    log_input(version, tenant_id, document_id, params, file_content)
+
+    # save the source file for the activities, then start the orchestration
+    source = f"{tenant_id}/{document_id}.source"
+    if isinstance(file_content, str):
+        file_content = file_content.encode("utf-8")
+    await save_bytes(filename=source, data=file_content)
+    instance_id = await client.start_new(
+        orchestration_function_name=ORCHESTRATOR_NAME,
+        instance_id=None,
+        client_input={
+            "tenantId": tenant_id,
+            "documentId": document_id,
+            "label": params["label"],
+            "mimeType": params["mime_type"],
+            "createdAt": params["created_at"].strftime("%Y-%m-%dT%H:%M:%S"),
+            "chunkingStrategy": params["chunking_strategy"],
+            "source": source,
+        },
+    )
+    logger.info("(%s) Starting orchestration with ID = '%s'", version, instance_id)
+    return client.create_check_status_response(req, instance_id)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+import json
+import logging
+from typing import Optional
+
+import azure.functions as func
+from src.models.response import NDJSON_MIMETYPE, RESPONSE_MODE, iter_ndjson
+from src.models.serialization import dumps
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+def parse_document_id(
+    req: func.HttpRequest,
+    version: str,
+) -> Optional[str]:
+    """Log the request and get the document id from its body."""
+    logger.info("(%s) request: %s", version, json.dumps({
+        'method': req.method,
+        'url': req.url,
+        'headers': dict(req.headers),
+        'params': dict(req.params),
+        'get_body': req.get_body().decode()
+    }, indent=2))
+
+    # Parse request body
+    document_id: Optional[str] = None
+    try:
+        req_body = req.get_json()
+    except ValueError:
+        logger.info("(%s) Invalid JSON body", version)
+        document_id = req.get_body()
+    else:
+        document_id = req_body.get("documentId", None)
+    return document_id
+
+def parse_response_mode(req: func.HttpRequest) -> str:
+    """Get the response mode from the `response` query parameter or body field."""
+    mode = req.params.get("response")
+    if mode is None:
+        try:
+            req_body = req.get_json()
+        except ValueError:
+            req_body = None
+        if isinstance(req_body, dict):
+            mode = req_body.get("response")
+    return mode or RESPONSE_MODE
+
+def wants_ndjson(req: func.HttpRequest) -> bool:
+    """Whether the client asks for NDJSON, with the `Accept` header or the `stream` query parameter."""
+    accept = req.headers.get("Accept") or ""
+    return NDJSON_MIMETYPE in accept or req.params.get("stream", "").lower() == "true"
+
+def http_response(
+    response_body: dict,
+    ndjson: bool = False,
+) -> func.HttpResponse:
+    """HTTP response of a response body, as one JSON document or as NDJSON lines."""
+    if ndjson:
+        return func.HttpResponse(
+            body=b"".join(iter_ndjson(response_body)),
+            mimetype=NDJSON_MIMETYPE,
+            status_code=200,
+        )
+    return func.HttpResponse(
+        body=dumps(response_body),
+        mimetype="application/json",
+        status_code=200,
+    )
@@ -1,11 +1,11 @@
 from __future__ import annotations
-import json
 import logging
-from typing import Optional
 
 import azure.functions as func
 
-from src.split.spliter import doc_splitter
+from src.split.spliter import doc_splitter, doc_splitter_async
+from src.api.response import http_response, parse_document_id, parse_response_mode, wants_ndjson
+from src.models.response import RESPONSE_MODES
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -23,26 +23,11 @@ def api_handler(
 ) -> func.HttpResponse:
     """"HTTP triggered function to split doc content."""
     logger.info("(%s) Starting '%s' ...", version, __name__)
-    logger.info("(%s) request: %s", version, json.dumps({
-        'method': req.method,
-        'url': req.url,
-        'headers': dict(req.headers),
-        'params': dict(req.params),
-        'get_body': req.get_body().decode()
-    }, indent=2))
-
-    # Parse request body
-    document_id: Optional[str] = None
-    try:
-        req_body = req.get_json()
-    except ValueError:
-        logger.info("(%s) Invalid JSON body", version)    
-        document_id = req.get_body()
-    else:
-        document_id = req_body.get("documentId", None)
+    document_id = parse_document_id(req, version)
+    response_mode = parse_response_mode(req)
     
     # Validate input
-    if document_id is None:
+    if document_id is None or response_mode not in RESPONSE_MODES:
         return func.HttpResponse(
             body="Invalid input",
             status_code=400,
@@ -51,14 +36,44 @@ def api_handler(
     # Log the input
     logger.info("(%s) tenant_id: %s", version, tenant_id)
     logger.info("(%s) document_id: %s", version, document_id)
+    logger.info("(%s) response_mode: %s", version, response_mode)
     
     # split the document and save in text db
     response_body = doc_splitter(
         tenant_id=tenant_id,
         document_id=document_id,
+        response_mode=response_mode,
+    )
+
+    return http_response(response_body, ndjson=wants_ndjson(req))
+
+async def api_handler_async(
+    req: func.HttpRequest,
+    tenant_id: str,
+    version: str,
+) -> func.HttpResponse:
+    """HTTP triggered function to split doc content, without blocking the worker."""
+    logger.info("(%s) Starting '%s' (async) ...", version, __name__)
+    document_id = parse_document_id(req, version)
+    response_mode = parse_response_mode(req)
+    
+    # Validate input
+    if document_id is None or response_mode not in RESPONSE_MODES:
+        return func.HttpResponse(
+            body="Invalid input",
+            status_code=400,
+        )
+
+    # Log the input
+    logger.info("(%s) tenant_id: %s", version, tenant_id)
+    logger.info("(%s) document_id: %s", version, document_id)
+    logger.info("(%s) response_mode: %s", version, response_mode)
+    
+    # split the document and save in text db
+    response_body = await doc_splitter_async(
+        tenant_id=tenant_id,
+        document_id=document_id,
+        response_mode=response_mode,
     )
 
-    return func.HttpResponse(
-        body=json.dumps(response_body, indent=2),
-        status_code=200,
-    )
\ No newline at end of file
+    return http_response(response_body, ndjson=wants_ndjson(req))
\ No newline at end of file
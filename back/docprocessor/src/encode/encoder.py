@@ -1,11 +1,20 @@
 import logging
 import os
+import time
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator
 
 import dotenv
-from mistralai import Mistral
 
-from src.models.chunk import Chunk
-from src.store.cosmosdb import CosmosDB
+from src.encode.quantize import VECTOR_ENCODING, add_quantized
+from src.encode.scheduler import aembed_texts, embed_texts
+from src.models.chunk import ChunkBatch
+from src.models.response import RESPONSE_MODE, ResponseChunks, response_body
+from src.pipeline.streams import abatched, batched
+from src.split.tokens import TokenStats
+from src.store.clients import get_mistral_client
+from src.store.cosmosdb import CosmosDB, raise_for_outcomes
+from src.store.cosmosdb_aio import AsyncCosmosDB
+from src.store.embedding_cache import aembed_with_cache, embed_with_cache, get_embedding_cache
 
 dotenv.load_dotenv(".env.local")
 
@@ -14,43 +23,153 @@ logger.setLevel(logging.INFO)
 
 MISTRAL_API_KEY = os.environ["MISTRAL_API_KEY"]
 MISTRAL_MODEL_NAME = os.environ["MISTRAL_MODEL_NAME"]
+WINDOW_SIZE = 256
+
+def get_embed_fn() -> Callable[[list[str]], list[list[float]]]:
+    """Embed texts with Mistral, through the embedding cache and the batch scheduler."""
+    mistral_client = get_mistral_client(api_key=MISTRAL_API_KEY)
+    embedding_cache = get_embedding_cache()
+
+    def embed_batch(inputs: list[str]) -> list[list[float]]:
+        embeddings_batch_response = mistral_client.embeddings.create(
+            model=MISTRAL_MODEL_NAME,
+            inputs=inputs,
+        )
+        return [e.embedding for e in embeddings_batch_response.data]
+
+    def embed(texts: list[str]) -> list[list[float]]:
+        return embed_with_cache(
+            cache=embedding_cache,
+            model=MISTRAL_MODEL_NAME,
+            texts=texts,
+            embed_fn=lambda misses: embed_texts(embed_fn=embed_batch, texts=misses),
+        )
+
+    return embed
+
+def get_async_embed_fn() -> Callable[[list[str]], Awaitable[list[list[float]]]]:
+    """Embed texts with the async Mistral client, through the embedding cache and the batch scheduler."""
+    mistral_client = get_mistral_client(api_key=MISTRAL_API_KEY)
+    embedding_cache = get_embedding_cache()
+
+    async def embed_batch(inputs: list[str]) -> list[list[float]]:
+        embeddings_batch_response = await mistral_client.embeddings.create_async(
+            model=MISTRAL_MODEL_NAME,
+            inputs=inputs,
+        )
+        return [e.embedding for e in embeddings_batch_response.data]
+
+    async def embed(texts: list[str]) -> list[list[float]]:
+        return await aembed_with_cache(
+            cache=embedding_cache,
+            model=MISTRAL_MODEL_NAME,
+            texts=texts,
+            embed_fn=lambda misses: aembed_texts(embed_fn=embed_batch, texts=misses),
+        )
+
+    return embed
+
+def response_batch(items: list[dict]) -> ChunkBatch:
+    """Batch of encoded items for a response, with their compact vectors only when they have some."""
+    batch = ChunkBatch.from_items(items)
+    if batch.quantized is not None:
+        batch.vectors = None
+    return batch
+
+def encode_items(
+        cosmos_db: CosmosDB,
+        items: Iterable[dict],
+        window_size: int = WINDOW_SIZE,
+) -> Iterator[dict]:
+    """Embed and upsert items one window at a time, yielding the encoded items."""
+    embed = get_embed_fn()
+    for window in batched(items, window_size):
+        # semantic chunks come with a vector seeded from their sentence embeddings
+        unencoded = [item for item in window if item.get("vector") is None]
+        if unencoded:
+            vector_chunks = embed([item['text'] for item in unencoded])
+
+            # pair the text with the vectors
+            for item, vector in zip(unencoded, vector_chunks):
+                item["vector"] = vector
+        add_quantized(window)
+        raise_for_outcomes(cosmos_db.bulk_upsert(items=window), "upsert")
+        yield from window
+
+async def aencode_items(
+        cosmos_db: AsyncCosmosDB,
+        items: AsyncIterable[dict],
+        window_size: int = WINDOW_SIZE,
+) -> AsyncIterator[dict]:
+    """Embed and upsert items one window at a time, yielding the encoded items."""
+    embed = get_async_embed_fn()
+    async for window in abatched(items, window_size):
+        # semantic chunks come with a vector seeded from their sentence embeddings
+        unencoded = [item for item in window if item.get("vector") is None]
+        if unencoded:
+            vector_chunks = await embed([item['text'] for item in unencoded])
+
+            # pair the text with the vectors
+            for item, vector in zip(unencoded, vector_chunks):
+                item["vector"] = vector
+        add_quantized(window)
+        raise_for_outcomes(await cosmos_db.bulk_upsert(items=window), "upsert")
+        for item in window:
+            yield item
+
+def encoder_response(
+        tenant_id: str,
+        document_id: str,
+        encoded: ResponseChunks,
+        token_stats: TokenStats,
+        started_at: float,
+) -> dict:
+    """Response body of an encoding, in the response mode of the encoded chunks."""
+    embedding_cache = get_embedding_cache()
+    logger.info("Encoded %d items, embedding cache: %s", len(encoded), embedding_cache.stats())
+    summary = {
+        "tenantId": tenant_id,
+        "documentId": document_id,
+        "embedding_model": MISTRAL_MODEL_NAME,
+        "embedding_cache": embedding_cache.stats(),
+        "vector_encoding": VECTOR_ENCODING,
+        "encodedCount": len(encoded),
+        **({"tokens": token_stats.to_dict()} if token_stats.chunks else {}),
+        "elapsed": round(time.perf_counter() - started_at, 3),
+    }
+    chunks = response_batch(encoded.items).to_dicts(arrays=True) if encoded.mode == "full" else None
+    return response_body(summary, encoded.ids, chunks, encoded.mode)
 
 def doc_encoder(
         tenant_id: str,
         document_id: str,
+        response_mode: str = RESPONSE_MODE,
  )-> dict:
     """Encode the content into a vector representation."""
+    started_at = time.perf_counter()
+    encoded = ResponseChunks(response_mode)
+    token_stats = TokenStats()
 
-    # load the content
+    # load the chunks without a vector lazily: unchanged chunks keep the vector of a previous encoding
     cosmos_db = CosmosDB()
-    items = cosmos_db.find(filter={
-        "tenantId": tenant_id,
-        "documentId": document_id,
-    })
-    logger.info("Loaded %d items: %s", len(items), list(items))
-
-    # encode the content
-    text_chunks = [item['text'] for item in items]
-    mistral_client = Mistral(api_key=MISTRAL_API_KEY)
-    embeddings_batch_response = mistral_client.embeddings.create(
-        model=MISTRAL_MODEL_NAME,
-        inputs=text_chunks,
-    )
-    vector_chunks = [e.embedding for e in embeddings_batch_response.data]
-
-    # pair the text with the vectors
-    for idx, item in enumerate(items):
-        item["vector"] = vector_chunks[idx]
-        cosmos_db.upsert(item)
-
-    chunks = [
-        Chunk(text=item['text'], vector=item['vector'])
-        for item in items
-    ]
-
-    return {
-        "tenantId": tenant_id,
-        "documentId": document_id,
-        "embedding_model": MISTRAL_MODEL_NAME,
-        "chunks": [chunk.to_dict() for chunk in chunks],
-    }
\ No newline at end of file
+    items = cosmos_db.iter_find_unencoded(tenant_id=tenant_id, document_id=document_id)
+
+    # encode the content one window of items at a time, keeping the items for a full response only
+    for item in encode_items(cosmos_db=cosmos_db, items=items):
+        encoded.add(token_stats.add(item))
+    return encoder_response(tenant_id, document_id, encoded, token_stats, started_at)
+
+async def doc_encoder_async(
+        tenant_id: str,
+        document_id: str,
+        response_mode: str = RESPONSE_MODE,
+)-> dict:
+    """Encode the content into a vector representation, on the async clients."""
+    started_at = time.perf_counter()
+    encoded = ResponseChunks(response_mode)
+    token_stats = TokenStats()
+    cosmos_db = AsyncCosmosDB()
+    items = cosmos_db.iter_find_unencoded(tenant_id=tenant_id, document_id=document_id)
+    async for item in aencode_items(cosmos_db=cosmos_db, items=items):
+        encoded.add(token_stats.add(item))
+    return encoder_response(tenant_id, document_id, encoded, token_stats, started_at)
@@ -0,0 +1,132 @@
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Sequence
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+EMBED_MAX_BATCH_SIZE = 64
+EMBED_MAX_BATCH_CHARS = 32_000  # ~8k tokens at ~4 chars per token, below the request limit
+EMBED_MAX_CONCURRENCY = 4
+EMBED_MAX_RETRIES = 3
+EMBED_BACKOFF_SECONDS = 1.0
+
+EmbedFn = Callable[[list[str]], list[list[float]]]
+AsyncEmbedFn = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+
+def make_batches(
+        texts: Sequence[str],
+        max_batch_size: int = EMBED_MAX_BATCH_SIZE,
+        max_batch_chars: int = EMBED_MAX_BATCH_CHARS,
+) -> list[list[int]]:
+    """Group consecutive text indices into batches within the size and character budgets."""
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    batch_chars = 0
+    for idx, text in enumerate(texts):
+        if batch and (
+            len(batch) >= max_batch_size
+            or batch_chars + len(text) > max_batch_chars
+        ):
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append(idx)
+        batch_chars += len(text)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _embed_with_retry(
+        embed_fn: EmbedFn,
+        inputs: list[str],
+        max_retries: int,
+) -> list[list[float]]:
+    """Embed one batch, retrying it on failure with exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            vectors = embed_fn(inputs)
+            if len(vectors) != len(inputs):
+                msg = f"Expected {len(inputs)} embeddings, got {len(vectors)}"
+                raise ValueError(msg)
+            return vectors
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = EMBED_BACKOFF_SECONDS * 2 ** attempt
+            logger.warning("Embedding batch of %d failed (%s), retry in %.1fs", len(inputs), e, delay)
+            time.sleep(delay)
+
+
+def embed_texts(
+        embed_fn: EmbedFn,
+        texts: Sequence[str],
+        max_batch_size: int = EMBED_MAX_BATCH_SIZE,
+        max_batch_chars: int = EMBED_MAX_BATCH_CHARS,
+        max_concurrency: int = EMBED_MAX_CONCURRENCY,
+        max_retries: int = EMBED_MAX_RETRIES,
+) -> list[list[float]]:
+    """Embed texts in size-limited batches on a bounded thread pool, preserving input order."""
+    batches = make_batches(texts, max_batch_size=max_batch_size, max_batch_chars=max_batch_chars)
+    logger.info("Embedding %d texts in %d batches", len(texts), len(batches))
+    if not batches:
+        return []
+
+    vectors: list[list[float]] = [None] * len(texts)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(batches)))) as executor:
+        futures = [
+            executor.submit(_embed_with_retry, embed_fn, [texts[idx] for idx in batch], max_retries)
+            for batch in batches
+        ]
+        for batch, future in zip(batches, futures):
+            for idx, vector in zip(batch, future.result()):
+                vectors[idx] = vector
+    return vectors
+
+
+async def _aembed_with_retry(
+        embed_fn: AsyncEmbedFn,
+        inputs: list[str],
+        max_retries: int,
+) -> list[list[float]]:
+    """Embed one batch, retrying it on failure with exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            vectors = await embed_fn(inputs)
+            if len(vectors) != len(inputs):
+                msg = f"Expected {len(inputs)} embeddings, got {len(vectors)}"
+                raise ValueError(msg)
+            return vectors
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = EMBED_BACKOFF_SECONDS * 2 ** attempt
+            logger.warning("Embedding batch of %d failed (%s), retry in %.1fs", len(inputs), e, delay)
+            await asyncio.sleep(delay)
+
+
+async def aembed_texts(
+        embed_fn: AsyncEmbedFn,
+        texts: Sequence[str],
+        max_batch_size: int = EMBED_MAX_BATCH_SIZE,
+        max_batch_chars: int = EMBED_MAX_BATCH_CHARS,
+        max_concurrency: int = EMBED_MAX_CONCURRENCY,
+        max_retries: int = EMBED_MAX_RETRIES,
+) -> list[list[float]]:
+    """Embed texts in size-limited batches with bounded concurrency on the event loop, preserving input order."""
+    batches = make_batches(texts, max_batch_size=max_batch_size, max_batch_chars=max_batch_chars)
+    logger.info("Embedding %d texts in %d batches", len(texts), len(batches))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(batch: list[int]) -> list[list[float]]:
+        async with semaphore:
+            return await _aembed_with_retry(embed_fn, [texts[idx] for idx in batch], max_retries)
+
+    vectors: list[list[float]] = [None] * len(texts)
+    for batch, batch_vectors in zip(batches, await asyncio.gather(*(run(b) for b in batches))):
+        for idx, vector in zip(batch, batch_vectors):
+            vectors[idx] = vector
+    return vectors
@@ -1,17 +1,24 @@
+import hashlib
 import logging
 from datetime import datetime
+from typing import Optional, Union
 
+import aiohttp
 import requests
 
-from src.load.mistral_loader import MistralLoader
-from src.load.text_loader import TextLoader
+from src.load.registry import get_registry
 from src.models.page_content import PageContent
-from src.store.blob import save
+from src.store import blob_aio
+from src.store.blob import save_lines
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+class LoaderError(Exception):
+    """A loader failed while producing the pages of a document: the next loader class may be tried."""
+
+
 def download_file(
         url: str
 ) -> bytes:
@@ -23,6 +30,61 @@ def download_file(
     else:
         raise ValueError(f"Failed to download file. Status code: {response.status_code}")
 
+async def download_file_async(
+        url: str
+) -> bytes:
+    """Download a file from the given URL without blocking the event loop."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as response:
+            if response.status == 200:
+                return await response.read()
+            raise ValueError(f"Failed to download file. Status code: {response.status}")
+
+def stable_document_id(
+        tenant_id: str,
+        url: Optional[str] = None,
+        file_content: Union[bytes, str, None] = None,
+) -> str:
+    """Stable id of a document: derived from its source URL, or else from its content.
+
+    Re-loading the same source yields the same id, so its chunks can be diffed instead of duplicated.
+    """
+    digest = hashlib.sha256(tenant_id.encode("utf-8") + b"\0")
+    if url:
+        digest.update(b"url\0" + url.encode("utf-8"))
+    else:
+        if isinstance(file_content, str):
+            file_content = file_content.encode("utf-8")
+        digest.update(b"content\0" + (file_content or b""))
+    return digest.hexdigest()[:32]
+
+def resolve_mime_type(mime_type: Optional[str], file_content: Union[bytes, str, None] = None) -> str:
+    """Normalized mime type of a document, sniffed from its content when the declared one is generic."""
+    return get_registry().resolve_mime_type(mime_type, file_content)
+
+def get_loader_classes(mime_type: str, file_content: Union[bytes, str, None] = None) -> list[type]:
+    """Get the loader classes of a mime type, in order of preference."""
+    registry = get_registry()
+    return registry.get(registry.resolve_mime_type(mime_type, file_content))
+
+def document_header(
+        document_id: str,
+        tenant_id: str,
+        label: str,
+        mime_type: str,
+        created_at: datetime,
+        chunking_strategy: str,
+) -> dict:
+    """Build the header record of a loaded document."""
+    return {
+        "tenantId": tenant_id,
+        "documentId": document_id,
+        "label": label,
+        "mimeType": mime_type,
+        "createdAt": created_at.strftime("%Y-%m-%dT%H:%M:%S"),
+        "chunkingStrategy": chunking_strategy,
+    }
+
 def doc_loader(
         document_id: str,
         tenant_id: str,
@@ -34,61 +96,88 @@ def doc_loader(
         
 ) -> dict:
     """Load a document based on its mime type."""
+    mime_type = resolve_mime_type(mime_type, file_content)
+    header = document_header(
+        document_id=document_id,
+        tenant_id=tenant_id,
+        label=label,
+        mime_type=mime_type,
+        created_at=created_at or datetime.now(),
+        chunking_strategy=chunking_strategy,
+    )
 
-    file_type_mappings = {
-        'txt': [TextLoader],
-        'text/plain': [TextLoader],
-        'plain': [TextLoader],
-        'text/markdown': [TextLoader],
-        'markdown': [TextLoader],
-        'pdf': [MistralLoader],
-        'application/pdf': [MistralLoader],
-        'image/png': [MistralLoader],
-        'png': [MistralLoader],
-        "octet-stream": [MistralLoader],
-    }
+    # iterate over the loader classes
+    for loader_cls in get_loader_classes(mime_type):
+        page_count = 0
+
+        def records():
+            """Yield the header, then one record per page as the loader produces it."""
+            nonlocal page_count
+            yield header
+            try:
+                for content in loader_cls().lazy_load(file_content):
+                    page_count += 1
+                    yield PageContent(page_content=content).to_dict()
+            except Exception as e:
+                raise LoaderError(f"{loader_cls.__name__} failed: {e}") from e
+
+        # a loader failing falls back to the next one, a storage failure propagates
+        try:
+            save_lines(
+                filename=f"{tenant_id}/{document_id}.jsonl",
+                records=records(),
+            )
+        except LoaderError as e:
+            logger.exception(msg=str(e))
+            continue
+        return {**header, "pageCount": page_count}
+
+    raise ValueError(f"Failed to load document with mimeType: {mime_type}")
+
+async def doc_loader_async(
+        document_id: str,
+        tenant_id: str,
+        label: str,
+        file_content: bytes,
+        mime_type: str = 'auto',
+        created_at: datetime = None,
+        chunking_strategy: str = 'auto',
+) -> dict:
+    """Load a document based on its mime type, on the async clients."""
+    mime_type = resolve_mime_type(mime_type, file_content)
+    header = document_header(
+        document_id=document_id,
+        tenant_id=tenant_id,
+        label=label,
+        mime_type=mime_type,
+        created_at=created_at or datetime.now(),
+        chunking_strategy=chunking_strategy,
+    )
+
+    # iterate over the loader classes
+    for loader_cls in get_loader_classes(mime_type):
+        page_count = 0
+
+        async def records():
+            """Yield the header, then one record per page as the loader produces it."""
+            nonlocal page_count
+            yield header
+            try:
+                async for content in loader_cls().alazy_load(file_content):
+                    page_count += 1
+                    yield PageContent(page_content=content).to_dict()
+            except Exception as e:
+                raise LoaderError(f"{loader_cls.__name__} failed: {e}") from e
+
+        # a loader failing falls back to the next one, a storage failure propagates
+        try:
+            await blob_aio.save_lines(
+                filename=f"{tenant_id}/{document_id}.jsonl",
+                records=records(),
+            )
+        except LoaderError as e:
+            logger.exception(msg=str(e))
+            continue
+        return {**header, "pageCount": page_count}
 
-    # iterate over the file type mappings
-    page_contents: list[PageContent] = []
-    for glob_pattern, list_of_loader_cls in file_type_mappings.items():
-        if mime_type.split('/')[1] in glob_pattern:
-            # iterate over the loader classes
-            for loader_cls in list_of_loader_cls:
-                loaded = False
-                content = None
-                try:
-                    if loader_cls == TextLoader:
-                        content = TextLoader().load(file_content)
-                        page_contents.append(PageContent(page_content=content))
-                        loaded = True
-                    elif loader_cls == MistralLoader:
-                        contents = MistralLoader().load(file_content)
-                        for c in contents:
-                            page_contents.append(PageContent(page_content=c))
-                        loaded = True
-                    else:
-                        raise ValueError(f"Unsupported loader class: {loader_cls}")
-                except Exception as e:
-                    logger.exception(msg=str(e))
-                
-                if loaded:
-                    data_object = {
-                        "tenantId": tenant_id,
-                        "documentId": document_id,
-                        "label": label,
-                        "mimeType": mime_type,
-                        "pageContents": [pc.to_dict() for pc in page_contents],
-                        "createdAt": created_at.strftime("%Y-%m-%dT%H:%M:%S"),
-                        "chunkingStrategy": chunking_strategy,
-                    }
-                    try:
-                        save(
-                            filename=f"{tenant_id}/{document_id}.json",
-                            data=data_object
-                        )
-                    except Exception as e:
-                        logger.exception(msg=str(e))
-                    return data_object
-    
-    
-    raise ValueError(f"Unsupported mimeType: {mime_type}")
+    raise ValueError(f"Failed to load document with mimeType: {mime_type}")
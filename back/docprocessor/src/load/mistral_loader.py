@@ -1,10 +1,17 @@
 import json
 import os
+import asyncio
 from pathlib import Path
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator
 
 import dotenv
-from mistralai import Mistral, OCRResponse
+from mistralai import OCRResponse
+
+from src.load.pdf import count_pages, extract_pages, is_pdf, page_ranges
+from src.store.clients import get_mistral_client
+from src.store.ocr_cache import aocr_with_cache, get_ocr_cache, ocr_with_cache
 
 dotenv.load_dotenv(".env.local")
 
@@ -13,17 +20,74 @@ logger.setLevel(logging.INFO)
 
 API_KEY = os.environ["MISTRAL_API_KEY"]
 MODEL_NAME = "mistral-ocr-latest"
+OCR_PAGES_PER_RANGE = 10
+OCR_MAX_CONCURRENCY = 4
 
 class MistralLoader:
-    """Load a PDF file using Mistral OCR."""
+    """Load a PDF file using Mistral OCR.
+
+    A large PDF file is split into page ranges, processed as concurrent OCR jobs.
+    """
+
+    pages_per_range: int
+    max_concurrency: int
+
+    def __init__(
+        self,
+        pages_per_range: int = OCR_PAGES_PER_RANGE,
+        max_concurrency: int = OCR_MAX_CONCURRENCY,
+    ):
+        """Initialize."""
+        self.pages_per_range = pages_per_range
+        self.max_concurrency = max_concurrency
+
+    def _page_ranges(self, pdf_file_content: bytes) -> list[tuple[int, int]]:
+        """Page ranges of the PDF file, one OCR job each."""
+        if not is_pdf(pdf_file_content):
+            return []
+        return page_ranges(count_pages(pdf_file_content), self.pages_per_range)
+
+    def load(self, pdf_file_content: bytes) -> list[str]:
+        """Load the PDF file and return the page contents."""
+        return list(self.lazy_load(pdf_file_content))
+
+    def lazy_load(self, pdf_file_content: bytes) -> Iterator[str]:
+        """Yield the OCR markdown of the PDF file page by page.
+
+        Page ranges are processed concurrently, and their pages are yielded in order as soon as
+        every earlier range is done.
+        """
+        ranges = self._page_ranges(pdf_file_content)
+        if len(ranges) < 2:
+            yield from self._load_range(pdf_file_content)
+            return
+        logger.info("OCR: %d page ranges, %d concurrent jobs", len(ranges), self.max_concurrency)
+        executor = ThreadPoolExecutor(max_workers=max(1, self.max_concurrency))
+        try:
+            futures = [
+                executor.submit(self._load_page_range, pdf_file_content, start, end)
+                for start, end in ranges
+            ]
+            for future in futures:
+                yield from future.result()
+        finally:
+            # a consumer that stops early does not wait for the remaining ranges
+            executor.shutdown(wait=False, cancel_futures=True)
 
-    def __init__(self):
-        """Initialize with PDF file path."""
-        pass
+    def _load_page_range(self, pdf_file_content: bytes, start: int, end: int) -> list[str]:
+        """Load the pages [start, end) of the PDF file as one OCR job."""
+        return self._load_range(extract_pages(pdf_file_content, start, end))
 
-    def load(self, pdf_file_content: bytes) -> dict:
-        """Load the PDF file and return the OCR response."""
-        mistral_client = Mistral(api_key=API_KEY)
+    def _load_range(self, pdf_file_content: bytes) -> list[str]:
+        """Load a PDF file as one OCR job, from the OCR cache where possible."""
+        ocr_cache = get_ocr_cache()
+        contents = ocr_with_cache(ocr_cache, MODEL_NAME, pdf_file_content, self._ocr)
+        logger.info("OCR cache: %s", ocr_cache.stats())
+        return contents
+
+    def _ocr(self, pdf_file_content: bytes) -> list[str]:
+        """Run OCR on the PDF file and return the page contents."""
+        mistral_client = get_mistral_client(api_key=API_KEY)
         uploaded_pdf = mistral_client.files.upload(
             file={
                 "file_name": "uploaded_file.pdf",
@@ -47,3 +111,63 @@ class MistralLoader:
         contents = [p["markdown"] for p in ocr_dump["pages"]]
 
         return contents
+
+    async def aload(self, pdf_file_content: bytes) -> list[str]:
+        """Load the PDF file with the async Mistral client and return the page contents."""
+        return [content async for content in self.alazy_load(pdf_file_content)]
+
+    async def alazy_load(self, pdf_file_content: bytes) -> AsyncIterator[str]:
+        """Yield the OCR markdown of the PDF file page by page.
+
+        Page ranges are processed concurrently, and their pages are yielded in order as soon as
+        every earlier range is done.
+        """
+        ranges = await asyncio.to_thread(self._page_ranges, pdf_file_content)
+        if len(ranges) < 2:
+            for content in await self._aload_range(pdf_file_content):
+                yield content
+            return
+        logger.info("OCR: %d page ranges, %d concurrent jobs", len(ranges), self.max_concurrency)
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def load_range(start: int, end: int) -> list[str]:
+            async with semaphore:
+                range_content = await asyncio.to_thread(extract_pages, pdf_file_content, start, end)
+                return await self._aload_range(range_content)
+
+        tasks = [asyncio.ensure_future(load_range(start, end)) for start, end in ranges]
+        try:
+            for task in tasks:
+                for content in await task:
+                    yield content
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _aload_range(self, pdf_file_content: bytes) -> list[str]:
+        """Load a PDF file as one OCR job with the async Mistral client, from the OCR cache where possible."""
+        ocr_cache = get_ocr_cache()
+        contents = await aocr_with_cache(ocr_cache, MODEL_NAME, pdf_file_content, self._aocr)
+        logger.info("OCR cache: %s", ocr_cache.stats())
+        return contents
+
+    async def _aocr(self, pdf_file_content: bytes) -> list[str]:
+        """Run OCR on the PDF file with the async Mistral client and return the page contents."""
+        mistral_client = get_mistral_client(api_key=API_KEY)
+        uploaded_pdf = await mistral_client.files.upload_async(
+            file={
+                "file_name": "uploaded_file.pdf",
+                "content": pdf_file_content,
+            },
+            purpose="ocr",
+        )
+        signed_url = await mistral_client.files.get_signed_url_async(file_id=uploaded_pdf.id)
+
+        ocr_response: OCRResponse = await mistral_client.ocr.process_async(
+            model=MODEL_NAME,
+            document={
+                "type": "document_url",
+                "document_url": signed_url.url,
+            },
+        )
+        return [p.markdown for p in ocr_response.pages]
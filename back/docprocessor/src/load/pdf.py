@@ -0,0 +1,52 @@
+import io
+from typing import Sequence
+
+from pypdf import PdfReader, PdfWriter
+
+PDF_MAGIC = b"%PDF"
+
+
+def is_pdf(file_content: bytes) -> bool:
+    """Check the PDF magic bytes."""
+    return isinstance(file_content, bytes) and file_content[:1024].lstrip().startswith(PDF_MAGIC)
+
+
+def count_pages(file_content: bytes) -> int:
+    """Count the pages of a PDF file."""
+    return len(PdfReader(io.BytesIO(file_content)).pages)
+
+
+def page_ranges(page_count: int, pages_per_range: int) -> list[tuple[int, int]]:
+    """Cut `page_count` pages into consecutive [start, end) ranges."""
+    return [
+        (start, min(start + pages_per_range, page_count))
+        for start in range(0, page_count, pages_per_range)
+    ]
+
+
+def _write_pages(pages) -> bytes:
+    """Write pages as a new PDF file."""
+    writer = PdfWriter()
+    for page in pages:
+        writer.add_page(page)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def extract_pages(file_content: bytes, start: int, end: int) -> bytes:
+    """Extract the pages [start, end) of a PDF file as a new PDF file."""
+    reader = PdfReader(io.BytesIO(file_content))
+    return _write_pages(reader.pages[start:end])
+
+
+def select_pages(file_content: bytes, indices: Sequence[int]) -> bytes:
+    """Extract the pages at `indices` of a PDF file, in that order, as a new PDF file."""
+    reader = PdfReader(io.BytesIO(file_content))
+    return _write_pages(reader.pages[idx] for idx in indices)
+
+
+def split_page_files(file_content: bytes) -> list[bytes]:
+    """Split a PDF file into one single-page PDF file per page."""
+    reader = PdfReader(io.BytesIO(file_content))
+    return [_write_pages([page]) for page in reader.pages]
@@ -0,0 +1,103 @@
+import io
+import asyncio
+import logging
+from typing import AsyncIterator, Iterator, Optional
+
+from pypdf import PdfReader
+
+from src.load.mistral_loader import MistralLoader
+from src.load.pdf import is_pdf, select_pages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PDF_TEXT_MIN_CHARS = 32
+PDF_TEXT_MIN_ALNUM_RATIO = 0.5  # below, the text layer is likely garbled (e.g. fonts without a unicode map)
+
+
+def is_text_sufficient(
+        text: str,
+        min_chars: int = PDF_TEXT_MIN_CHARS,
+        min_alnum_ratio: float = PDF_TEXT_MIN_ALNUM_RATIO,
+) -> bool:
+    """Tell whether the extracted text of a page is usable without OCR."""
+    chars = "".join(text.split())
+    if len(chars) < min_chars:
+        return False
+    return sum(c.isalnum() for c in chars) / len(chars) >= min_alnum_ratio
+
+
+def extract_page_texts(file_content: bytes) -> list[str]:
+    """Extract the text layer of each page of a PDF file."""
+    reader = PdfReader(io.BytesIO(file_content))
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+class PdfTextLoader:
+    """Load a PDF file from its text layer, sending only the image-only pages to OCR.
+
+    Files other than PDF files go to OCR as a whole.
+    """
+
+    min_chars: int
+    ocr_loader: MistralLoader
+
+    def __init__(
+        self,
+        min_chars: int = PDF_TEXT_MIN_CHARS,
+        ocr_loader: Optional[MistralLoader] = None,
+    ):
+        """Initialize."""
+        self.min_chars = min_chars
+        self.ocr_loader = ocr_loader or MistralLoader()
+
+    def _plan(self, file_content: bytes) -> tuple[list[str], list[int]]:
+        """Page texts of the PDF file, and the indices of the pages to OCR."""
+        texts = extract_page_texts(file_content)
+        ocr_idxs = [idx for idx, text in enumerate(texts) if not is_text_sufficient(text, self.min_chars)]
+        logger.info("PDF text layer: %d pages, %d to OCR", len(texts), len(ocr_idxs))
+        return texts, ocr_idxs
+
+    def load(self, file_content: bytes) -> list[str]:
+        """Load the file and return the page contents."""
+        return list(self.lazy_load(file_content))
+
+    def lazy_load(self, file_content: bytes) -> Iterator[str]:
+        """Yield the page contents in order, from the text layer or else from OCR."""
+        if not is_pdf(file_content):
+            yield from self.ocr_loader.lazy_load(file_content)
+            return
+        texts, ocr_idxs = self._plan(file_content)
+        ocr_pages = iter(())
+        if ocr_idxs:
+            ocr_pages = self.ocr_loader.lazy_load(select_pages(file_content, ocr_idxs))
+        ocr_idx_set = set(ocr_idxs)
+        for idx, text in enumerate(texts):
+            if idx not in ocr_idx_set:
+                yield text
+                continue
+            content = next(ocr_pages, None)
+            if content is None:
+                raise ValueError("OCR returned fewer pages than it was sent.")
+            yield content
+
+    async def alazy_load(self, file_content: bytes) -> AsyncIterator[str]:
+        """Yield the page contents in order, from the text layer or else from OCR."""
+        if not is_pdf(file_content):
+            async for content in self.ocr_loader.alazy_load(file_content):
+                yield content
+            return
+        texts, ocr_idxs = await asyncio.to_thread(self._plan, file_content)
+        ocr_pages = None
+        if ocr_idxs:
+            ocr_content = await asyncio.to_thread(select_pages, file_content, ocr_idxs)
+            ocr_pages = self.ocr_loader.alazy_load(ocr_content)
+        ocr_idx_set = set(ocr_idxs)
+        for idx, text in enumerate(texts):
+            if idx not in ocr_idx_set:
+                yield text
+                continue
+            content = await anext(ocr_pages, None)
+            if content is None:
+                raise ValueError("OCR returned fewer pages than it was sent.")
+            yield content
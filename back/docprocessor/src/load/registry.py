@@ -0,0 +1,167 @@
+import io
+import logging
+import threading
+import zipfile
+from importlib.metadata import entry_points
+from typing import Optional, Union
+
+from src.load.mistral_loader import MistralLoader
+from src.load.pdf_text_loader import PdfTextLoader
+from src.load.text_loader import TextLoader
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+ENTRY_POINT_GROUP = "docprocessor.loaders"  # entry point name: mime type, value: loader class
+GENERIC_MIME_TYPES = {"application/octet-stream", "auto", ""}
+SNIFF_BYTES = 2048
+
+MIME_TYPE_ALIASES = {
+    "auto": "application/octet-stream",
+    "octet-stream": "application/octet-stream",
+    "binary/octet-stream": "application/octet-stream",
+    "pdf": "application/pdf",
+    "application/x-pdf": "application/pdf",
+    "txt": "text/plain",
+    "plain": "text/plain",
+    "text": "text/plain",
+    "md": "text/markdown",
+    "markdown": "text/markdown",
+    "text/x-markdown": "text/markdown",
+    "csv": "text/csv",
+    "html": "text/html",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+# magic bytes of binary formats, in order of precedence
+MAGIC_BYTES = [
+    (b"%PDF", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"PK\x03\x04", "application/zip"),
+]
+
+DEFAULT_LOADERS = {
+    "text/plain": [TextLoader],
+    "text/markdown": [TextLoader],
+    "text/csv": [TextLoader],
+    "text/html": [TextLoader],
+    # the text layer of a PDF file first, OCR of the whole file as a fallback
+    "application/pdf": [PdfTextLoader, MistralLoader],
+    "image/png": [MistralLoader],
+    "image/jpeg": [MistralLoader],
+    "application/octet-stream": [PdfTextLoader, MistralLoader],
+}
+
+
+def normalize_mime_type(mime_type: Optional[str]) -> str:
+    """Lowercase a mime type, drop its parameters and resolve its aliases."""
+    mime_type = (mime_type or "").split(";")[0].strip().lower()
+    return MIME_TYPE_ALIASES.get(mime_type, mime_type or "application/octet-stream")
+
+
+def sniff_mime_type(file_content: Union[bytes, str, None]) -> Optional[str]:
+    """Infer the mime type of a file from its magic bytes; None when unknown."""
+    if file_content is None:
+        return None
+    if isinstance(file_content, str):
+        return "text/plain"
+    head = file_content[:SNIFF_BYTES]
+    stripped = head.lstrip()
+    for magic, mime_type in MAGIC_BYTES:
+        if stripped.startswith(magic):
+            if mime_type == "application/zip":
+                return _sniff_zip(file_content)
+            return mime_type
+    if b"\x00" in head:
+        return None
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # a multi-byte character may be cut at the end of the head
+        if len(file_content) <= SNIFF_BYTES or e.start < len(head) - 3:
+            return None
+    if stripped[:14].lower().startswith((b"<!doctype html", b"<html")):
+        return "text/html"
+    return "text/plain"
+
+
+def _sniff_zip(file_content: bytes) -> str:
+    """Mime type of a zip container, from its entries."""
+    try:
+        names = zipfile.ZipFile(io.BytesIO(file_content)).namelist()
+    except zipfile.BadZipFile:
+        return "application/zip"
+    if "word/document.xml" in names:
+        return MIME_TYPE_ALIASES["docx"]
+    return "application/zip"
+
+
+class LoaderRegistry:
+    """Loader classes by normalized mime type, in order of preference."""
+
+    loaders: dict[str, list[type]]
+
+    def __init__(self, loaders: Optional[dict[str, list[type]]] = None) -> None:
+        """Initialize with a copy of the given loaders."""
+        self.loaders = {
+            normalize_mime_type(mime_type): list(loader_classes)
+            for mime_type, loader_classes in (loaders or {}).items()
+        }
+
+    def register(self, mime_type: str, loader_cls: type, first: bool = False) -> None:
+        """Register a loader class for a mime type, last (fallback) or first (preferred)."""
+        loader_classes = self.loaders.setdefault(normalize_mime_type(mime_type), [])
+        if loader_cls in loader_classes:
+            loader_classes.remove(loader_cls)
+        if first:
+            loader_classes.insert(0, loader_cls)
+        else:
+            loader_classes.append(loader_cls)
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> None:
+        """Register the loader classes advertised by installed packages, as preferred loaders."""
+        for entry_point in entry_points(group=group):
+            try:
+                self.register(entry_point.name, entry_point.load(), first=True)
+            except Exception as e:
+                logger.warning("Loader entry point %s not registered: %s", entry_point.name, e)
+                continue
+            logger.info("Loader entry point %s registered for %s", entry_point.value, entry_point.name)
+
+    def resolve_mime_type(self, mime_type: Optional[str], file_content: Union[bytes, str, None] = None) -> str:
+        """Mime type to dispatch on: the declared one, unless it is generic or unsupported
+        and the content sniffs as a supported type."""
+        declared = normalize_mime_type(mime_type)
+        if declared not in GENERIC_MIME_TYPES and declared in self.loaders:
+            return declared
+        sniffed = sniff_mime_type(file_content)
+        if sniffed in self.loaders:
+            if sniffed != declared:
+                logger.info("Mime type %s sniffed as %s", declared, sniffed)
+            return sniffed
+        return declared
+
+    def get(self, mime_type: str) -> list[type]:
+        """Loader classes of a normalized mime type, in order of preference."""
+        loader_classes = self.loaders.get(mime_type)
+        if not loader_classes:
+            raise ValueError(f"Unsupported mimeType: {mime_type}")
+        return loader_classes
+
+
+_REGISTRY: Optional[LoaderRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry() -> LoaderRegistry:
+    """Process-wide loader registry, with the default and the entry point loaders."""
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = LoaderRegistry(DEFAULT_LOADERS)
+            _REGISTRY.load_entry_points()
+        return _REGISTRY
@@ -1,3 +1,6 @@
+from typing import AsyncIterator, Iterator
+
+
 class TextLoader:
 
     def __init__(self):
@@ -7,7 +10,17 @@ class TextLoader:
         """Load the text content from the file."""
         if isinstance(file_content, bytes):
             self.content = file_content.decode('utf-8')
+        elif isinstance(file_content, str):
+            self.content = file_content
         else:
-            raise ValueError("File content must be in bytes.")
+            raise ValueError("File content must be in bytes or str.")
         
-        return self.content
\ No newline at end of file
+        return self.content
+
+    def lazy_load(self, file_content: bytes) -> Iterator[str]:
+        """Yield the text content as a single page."""
+        yield self.load(file_content)
+
+    async def alazy_load(self, file_content: bytes) -> AsyncIterator[str]:
+        """Yield the text content as a single page."""
+        yield self.load(file_content)
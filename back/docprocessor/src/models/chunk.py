@@ -1,13 +1,88 @@
 from __future__ import annotations
-from typing import Optional
-from dataclasses import dataclass, asdict
+from typing import Iterable, Iterator, Optional, Sequence, Union
+from dataclasses import dataclass
 
-@dataclass
+import numpy as np
+
+VectorLike = Union[np.ndarray, Sequence[float]]
+
+
+def as_vector(vector: Optional[VectorLike]) -> Optional[np.ndarray]:
+    """Float32 array of a vector, without a copy when it already is one."""
+    if vector is None:
+        return None
+    return np.asarray(vector, dtype=np.float32)
+
+
+@dataclass(slots=True)
 class Chunk:
     """A class to represent a chunk of text."""
     text: str
-    vector: Optional[list[float]] = None
+    vector: Optional[np.ndarray] = None  # float32, see `as_vector`
+    quantized: Optional[dict] = None  # compact vector, see `src.encode.quantize`
+
+    def __post_init__(self) -> None:
+        self.vector = as_vector(self.vector)
+
+    def to_dict(self, arrays: bool = False) -> dict:
+        """Convert the Chunk instance to a dictionary, the vector as a list of floats; with `arrays`,
+        the vector is the float32 array itself, to serialize with `src.models.serialization.dumps`."""
+        vector = self.vector
+        if vector is not None and not arrays:
+            vector = vector.tolist()
+        return {"text": self.text, "vector": vector, "quantized": self.quantized}
+
+
+class ChunkBatch:
+    """Columnar batch of chunks: the texts, and the vectors as rows of one float32 matrix."""
+
+    __slots__ = ("texts", "vectors", "quantized")
+
+    texts: list[str]
+    vectors: Optional[np.ndarray]
+    quantized: Optional[list[Optional[dict]]]
+
+    def __init__(
+        self,
+        texts: Sequence[str],
+        vectors: Optional[Union[np.ndarray, Sequence[VectorLike]]] = None,
+        quantized: Optional[Sequence[Optional[dict]]] = None,
+    ) -> None:
+        """Initialize."""
+        self.texts = list(texts)
+        self.vectors = None
+        if vectors is not None:
+            matrix = np.asarray(vectors, dtype=np.float32)
+            if self.texts:
+                self.vectors = matrix.reshape(len(self.texts), -1)
+            else:  # an empty batch keeps the width of an empty matrix, if it has one
+                self.vectors = matrix.reshape(0, matrix.shape[-1] if matrix.ndim == 2 else 0)
+        self.quantized = list(quantized) if quantized is not None else None
+
+    @classmethod
+    def from_items(cls, items: Iterable[dict]) -> ChunkBatch:
+        """Batch of chunk items: vectors are kept when every item has one, compact vectors when any has one."""
+        items = list(items)
+        vectors = [item.get("vector") for item in items]
+        quantized = [item.get("vectorQ") for item in items]
+        return cls(
+            texts=[item["text"] for item in items],
+            vectors=vectors if items and all(v is not None for v in vectors) else None,
+            quantized=quantized if any(q is not None for q in quantized) else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[Chunk]:
+        """Chunks of the batch, their vectors being views on rows of the matrix."""
+        for idx, text in enumerate(self.texts):
+            yield Chunk(
+                text=text,
+                vector=self.vectors[idx] if self.vectors is not None else None,
+                quantized=self.quantized[idx] if self.quantized is not None else None,
+            )
 
-    def to_dict(self) -> dict:
-        """Convert the Chunk instance to a dictionary."""
-        return asdict(self)
\ No newline at end of file
+    def to_dicts(self, arrays: bool = False) -> list[dict]:
+        """Dictionaries of the chunks; with `arrays`, sharing the vector buffers, see `Chunk.to_dict`."""
+        return [chunk.to_dict(arrays=arrays) for chunk in self]
@@ -1,8 +1,8 @@
 from __future__ import annotations
 from typing import Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class PageContent:
     """A class to represent the content of a page."""
     page_content: str
@@ -10,4 +10,4 @@ class PageContent:
 
     def to_dict(self) -> dict:
         """Convert the PageContent instance to a dictionary."""
-        return asdict(self)
+        return {"page_content": self.page_content, "title": self.title}
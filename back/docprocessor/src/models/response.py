@@ -0,0 +1,68 @@
+import os
+from typing import Iterator, Optional
+
+import dotenv
+
+from src.models.serialization import dumps
+
+dotenv.load_dotenv('.env.local')
+
+RESPONSE_MODES = ["summary", "ids", "full"]
+# default shape of the split and encode responses, see `response_body`
+RESPONSE_MODE = os.getenv("RESPONSE_MODE", "summary")
+ID_FIELDS = ["tenantId", "documentId"]
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def check_response_mode(mode: str) -> str:
+    """Return the response mode, or raise when it is not supported."""
+    if mode not in RESPONSE_MODES:
+        raise ValueError(f"Unsupported response mode: {mode}")
+    return mode
+
+
+class ResponseChunks:
+    """Ids of the chunks written by a request, and the chunk items themselves in `full` mode only."""
+
+    mode: str
+    ids: list[str]
+    items: list[dict]
+
+    def __init__(self, mode: str) -> None:
+        """Initialize."""
+        self.mode = check_response_mode(mode)
+        self.ids = []
+        self.items = []
+
+    def add(self, item: dict) -> dict:
+        """Record a chunk item and return it."""
+        self.ids.append(item["id"])
+        if self.mode == "full":
+            self.items.append(item)
+        return item
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def response_body(
+        summary: dict,
+        chunk_ids: list[str],
+        chunks: Optional[list[dict]],
+        mode: str,
+) -> dict:
+    """Response body of a response mode: `summary` the counts, timings and token totals with the
+    chunk ids, `ids` the document and chunk ids only, `full` the summary with every chunk."""
+    check_response_mode(mode)
+    if mode == "ids":
+        return {**{field: summary[field] for field in ID_FIELDS}, "chunkIds": chunk_ids}
+    if mode == "full":
+        return {**summary, "chunks": [{"id": chunk_id, **chunk} for chunk_id, chunk in zip(chunk_ids, chunks or [])]}
+    return {**summary, "chunkIds": chunk_ids}
+
+
+def iter_ndjson(body: dict) -> Iterator[bytes]:
+    """Lines of a response body as NDJSON: the body without its chunks, then one chunk per line."""
+    yield dumps({key: value for key, value in body.items() if key != "chunks"}) + b"\n"
+    for chunk in body.get("chunks", []):
+        yield dumps(chunk) + b"\n"
@@ -0,0 +1,36 @@
+import json
+from array import array
+from typing import Any, Union
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional dependency, the standard json module is used without it
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """JSON value of the objects the encoders do not serialize natively."""
+    if isinstance(obj, (np.ndarray, array)):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON; with orjson, NumPy arrays are read from their buffers
+    instead of going through lists of Python floats."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Deserialize JSON."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
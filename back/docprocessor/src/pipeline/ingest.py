@@ -0,0 +1,155 @@
+import time
+import logging
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from src.encode.encoder import MISTRAL_MODEL_NAME, encode_items
+from src.load.loader import LoaderError, document_header, get_loader_classes, resolve_mime_type
+from src.models.page_content import PageContent
+from src.pipeline.streams import batched, prefetch, tee
+from src.split.diff import ChunkDiff
+from src.split.spliter import WRITE_BATCH_SIZE, iter_chunk_items
+from src.split.tokens import TokenStats
+from src.store.blob import save_lines
+from src.store.cosmosdb import CosmosDB, raise_for_outcomes
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def doc_ingest(
+        document_id: str,
+        tenant_id: str,
+        label: str,
+        file_content: bytes,
+        mime_type: str = 'auto',
+        created_at: datetime = None,
+        chunking_strategy: str = 'auto',
+        checkpoint_pages: bool = False,
+        checkpoint_chunks: bool = False,
+) -> dict:
+    """Load, split and encode a document in one pipelined pass.
+
+    Pages feed the splitter while the loader is still running, and chunks feed
+    the encoder as they are produced. The page blob and the text-only chunk
+    items written by the separate load and split steps are optional checkpoints.
+    """
+    started_at = time.perf_counter()
+    mime_type = resolve_mime_type(mime_type, file_content)
+    header = document_header(
+        document_id=document_id,
+        tenant_id=tenant_id,
+        label=label,
+        mime_type=mime_type,
+        created_at=created_at or datetime.now(),
+        chunking_strategy=chunking_strategy,
+    )
+
+    # iterate over the loader classes: a loader failing falls back to the next one
+    for loader_cls in get_loader_classes(mime_type):
+        try:
+            return _ingest_with_loader(
+                loader_cls=loader_cls,
+                header=header,
+                file_content=file_content,
+                chunking_strategy=chunking_strategy,
+                checkpoint_pages=checkpoint_pages,
+                checkpoint_chunks=checkpoint_chunks,
+                started_at=started_at,
+            )
+        except LoaderError as e:
+            logger.exception(msg=str(e))
+    raise ValueError(f"Failed to load document with mimeType: {mime_type}")
+
+
+def _ingest_with_loader(
+        loader_cls: type,
+        header: dict,
+        file_content: bytes,
+        chunking_strategy: str,
+        checkpoint_pages: bool,
+        checkpoint_chunks: bool,
+        started_at: float,
+) -> dict:
+    """Load the pages of a document with one loader class, then split and encode them.
+
+    The chunks stored by an attempt whose loader failed are diffed by the next attempt:
+    those it does not produce again are deleted as vanished.
+    """
+    tenant_id, document_id = header["tenantId"], header["documentId"]
+    counters = {"pages": 0, "chunks": 0}
+
+    # stage 1: load pages in a background thread
+    def iter_pages() -> Iterator[str]:
+        try:
+            for content in loader_cls().lazy_load(file_content):
+                counters["pages"] += 1
+                yield content
+        except Exception as e:
+            raise LoaderError(f"{loader_cls.__name__} failed: {e}") from e
+
+    pages = prefetch(iter_pages())
+    if checkpoint_pages:
+        pages = tee(pages, sink=lambda contents: save_lines(
+            filename=f"{tenant_id}/{document_id}.jsonl",
+            records=_page_records(header, contents),
+        ))
+
+    # stage 2: split pages into chunk items in a background thread
+    cosmos_db = CosmosDB()
+    cosmos_db.create()
+    items = iter_chunk_items(
+        tenant_id=tenant_id,
+        document_id=document_id,
+        pages=pages,
+        chunking_strategy=chunking_strategy,
+        label=header["label"],
+    )
+    # re-ingestion: only new and changed chunks go on to be encoded
+    diff = ChunkDiff(cosmos_db.find_content_hashes(tenant_id=tenant_id, document_id=document_id))
+    token_stats = TokenStats()
+    items = diff.filter_changed(map(token_stats.add, items))
+    if checkpoint_chunks:
+        items = _checkpoint_items(cosmos_db, items)
+    items = prefetch(items)
+
+    # stage 3: encode and upsert chunk items as they arrive
+    first_chunk_at = None
+    for _ in encode_items(cosmos_db=cosmos_db, items=items):
+        counters["chunks"] += 1
+        first_chunk_at = first_chunk_at or time.perf_counter()
+    patches = diff.take_patches()
+    if patches:
+        raise_for_outcomes(cosmos_db.bulk_patch(patches=patches), "patch")
+    vanished_ids = diff.vanished_ids()
+    if vanished_ids:
+        raise_for_outcomes(cosmos_db.bulk_delete(tenant_id=tenant_id, ids=vanished_ids), "delete")
+    finished_at = time.perf_counter()
+    logger.info("Ingested %s: %s, diff: %s", document_id, counters, diff.stats())
+
+    return {
+        **header,
+        "status": "done",
+        "embedding_model": MISTRAL_MODEL_NAME,
+        "pageCount": counters["pages"],
+        "chunkCount": diff.changed + diff.unchanged,
+        "encodedCount": counters["chunks"],
+        "diff": diff.stats(),
+        **({"tokens": token_stats.to_dict()} if token_stats.chunks else {}),
+        "timeToFirstChunk": round((first_chunk_at or finished_at) - started_at, 3),
+        "elapsed": round(finished_at - started_at, 3),
+    }
+
+
+def _page_records(header: dict, contents: Iterable[str]) -> Iterator[dict]:
+    """Yield the header, then one record per page."""
+    yield header
+    for content in contents:
+        yield PageContent(page_content=content).to_dict()
+
+
+def _checkpoint_items(cosmos_db: CosmosDB, items: Iterable[dict]) -> Iterator[dict]:
+    """Upsert text-only chunk items before handing them to the encoder."""
+    for window in batched(items, WRITE_BATCH_SIZE):
+        raise_for_outcomes(cosmos_db.bulk_upsert(items=[dict(item) for item in window]), "upsert")
+        yield from window
@@ -0,0 +1,89 @@
+"""Local stand-in for the Durable Functions runtime, to run orchestrators without Azure.
+
+Orchestrators are generator functions that yield `context.call_activity(...)`
+or `context.task_all([...])` and receive the activity results back, as with
+`azure.durable_functions`. Activity inputs and outputs are round-tripped
+through JSON, like in the real runtime.
+"""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Generator, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MAX_WORKERS = 8
+
+
+class ActivityTask:
+    """A scheduled activity call."""
+
+    def __init__(self, name: str, input_: Any = None) -> None:
+        """Initialize."""
+        self.name = name
+        self.input = input_
+
+
+class TaskSet:
+    """A fan-out of activity calls, completed when all of them are."""
+
+    def __init__(self, tasks: list[ActivityTask]) -> None:
+        """Initialize."""
+        self.tasks = list(tasks)
+
+
+class LocalOrchestrationContext:
+    """Subset of `DurableOrchestrationContext` used by the orchestrators."""
+
+    def __init__(self, input_: Any = None, instance_id: str = "local") -> None:
+        """Initialize."""
+        self._input = json.dumps(input_)
+        self.instance_id = instance_id
+        self.is_replaying = False
+
+    def get_input(self) -> Any:
+        return json.loads(self._input)
+
+    def call_activity(self, name: str, input_: Any = None) -> ActivityTask:
+        return ActivityTask(name=name, input_=input_)
+
+    def task_all(self, activities: list[ActivityTask]) -> TaskSet:
+        return TaskSet(tasks=activities)
+
+
+def run_orchestration(
+        orchestrator: Callable[[LocalOrchestrationContext], Generator],
+        activities: dict[str, Callable[[Any], Any]],
+        input_: Any = None,
+        max_workers: int = MAX_WORKERS,
+) -> Any:
+    """Run an orchestrator to completion, executing fanned-out activities on a thread pool."""
+    context = LocalOrchestrationContext(input_=input_)
+
+    def run_activity(task: ActivityTask) -> Any:
+        if task.name not in activities:
+            raise ValueError(f"Unknown activity: {task.name}")
+        logger.info("Activity (%s) started...", task.name)
+        result = activities[task.name](json.loads(json.dumps(task.input)))
+        return json.loads(json.dumps(result))
+
+    generator = orchestrator(context)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        send: Optional[Any] = None
+        error: Optional[BaseException] = None
+        while True:
+            try:
+                step = generator.throw(error) if error else generator.send(send)
+            except StopIteration as stop:
+                return stop.value
+            send, error = None, None
+            try:
+                if isinstance(step, ActivityTask):
+                    send = run_activity(step)
+                elif isinstance(step, TaskSet):
+                    send = list(executor.map(run_activity, step.tasks))
+                else:
+                    raise TypeError(f"Unsupported orchestration step: {step!r}")
+            except Exception as e:
+                error = e
@@ -0,0 +1,152 @@
+import logging
+from typing import Generator
+
+from src.encode.encoder import encode_items
+from src.load.loader import get_loader_classes
+from src.load.pdf import count_pages, extract_pages, is_pdf, page_ranges
+from src.models.page_content import PageContent
+from src.pipeline.streams import batched
+from src.split.diff import ChunkDiff
+from src.split.spliter import iter_chunk_items
+from src.store.blob import iter_lines, load_bytes, save_lines
+from src.store.cosmosdb import CosmosDB, raise_for_outcomes
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PAGES_PER_ACTIVITY = 10
+CHUNKS_PER_ACTIVITY = 64
+
+
+def doc_processing_orchestrator(context) -> Generator:
+    """Orchestrate the workflow: fan out OCR per page range, splitting per page group
+    and encoding per chunk batch, then fan in to a final status.
+
+    The input holds the document metadata and the blob name of the source file.
+    """
+    payload = context.get_input()
+
+    plan = yield context.call_activity("plan_document", payload)
+    ranges = page_ranges(plan["pageCount"], PAGES_PER_ACTIVITY)
+
+    ocr_results = yield context.task_all([
+        context.call_activity("ocr_pages", {**payload, "start": start, "end": end})
+        for start, end in ranges
+    ])
+
+    split_results = yield context.task_all([
+        context.call_activity("split_pages", {**payload, **ocr_result})
+        for ocr_result in ocr_results
+    ])
+
+    # only new and changed chunks need encoding
+    chunk_ids = [i for split_result in split_results for i in split_result["chunkIds"]]
+    encode_results = []
+    if chunk_ids:
+        encode_results = yield context.task_all([
+            context.call_activity("encode_chunks", {**payload, "chunkIds": batch})
+            for batch in batched(chunk_ids, CHUNKS_PER_ACTIVITY)
+        ])
+
+    kept_ids = [i for split_result in split_results for i in split_result["keptIds"]]
+    delete_result = yield context.call_activity("delete_stale_chunks", {**payload, "keptIds": kept_ids})
+
+    unchanged = sum(r["unchangedCount"] for r in split_results)
+    return {
+        "tenantId": payload["tenantId"],
+        "documentId": payload["documentId"],
+        "status": "done",
+        "pageCount": sum(r["pageCount"] for r in ocr_results),
+        "chunkCount": len(kept_ids),
+        "encodedCount": sum(r["encodedCount"] for r in encode_results),
+        "diff": {
+            "changed": len(chunk_ids),
+            "unchanged": unchanged,
+            "patched": sum(r.get("patchedCount", 0) for r in split_results),
+            "deleted": delete_result["deletedCount"],
+        },
+    }
+
+
+def plan_document(payload: dict) -> dict:
+    """Activity: count the pages of the source file."""
+    file_content = load_bytes(payload["source"])
+    page_count = count_pages(file_content) if is_pdf(file_content) else 1
+    return {"pageCount": page_count}
+
+
+def ocr_pages(payload: dict) -> dict:
+    """Activity: load a page range of the source file and save its pages to blob."""
+    tenant_id, document_id = payload["tenantId"], payload["documentId"]
+    start, end = payload["start"], payload["end"]
+    file_content = load_bytes(payload["source"])
+    if is_pdf(file_content):
+        file_content = extract_pages(file_content, start, end)
+    loader_cls = get_loader_classes(payload["mimeType"], file_content)[0]
+    pages = [
+        PageContent(page_content=content).to_dict()
+        for content in loader_cls().lazy_load(file_content)
+    ]
+    filename = f"{tenant_id}/{document_id}/pages/{start:05d}.jsonl"
+    save_lines(filename=filename, records=pages)
+    return {"start": start, "end": end, "pages": filename, "pageCount": len(pages)}
+
+
+def split_pages(payload: dict) -> dict:
+    """Activity: split a page group into chunk items and save the new and changed ones to the text db."""
+    tenant_id, document_id = payload["tenantId"], payload["documentId"]
+    items = iter_chunk_items(
+        tenant_id=tenant_id,
+        document_id=document_id,
+        pages=(r.get("page_content", "") for r in iter_lines(payload["pages"])),
+        chunking_strategy=payload.get("chunkingStrategy", "auto"),
+        id_prefix=f"{document_id}_{payload['start']:05d}",
+        label=payload.get("label"),
+        first_page=payload["start"] + 1,
+    )
+    cosmos_db = CosmosDB()
+    cosmos_db.create()
+    diff = ChunkDiff(cosmos_db.find_content_hashes(tenant_id=tenant_id, document_id=document_id))
+    chunk_ids = []
+    for window in batched(diff.filter_changed(items), CHUNKS_PER_ACTIVITY):
+        raise_for_outcomes(cosmos_db.bulk_upsert(items=window), "upsert")
+        chunk_ids.extend(item["id"] for item in window)
+    patches = diff.take_patches()
+    if patches:
+        raise_for_outcomes(cosmos_db.bulk_patch(patches=patches), "patch")
+    # vanished chunks are deleted once every page group is split, see `delete_stale_chunks`
+    return {
+        "chunkIds": chunk_ids,
+        "keptIds": sorted(diff.seen),
+        "unchangedCount": diff.unchanged,
+        "patchedCount": diff.patched,
+    }
+
+
+def encode_chunks(payload: dict) -> dict:
+    """Activity: encode a batch of chunk items and save the vectors."""
+    cosmos_db = CosmosDB()
+    items = cosmos_db.find_by_ids(tenant_id=payload["tenantId"], ids=payload["chunkIds"])
+    encoded = list(encode_items(cosmos_db=cosmos_db, items=items))
+    return {"encodedCount": len(encoded)}
+
+
+def delete_stale_chunks(payload: dict) -> dict:
+    """Activity: delete the stored chunks of the document that the re-ingestion did not produce."""
+    tenant_id = payload["tenantId"]
+    cosmos_db = CosmosDB()
+    existing = cosmos_db.find_content_hashes(tenant_id=tenant_id, document_id=payload["documentId"])
+    kept_ids = set(payload["keptIds"])
+    stale_ids = [i for i in existing if i not in kept_ids]
+    if stale_ids:
+        raise_for_outcomes(cosmos_db.bulk_delete(tenant_id=tenant_id, ids=stale_ids), "delete")
+    return {"deletedCount": len(stale_ids)}
+
+
+ACTIVITIES = {
+    "plan_document": plan_document,
+    "ocr_pages": ocr_pages,
+    "split_pages": split_pages,
+    "encode_chunks": encode_chunks,
+    "delete_stale_chunks": delete_stale_chunks,
+}
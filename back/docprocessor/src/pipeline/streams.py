@@ -0,0 +1,108 @@
+import queue
+import logging
+import threading
+from itertools import islice
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+QUEUE_SIZE = 64
+POLL_SECONDS = 0.1
+
+T = TypeVar("T")
+
+_ITEM, _DONE, _ERROR = range(3)
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Yield consecutive lists of at most `size` items."""
+    iterator = iter(items)
+    while window := list(islice(iterator, size)):
+        yield window
+
+
+async def abatched(items: AsyncIterable[T], size: int) -> AsyncIterator[list[T]]:
+    """Yield consecutive lists of at most `size` items of an async iterable."""
+    window: list[T] = []
+    async for item in items:
+        window.append(item)
+        if len(window) >= size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+def prefetch(iterable: Iterable[T], maxsize: int = QUEUE_SIZE) -> Iterator[T]:
+    """Consume `iterable` in a background thread, yielding its items through a bounded queue.
+
+    Exceptions raised by `iterable` are re-raised in the consumer.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(entry: tuple) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put((_ITEM, item)):
+                    close = getattr(iterable, "close", None)
+                    if close is not None:
+                        close()
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_ERROR, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, value = buffer.get()
+            if kind == _DONE:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        stop.set()
+
+
+def tee(iterable: Iterable[T], sink: Callable[[Iterable[T]], None]) -> Iterator[T]:
+    """Yield the items of `iterable` while `sink` consumes a copy of them in a background thread.
+
+    The sink is best effort: its failure is logged and does not interrupt the stream.
+    """
+    side: queue.Queue = queue.Queue()
+    failed = threading.Event()
+
+    def items() -> Iterator[T]:
+        while (entry := side.get())[0] == _ITEM:
+            yield entry[1]
+
+    def consume() -> None:
+        try:
+            sink(items())
+        except Exception as e:
+            failed.set()
+            logger.exception(msg=str(e))
+
+    thread = threading.Thread(target=consume, daemon=True)
+    thread.start()
+    try:
+        for item in iterable:
+            if not failed.is_set():
+                side.put((_ITEM, item))
+            yield item
+    finally:
+        side.put((_DONE, None))
+    thread.join()
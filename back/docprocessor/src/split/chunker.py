@@ -0,0 +1,171 @@
+from bisect import bisect_left
+from typing import Callable, Optional, Sequence
+
+from src.split.tokens import Tokenizer, count_tokens, get_tokenizer
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+Span = tuple[int, int]
+Length = Callable[[int, int], int]  # length of the span [start, end) of a text
+
+
+def _split_spans(text: str, separator: str, start: int, end: int) -> list[Span]:
+    """Split [start, end) before each non-overlapping occurrence of a separator, keeping it
+    at the start of the next piece, and drop the empty pieces."""
+    pieces: list[Span] = []
+    size = len(separator)
+    piece_start = start
+    position = text.find(separator, start, end)
+    while position >= 0:
+        if position > piece_start:
+            pieces.append((piece_start, position))
+        piece_start = position
+        position = text.find(separator, position + size, end)
+    if end > piece_start:
+        pieces.append((piece_start, end))
+    return pieces
+
+
+class RecursiveChunker:
+    """Recursive character chunker, emitting chunk offsets into the source text.
+
+    Same chunk size and overlap semantics as LangChain's `RecursiveCharacterTextSplitter`
+    (separators kept at the start of the next chunk, chunks stripped of surrounding whitespace),
+    on offsets into the text instead of intermediate strings.
+    """
+
+    chunk_size: int
+    chunk_overlap: int
+    separators: list[str]
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Initialize."""
+        if chunk_overlap > chunk_size:
+            msg = f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size})."
+            raise ValueError(msg)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators or DEFAULT_SEPARATORS)
+
+    def split_text(self, text: str) -> list[str]:
+        """Split a text into chunks."""
+        return [text[start:end] for start, end in self.split_offsets(text)]
+
+    def split_offsets(self, text: str) -> list[Span]:
+        """Split a text into chunks, as [start, end) offsets into the text."""
+        chunks: list[Span] = []
+        self._split(text, 0, len(text), 0, chunks, self._length_of(text))
+        return chunks
+
+    def _length_of(self, text: str) -> Length:
+        """Length function of the spans of a text: characters."""
+        return lambda start, end: end - start
+
+    def _split(
+        self,
+        text: str,
+        start: int,
+        end: int,
+        level: int,
+        chunks: list[Span],
+        length: Length,
+    ) -> None:
+        """Split [start, end) on the first separator from `level` on that occurs in it."""
+        separator = self.separators[-1]
+        next_level = len(self.separators)
+        for idx in range(level, len(self.separators)):
+            candidate = self.separators[idx]
+            if candidate == "":
+                separator = candidate
+                break
+            if text.find(candidate, start, end) >= 0:
+                separator = candidate
+                next_level = idx + 1
+                break
+
+        if separator:
+            pieces = _split_spans(text, separator, start, end)
+        else:
+            pieces = [(i, i + 1) for i in range(start, end)]
+
+        good: list[Span] = []
+        for piece in pieces:
+            if length(*piece) < self.chunk_size:
+                good.append(piece)
+                continue
+            if good:
+                self._merge(text, good, chunks, length)
+                good = []
+            if next_level >= len(self.separators):
+                chunks.append(piece)
+            else:
+                self._split(text, piece[0], piece[1], next_level, chunks, length)
+        if good:
+            self._merge(text, good, chunks, length)
+
+    def _merge(self, text: str, pieces: list[Span], chunks: list[Span], length: Length) -> None:
+        """Merge consecutive pieces into chunks of at most `chunk_size`, overlapping by up to `chunk_overlap`."""
+        first = 0  # index of the first piece of the current chunk
+        total = 0
+        for idx, (start, end) in enumerate(pieces):
+            size = length(start, end)
+            if total + size > self.chunk_size and idx > first:
+                self._emit(text, pieces[first][0], pieces[idx - 1][1], chunks)
+                # drop pieces from the front down to the overlap, and until the next piece fits
+                while total > self.chunk_overlap or (total + size > self.chunk_size and total > 0):
+                    total -= length(*pieces[first])
+                    first += 1
+            total += size
+        if first < len(pieces):
+            self._emit(text, pieces[first][0], pieces[-1][1], chunks)
+
+    @staticmethod
+    def _strip(text: str, start: int, end: int) -> Optional[Span]:
+        """[start, end) stripped of surrounding whitespace, None if blank."""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return (start, end) if end > start else None
+
+    @classmethod
+    def _emit(cls, text: str, start: int, end: int, chunks: list[Span]) -> None:
+        """Append [start, end) stripped of surrounding whitespace, unless blank."""
+        span = cls._strip(text, start, end)
+        if span is not None:
+            chunks.append(span)
+
+
+class TokenChunker(RecursiveChunker):
+    """Recursive chunker sizing chunks and overlaps in tokens of the embedding model.
+
+    Each text is tokenized once; the token length of a span is then counted by bisection
+    over the token start offsets.
+    """
+
+    tokenizer: Tokenizer
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: Optional[Sequence[str]] = None,
+        tokenizer: Optional[Tokenizer] = None,
+    ) -> None:
+        """Initialize."""
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=separators)
+        self.tokenizer = tokenizer or get_tokenizer()
+
+    def _length_of(self, text: str) -> Length:
+        """Length function of the spans of a text: tokens."""
+        starts = self.tokenizer.token_starts(text)
+        return lambda start, end: bisect_left(starts, end) - bisect_left(starts, start)
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens of a chunk."""
+        return count_tokens(text, self.tokenizer)
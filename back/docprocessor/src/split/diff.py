@@ -0,0 +1,109 @@
+import hashlib
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+
+CHUNK_ID_HASH_CHARS = 16
+# chunk item fields that may change while the chunk text does not, e.g. a new label or a page shift
+METADATA_FIELDS = ["label", "section", "pageStart", "pageEnd"]
+
+
+def content_hash(text: str) -> str:
+    """Content hash of a chunk text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def metadata_hash(item: dict) -> str:
+    """Hash of the metadata fields of a chunk item."""
+    metadata = {field: item.get(field) for field in METADATA_FIELDS}
+    return hashlib.sha256(json.dumps(metadata, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def metadata_patch(item: dict) -> dict:
+    """Patch of a stored chunk setting the metadata fields of an item; fields it lacks are set to null."""
+    return {
+        "id": item["id"],
+        "tenantId": item["tenantId"],
+        "operations": [
+            {"op": "set", "path": f"/{field}", "value": item.get(field)}
+            for field in METADATA_FIELDS + ["metadataHash"]
+        ],
+    }
+
+
+def chunk_id(id_prefix: str, text_hash: str, occurrence: int = 0) -> str:
+    """Stable id of a chunk, derived from its content: unchanged chunks keep their id across re-ingestion.
+
+    `occurrence` counts the earlier chunks of the document with the same content.
+    """
+    suffix = f"_{occurrence}" if occurrence else ""
+    return f"{id_prefix}_{text_hash[:CHUNK_ID_HASH_CHARS]}{suffix}"
+
+
+class ChunkDiff:
+    """Diff of the chunk items of a document against the hashes stored by a previous ingestion.
+
+    `existing` maps the id of each stored chunk to its `contentHash` and `metadataHash`, or to None
+    when the chunk must be written again in full, see `CosmosDB.find_content_hashes`.
+    """
+
+    existing: dict[str, Optional[dict]]
+    seen: set[str]
+    changed: int
+    unchanged: int
+    patched: int
+    patches: list[dict]
+
+    def __init__(self, existing: dict[str, Optional[dict]]) -> None:
+        """Initialize."""
+        self.existing = existing
+        self.seen = set()
+        self.changed = 0
+        self.unchanged = 0
+        self.patched = 0
+        self.patches = []
+
+    def is_changed(self, item: dict) -> bool:
+        """Record an item, and tell whether it is new or its content changed.
+
+        An unchanged item whose metadata changed, e.g. the label of a re-ingestion, gets a patch.
+        """
+        self.seen.add(item["id"])
+        stored = self.existing.get(item["id"])
+        if stored is not None and stored.get("contentHash") == item["contentHash"]:
+            self.unchanged += 1
+            if stored.get("metadataHash") != item.get("metadataHash"):
+                self.patched += 1
+                self.patches.append(metadata_patch(item))
+            return False
+        self.changed += 1
+        return True
+
+    def take_patches(self) -> list[dict]:
+        """Patches of the unchanged items recorded since the last call, see `CosmosDB.bulk_patch`."""
+        patches, self.patches = self.patches, []
+        return patches
+
+    def filter_changed(self, items: Iterable[dict]) -> Iterator[dict]:
+        """Yield the new and changed items only."""
+        for item in items:
+            if self.is_changed(item):
+                yield item
+
+    async def afilter_changed(self, items: AsyncIterable[dict]) -> AsyncIterator[dict]:
+        """Yield the new and changed items only."""
+        async for item in items:
+            if self.is_changed(item):
+                yield item
+
+    def vanished_ids(self) -> list[str]:
+        """Ids of the stored chunks that are no longer part of the document."""
+        return [i for i in self.existing if i not in self.seen]
+
+    def stats(self) -> dict:
+        """Counts of changed, unchanged, patched and vanished chunks."""
+        return {
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+            "patched": self.patched,
+            "deleted": len(self.vanished_ids()),
+        }
@@ -0,0 +1,191 @@
+import re
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+
+from src.split.chunker import RecursiveChunker
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+FENCE_PATTERN = re.compile(r"^[ \t]*(```|~~~)")
+TABLE_ROW_PATTERN = re.compile(r"^[ \t]*\|")
+SECTION_SEPARATOR = " > "
+BLOCK_SEPARATOR = "\n\n"
+
+
+@dataclass
+class MarkdownChunk:
+    """A chunk of markdown, with the section path and the pages it comes from."""
+    text: str
+    section: str
+    page_start: int
+    page_end: int
+
+    def metadata(self) -> dict:
+        """Chunk item fields of the chunk metadata."""
+        return {
+            **({"section": self.section} if self.section else {}),
+            "pageStart": self.page_start,
+            "pageEnd": self.page_end,
+        }
+
+
+@dataclass
+class _Block:
+    """A heading, paragraph, table or fenced code block of a page."""
+    kind: str
+    lines: list[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """Text of the block, without surrounding blank lines."""
+        return "\n".join(self.lines).strip("\n")
+
+
+def iter_blocks(page: str) -> Iterator[_Block]:
+    """Split a page of markdown into blocks, in one pass over its lines; tables and fenced
+    code blocks are kept whole, and a code block left open ends with the page."""
+    block: Optional[_Block] = None
+    for line in page.splitlines():
+        if block is not None and block.kind == "code":
+            block.lines.append(line)
+            if FENCE_PATTERN.match(line):
+                yield block
+                block = None
+            continue
+        kind = "paragraph"
+        if not line.strip():
+            kind = None
+        elif FENCE_PATTERN.match(line):
+            kind = "code"
+        elif HEADING_PATTERN.match(line):
+            kind = "heading"
+        elif TABLE_ROW_PATTERN.match(line):
+            kind = "table"
+        if block is not None and (kind != block.kind or kind == "heading"):
+            yield block
+            block = None
+        if kind is None:
+            continue
+        if block is None:
+            block = _Block(kind)
+        block.lines.append(line)
+    if block is not None:
+        yield block
+
+
+class _MarkdownState:
+    """Chunks under construction while the pages are fed one at a time."""
+
+    def __init__(self, chunker: "MarkdownChunker", first_page: int) -> None:
+        """Initialize."""
+        self.chunker = chunker
+        self.page = first_page - 1
+        self.headings: list[tuple[int, str]] = []  # heading stack: level and title
+        self.prefix: list[tuple[int, str]] = []  # headings not yet followed by any content
+        self.texts: list[str] = []
+        self.size = 0
+        self.page_start = first_page
+
+    def feed(self, page: str) -> list[MarkdownChunk]:
+        """Add the next page, returning the chunks it completes."""
+        self.page += 1
+        chunks: list[MarkdownChunk] = []
+        for block in iter_blocks(page):
+            if block.kind == "heading":
+                self._flush(chunks)
+                match = HEADING_PATTERN.match(block.lines[0])
+                level, title = len(match.group(1)), match.group(2).strip()
+                self.headings = [h for h in self.headings if h[0] < level] + [(level, title)]
+                self.prefix = [h for h in self.prefix if h[0] < level] + [(level, block.text)]
+                continue
+            self._add(block, chunks)
+        return chunks
+
+    def close(self) -> list[MarkdownChunk]:
+        """Return the last chunk, including trailing headings without content."""
+        chunks: list[MarkdownChunk] = []
+        self._flush(chunks)
+        if self.prefix:
+            self._start()
+            self._emit(chunks)
+        return chunks
+
+    def _add(self, block: _Block, chunks: list[MarkdownChunk]) -> None:
+        """Append a block to the current chunk, starting a new chunk when it does not fit."""
+        chunk_size = self.chunker.chunk_size
+        text = block.text
+        if self.texts and self.size + len(BLOCK_SEPARATOR) + len(text) > chunk_size:
+            self._flush(chunks)
+        if not self.texts:
+            self._start()
+        pieces = [text]
+        if block.kind == "paragraph" and self.size + len(BLOCK_SEPARATOR) + len(text) > chunk_size:
+            # a paragraph too large for a chunk is split, tables and code blocks stay whole
+            pieces = self.chunker.splitter.split_text(text)
+        for idx, piece in enumerate(pieces):
+            if idx and self.size + len(BLOCK_SEPARATOR) + len(piece) > chunk_size:
+                self._flush(chunks)
+                self._start()
+            self.texts.append(piece)
+            self.size += len(piece) + (len(BLOCK_SEPARATOR) if self.size else 0)
+
+    def _start(self) -> None:
+        """Start a chunk on the current page, led by the headings not yet followed by content."""
+        self.texts = [text for _, text in self.prefix]
+        self.size = len(BLOCK_SEPARATOR.join(self.texts))
+        self.prefix = []
+        self.page_start = self.page
+
+    def _flush(self, chunks: list[MarkdownChunk]) -> None:
+        """Emit the current chunk, if any."""
+        if self.texts:
+            self._emit(chunks)
+
+    def _emit(self, chunks: list[MarkdownChunk]) -> None:
+        """Emit the current chunk."""
+        chunks.append(MarkdownChunk(
+            text=BLOCK_SEPARATOR.join(self.texts),
+            section=SECTION_SEPARATOR.join(title for _, title in self.headings),
+            page_start=self.page_start,
+            page_end=self.page,
+        ))
+        self.texts = []
+        self.size = 0
+
+
+class MarkdownChunker:
+    """Chunker following the structure of markdown pages, e.g. OCR output.
+
+    Pages are read once, in order. Chunks are cut at every heading and packed with whole
+    blocks up to `chunk_size` characters. A paragraph larger than a chunk is split
+    recursively, while tables and fenced code blocks are kept whole even when larger.
+    A chunk starts with the headings that lead it, and it carries the path of the headings
+    it is under and the numbers of the pages it spans.
+    """
+
+    chunk_size: int
+    splitter: RecursiveChunker
+
+    def __init__(self, chunk_size: int, chunk_overlap: int = 0) -> None:
+        """Initialize."""
+        self.chunk_size = chunk_size
+        self.splitter = RecursiveChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    def split_text(self, text: str) -> list[str]:
+        """Split a single markdown text into chunks."""
+        return [chunk.text for chunk in self.split_pages([text])]
+
+    def split_pages(self, pages: Iterable[str], first_page: int = 1) -> Iterator[MarkdownChunk]:
+        """Split markdown pages into chunks, lazily; pages are numbered from `first_page`."""
+        state = _MarkdownState(self, first_page)
+        for page in pages:
+            yield from state.feed(page)
+        yield from state.close()
+
+    async def asplit_pages(self, pages: AsyncIterable[str], first_page: int = 1) -> AsyncIterator[MarkdownChunk]:
+        """Split markdown pages into chunks as they arrive; pages are numbered from `first_page`."""
+        state = _MarkdownState(self, first_page)
+        async for page in pages:
+            for chunk in state.feed(page):
+                yield chunk
+        for chunk in state.close():
+            yield chunk
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import re
+from typing import Callable, Optional
+
+import dotenv
+import numpy as np
+
+from src.split.chunker import RecursiveChunker, Span
+
+dotenv.load_dotenv('.env.local')
+
+# cut between adjacent sentences whose cosine distance is above this percentile of the text's distances
+SEMANTIC_BREAKPOINT_PERCENTILE = float(os.getenv("SEMANTIC_BREAKPOINT_PERCENTILE", "95"))
+# a sentence ends at a line break, or at whitespace after a terminal punctuation mark
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+
+
+def sentence_spans(text: str, max_size: int) -> list[Span]:
+    """Split a text into sentences, as [start, end) offsets stripped of surrounding whitespace;
+    sentences longer than `max_size` are split further by the recursive chunker."""
+    spans: list[Span] = []
+    start = 0
+    for match in [*SENTENCE_BOUNDARY_PATTERN.finditer(text), None]:
+        end = match.start() if match else len(text)
+        span = RecursiveChunker._strip(text, start, end)
+        if span is not None:
+            spans.append(span)
+        start = match.end() if match else end
+    if all(end - start <= max_size for start, end in spans):
+        return spans
+    splitter = RecursiveChunker(chunk_size=max_size, chunk_overlap=0)
+    sized: list[Span] = []
+    for start, end in spans:
+        if end - start <= max_size:
+            sized.append((start, end))
+            continue
+        sized.extend((start + s, start + e) for s, e in splitter.split_offsets(text[start:end]))
+    return sized
+
+
+def adjacent_distances(vectors: np.ndarray) -> np.ndarray:
+    """Cosine distance between each pair of adjacent rows."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1, norms)
+    return 1.0 - np.einsum("ij,ij->i", unit[:-1], unit[1:])
+
+
+def breakpoints(distances: np.ndarray, percentile: float) -> np.ndarray:
+    """Indices i of the adjacent pairs (i, i + 1) to cut between."""
+    if not len(distances):
+        return np.empty(0, dtype=int)
+    threshold = np.percentile(distances, percentile)
+    return np.flatnonzero(distances > threshold)
+
+
+class SemanticChunker:
+    """Chunker cutting a text where the meaning shifts between adjacent sentences.
+
+    The sentences of a text are embedded in one call of the embedding function (batched and
+    cached by it), and the text is cut between adjacent sentences whose cosine distance is above
+    a percentile of the text's distances, or where a chunk would outgrow `chunk_size` characters.
+    The vector of each chunk is seeded with the normalized mean of its sentence embeddings, see
+    `vector_of`, so that the encoder does not embed the chunks again.
+    """
+
+    chunk_size: int
+    breakpoint_percentile: float
+    seed_vectors: bool
+
+    def __init__(
+        self,
+        embed_fn: Callable[[list[str]], list[list[float]]],
+        chunk_size: int,
+        breakpoint_percentile: float = SEMANTIC_BREAKPOINT_PERCENTILE,
+        seed_vectors: bool = True,
+    ) -> None:
+        """Initialize."""
+        if not 0 <= breakpoint_percentile <= 100:
+            msg = f"Got a breakpoint percentile ({breakpoint_percentile}) outside of [0, 100]."
+            raise ValueError(msg)
+        self.embed_fn = embed_fn
+        self.chunk_size = chunk_size
+        self.breakpoint_percentile = breakpoint_percentile
+        self.seed_vectors = seed_vectors
+        self._vectors: dict[str, list[float]] = {}
+
+    def split_text(self, text: str) -> list[str]:
+        """Split a text into chunks, seeding their vectors."""
+        self._vectors = {}
+        spans = sentence_spans(text, self.chunk_size)
+        if not spans:
+            return []
+        vectors = np.asarray(self.embed_fn([text[start:end] for start, end in spans]), dtype=np.float32)
+        cuts = set(breakpoints(adjacent_distances(vectors), self.breakpoint_percentile).tolist())
+
+        chunks = []
+        first = 0  # index of the first sentence of the current chunk
+        for idx in range(1, len(spans) + 1):
+            if idx < len(spans) and idx - 1 not in cuts and spans[idx][1] - spans[first][0] <= self.chunk_size:
+                continue
+            chunk = text[spans[first][0]:spans[idx - 1][1]]
+            chunks.append(chunk)
+            if self.seed_vectors:
+                self._vectors[chunk] = self._mean_vector(vectors[first:idx])
+            first = idx
+        return chunks
+
+    async def asplit_text(self, text: str) -> list[str]:
+        """Split a text into chunks in a worker thread, off the event loop."""
+        return await asyncio.to_thread(self.split_text, text)
+
+    def vector_of(self, chunk: str) -> Optional[list[float]]:
+        """Seeded vector of a chunk of the last split text, None if not seeded."""
+        return self._vectors.get(chunk)
+
+    @staticmethod
+    def _mean_vector(vectors: np.ndarray) -> list[float]:
+        """Normalized mean of sentence embeddings; a single sentence keeps its own embedding."""
+        if len(vectors) == 1:
+            return vectors[0].tolist()
+        mean = vectors.mean(axis=0)
+        norm = np.linalg.norm(mean)
+        return (mean / norm if norm else mean).tolist()
@@ -1,78 +1,336 @@
 import logging
+import inspect
 import json
-from langchain.text_splitter import RecursiveCharacterTextSplitter 
+import time
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, Union
 
+from azure.core.exceptions import ResourceNotFoundError
+
+from src.encode.quantize import add_quantized
 from src.models.chunk import Chunk
-from src.store.blob import load
-from src.store.cosmosdb import CosmosDB
+from src.models.response import RESPONSE_MODE, ResponseChunks, response_body
+from src.pipeline.streams import abatched, batched
+from src.split.chunker import RecursiveChunker, TokenChunker
+from src.split.diff import ChunkDiff, chunk_id, content_hash, metadata_hash
+from src.split.markdown import MarkdownChunker
+from src.split.semantic import SemanticChunker
+from src.split.tokens import TokenStats
+from src.store import blob_aio
+from src.store.blob import iter_lines, load
+from src.store.cosmosdb import CosmosDB, raise_for_outcomes
+from src.store.cosmosdb_aio import AsyncCosmosDB
 
 MAX_CHUNK_SIZE = 800
 MAX_OVERLAP = 200
+# "token" chunking strategy, in tokens of the embedding model (mistral-embed takes up to 8192)
+TOKEN_CHUNK_SIZE = 512
+TOKEN_CHUNK_OVERLAP = 64
+WRITE_BATCH_SIZE = 100
 
-def doc_splitter(
+TextSplitter = Union[RecursiveChunker, SemanticChunker, MarkdownChunker]
+
+def load_pages(
         tenant_id: str,
         document_id: str,
-) -> dict:
-    """Split the content into chunks based on the specified chunking strategy."""
-    
-    # load the content
-    content = json.loads(load(filename=f"{tenant_id}/{document_id}.json"))
-    logging.info("Loaded content: %s", content)
-    chunking_strategy = content.get("chunkingStrategy", "auto")
-    page_contents = content.get("pageContents", [])
-    text_to_split = '\n'.join([p.get("page_content", "") for p in page_contents])
+) -> tuple[dict, Iterator[dict]]:
+    """Load the document header and a lazy iterator over its page records."""
+    try:
+        records = iter_lines(filename=f"{tenant_id}/{document_id}.jsonl")
+        header = next(records)
+    except ResourceNotFoundError:
+        # documents loaded before page streaming are a single JSON blob
+        content = json.loads(load(filename=f"{tenant_id}/{document_id}.json"))
+        records = iter(content.pop("pageContents", []))
+        header = content
+    return header, records
+
+async def load_pages_async(
+        tenant_id: str,
+        document_id: str,
+) -> tuple[dict, AsyncIterator[dict]]:
+    """Load the document header and a lazy async iterator over its page records."""
+    try:
+        records = blob_aio.iter_lines(filename=f"{tenant_id}/{document_id}.jsonl")
+        header = await anext(records)
+    except ResourceNotFoundError:
+        # documents loaded before page streaming are a single JSON blob
+        content = json.loads(await blob_aio.load(filename=f"{tenant_id}/{document_id}.json"))
+        page_contents = content.pop("pageContents", [])
+
+        async def legacy_records() -> AsyncIterator[dict]:
+            for record in page_contents:
+                yield record
+
+        records = legacy_records()
+        header = content
+    return header, records
+
+def split_pages(
+        pages: Iterable[str],
+        split_text: Callable[[str], list[str]],
+) -> Iterator[str]:
+    """Split page texts one at a time, carrying the last chunk of a page into the next one."""
+    carry: Optional[str] = None
+    for page in pages:
+        text = page if carry is None else carry + '\n' + page
+        chunks = split_text(text)
+        carry = chunks.pop() if chunks else None
+        yield from chunks
+    if carry is not None:
+        yield carry
 
+async def asplit_pages(
+        pages: AsyncIterable[str],
+        split_text: Callable[[str], Union[list[str], Awaitable[list[str]]]],
+) -> AsyncIterator[str]:
+    """Split page texts as they arrive, carrying the last chunk of a page into the next one."""
+    carry: Optional[str] = None
+    async for page in pages:
+        text = page if carry is None else carry + '\n' + page
+        chunks = split_text(text)
+        if inspect.isawaitable(chunks):
+            chunks = await chunks
+        carry = chunks.pop() if chunks else None
+        for chunk in chunks:
+            yield chunk
+    if carry is not None:
+        yield carry
+
+def get_text_splitter(chunking_strategy: str) -> TextSplitter:
+    """Get the text splitter of a chunking strategy."""
     if chunking_strategy in ["auto", "fix"]:
         # chunking strategy
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=MAX_CHUNK_SIZE, 
+        return RecursiveChunker(
+            chunk_size=MAX_CHUNK_SIZE,
             chunk_overlap=MAX_OVERLAP
         )
-        raw_chunks = text_splitter.split_text(text_to_split)
-    
+
     elif chunking_strategy == "semantic":
-        # semantic chunking strategy
-        separators = infer_separators(text_to_split)    
-        text_splitter = RecursiveCharacterTextSplitter(
-            separators=separators,
-            chunk_size=MAX_CHUNK_SIZE, 
-            chunk_overlap=MAX_OVERLAP
+        # chunks cut where the embeddings of adjacent sentences drift apart
+        from src.encode.encoder import get_embed_fn
+        return SemanticChunker(
+            embed_fn=get_embed_fn(),
+            chunk_size=MAX_CHUNK_SIZE,
+        )
+
+    elif chunking_strategy == "markdown":
+        # chunks following the headings, tables and pages of markdown, e.g. OCR output
+        return MarkdownChunker(chunk_size=MAX_CHUNK_SIZE)
+
+    elif chunking_strategy == "token":
+        # chunks packed up to a token budget of the embedding model
+        return TokenChunker(
+            chunk_size=TOKEN_CHUNK_SIZE,
+            chunk_overlap=TOKEN_CHUNK_OVERLAP
+        )
+
+    raise ValueError(f"Unsupported chunking strategy: {chunking_strategy}")
+
+def chunk_item(
+        tenant_id: str,
+        document_id: str,
+        id_prefix: str,
+        text: str,
+        occurrences: dict[str, int],
+        label: Optional[str] = None,
+        token_count: Optional[int] = None,
+        vector: Optional[list[float]] = None,
+        metadata: Optional[dict] = None,
+) -> dict:
+    """Build the item of a chunk, identified by its content hash; a seeded vector gets its compact copy."""
+    text_hash = content_hash(text)
+    occurrence = occurrences.get(text_hash, 0)
+    occurrences[text_hash] = occurrence + 1
+    item = {
+        "id": chunk_id(id_prefix, text_hash, occurrence),
+        "tenantId": tenant_id,
+        "documentId": document_id,
+        **({"label": label} if label else {}),
+        "text": text,
+        "contentHash": text_hash,
+        **({"tokenCount": token_count} if token_count is not None else {}),
+        **(metadata or {}),
+        **({"vector": vector} if vector is not None else {}),
+    }
+    item["metadataHash"] = metadata_hash(item)
+    return add_quantized([item])[0]
+
+def _token_count(text_splitter: TextSplitter, text: str) -> Optional[int]:
+    """Token count of a chunk, for the splitters sizing chunks in tokens."""
+    if isinstance(text_splitter, TokenChunker):
+        return text_splitter.count_tokens(text)
+    return None
+
+def _seeded_vector(text_splitter: TextSplitter, text: str) -> Optional[list[float]]:
+    """Vector of a chunk seeded by the splitter, for the splitters embedding while they split."""
+    if isinstance(text_splitter, SemanticChunker):
+        return text_splitter.vector_of(text)
+    return None
+
+def iter_chunk_items(
+        tenant_id: str,
+        document_id: str,
+        pages: Iterable[str],
+        chunking_strategy: str = "auto",
+        id_prefix: Optional[str] = None,
+        label: Optional[str] = None,
+        first_page: int = 1,
+) -> Iterator[dict]:
+    """Split page texts into chunk items, lazily; pages are numbered from `first_page`."""
+    text_splitter = get_text_splitter(chunking_strategy)
+    id_prefix = id_prefix or document_id
+    occurrences: dict[str, int] = {}
+    if isinstance(text_splitter, MarkdownChunker):
+        for chunk in text_splitter.split_pages(pages, first_page=first_page):
+            yield chunk_item(
+                tenant_id, document_id, id_prefix, chunk.text, occurrences,
+                label=label, metadata=chunk.metadata(),
+            )
+        return
+    for text in split_pages(pages, text_splitter.split_text):
+        yield chunk_item(
+            tenant_id, document_id, id_prefix, text, occurrences,
+            label=label, token_count=_token_count(text_splitter, text),
+            vector=_seeded_vector(text_splitter, text),
         )
-        raw_chunks = text_splitter.split_text(text_to_split)
-    
-    logging.info("Split content into %d chunks", len(raw_chunks))
-    logging.info("Raw chunks: %s", [c for c in raw_chunks])
 
-    chunks = [Chunk(text=c) for c in raw_chunks]
+async def aiter_chunk_items(
+        tenant_id: str,
+        document_id: str,
+        pages: AsyncIterable[str],
+        chunking_strategy: str = "auto",
+        id_prefix: Optional[str] = None,
+        label: Optional[str] = None,
+        first_page: int = 1,
+) -> AsyncIterator[dict]:
+    """Split page texts into chunk items as the pages arrive; pages are numbered from `first_page`."""
+    text_splitter = get_text_splitter(chunking_strategy)
+    id_prefix = id_prefix or document_id
+    occurrences: dict[str, int] = {}
+    if isinstance(text_splitter, MarkdownChunker):
+        async for chunk in text_splitter.asplit_pages(pages, first_page=first_page):
+            yield chunk_item(
+                tenant_id, document_id, id_prefix, chunk.text, occurrences,
+                label=label, metadata=chunk.metadata(),
+            )
+        return
+    split_text = getattr(text_splitter, "asplit_text", text_splitter.split_text)
+    async for text in asplit_pages(pages, split_text):
+        yield chunk_item(
+            tenant_id, document_id, id_prefix, text, occurrences,
+            label=label, token_count=_token_count(text_splitter, text),
+            vector=_seeded_vector(text_splitter, text),
+        )
+
+def splitter_response(
+        tenant_id: str,
+        document_id: str,
+        chunking_strategy: str,
+        written: ResponseChunks,
+        diff: ChunkDiff,
+        token_stats: TokenStats,
+        started_at: float,
+) -> dict:
+    """Response body of a split, in the response mode of the written chunks."""
+    summary = {
+        "tenantId": tenant_id,
+        "documentId": document_id,
+        "chunkingStrategy": chunking_strategy,
+        "chunkCount": len(written),
+        "diff": diff.stats(),
+        **({"tokens": token_stats.to_dict()} if token_stats.chunks else {}),
+        "elapsed": round(time.perf_counter() - started_at, 3),
+    }
+    chunks = [Chunk(text=item["text"]).to_dict() for item in written.items] if written.mode == "full" else None
+    return response_body(summary, written.ids, chunks, written.mode)
+
+def doc_splitter(
+        tenant_id: str,
+        document_id: str,
+        response_mode: str = RESPONSE_MODE,
+) -> dict:
+    """Split the content into chunks based on the specified chunking strategy."""
+    started_at = time.perf_counter()
+    written = ResponseChunks(response_mode)
+
+    # load the content
+    header, records = load_pages(tenant_id=tenant_id, document_id=document_id)
+    logging.info("Loaded header: %s", header)
+    chunking_strategy = header.get("chunkingStrategy", "auto")
+    items = iter_chunk_items(
+        tenant_id=tenant_id,
+        document_id=document_id,
+        pages=(r.get("page_content", "") for r in records),
+        chunking_strategy=chunking_strategy,
+        label=header.get("label"),
+    )
+
     cosmos_db = CosmosDB()
     cosmos_db.create(
        drop_old_database=False,
        drop_old_container=False,
     )
-    for idx, chunk in enumerate(chunks):
-        cosmos_db.upsert(payload={
-            "id": f"{document_id}_{idx}",
-            "tenantId": tenant_id,
-            "documentId": document_id,
-            "text": chunk.text,
-        })
-
-    return {
-        "tenantId": tenant_id,
-        "documentId": document_id,
-        "chunks": [c.to_dict() for c in chunks],
-        "chunkingStrategy": chunking_strategy
-    }
 
-def infer_separators(content: str) -> list:
-    """Infer the separators for semantic chunking."""
-    # TODO: improve the logic to infer separators
-    return [
-        "\n\n", 
-        "Section", "Chapter", "Title", "Subtitle", "Heading", "Subheading", 
-        "Appendix", 
-        "Figure", 
-        "Table", 
-        "List", "Item", "Point", "Step", 
-        "Example", "Note", "Warning", "Tip",
-    ]
+    # upsert the new and changed chunks only, then delete the vanished ones
+    diff = ChunkDiff(cosmos_db.find_content_hashes(tenant_id=tenant_id, document_id=document_id))
+    token_stats = TokenStats()
+    for window in batched(map(token_stats.add, items), WRITE_BATCH_SIZE):
+        changed = [item for item in window if diff.is_changed(item)]
+        if changed:
+            raise_for_outcomes(cosmos_db.bulk_upsert(items=changed), "upsert")
+        patches = diff.take_patches()
+        if patches:
+            raise_for_outcomes(cosmos_db.bulk_patch(patches=patches), "patch")
+        for item in window:
+            written.add(item)
+    vanished_ids = diff.vanished_ids()
+    if vanished_ids:
+        raise_for_outcomes(cosmos_db.bulk_delete(tenant_id=tenant_id, ids=vanished_ids), "delete")
+    logging.info("Split content into %d chunks, diff: %s", len(written), diff.stats())
+    return splitter_response(tenant_id, document_id, chunking_strategy, written, diff, token_stats, started_at)
+
+async def doc_splitter_async(
+        tenant_id: str,
+        document_id: str,
+        response_mode: str = RESPONSE_MODE,
+) -> dict:
+    """Split the content into chunks, on the async clients."""
+    started_at = time.perf_counter()
+    written = ResponseChunks(response_mode)
+    header, records = await load_pages_async(tenant_id=tenant_id, document_id=document_id)
+    logging.info("Loaded header: %s", header)
+    chunking_strategy = header.get("chunkingStrategy", "auto")
+
+    async def pages() -> AsyncIterator[str]:
+        async for record in records:
+            yield record.get("page_content", "")
+
+    items = aiter_chunk_items(
+        tenant_id=tenant_id,
+        document_id=document_id,
+        pages=pages(),
+        chunking_strategy=chunking_strategy,
+        label=header.get("label"),
+    )
+
+    cosmos_db = AsyncCosmosDB()
+    await cosmos_db.create()
+
+    # upsert the new and changed chunks only, then delete the vanished ones
+    diff = ChunkDiff(await cosmos_db.find_content_hashes(tenant_id=tenant_id, document_id=document_id))
+    token_stats = TokenStats()
+    async for window in abatched(items, WRITE_BATCH_SIZE):
+        window = [token_stats.add(item) for item in window]
+        changed = [item for item in window if diff.is_changed(item)]
+        if changed:
+            raise_for_outcomes(await cosmos_db.bulk_upsert(items=changed), "upsert")
+        patches = diff.take_patches()
+        if patches:
+            raise_for_outcomes(await cosmos_db.bulk_patch(patches=patches), "patch")
+        for item in window:
+            written.add(item)
+    vanished_ids = diff.vanished_ids()
+    if vanished_ids:
+        raise_for_outcomes(await cosmos_db.bulk_delete(tenant_id=tenant_id, ids=vanished_ids), "delete")
+    logging.info("Split content into %d chunks, diff: %s", len(written), diff.stats())
+    return splitter_response(tenant_id, document_id, chunking_strategy, written, diff, token_stats, started_at)
@@ -0,0 +1,129 @@
+import os
+import re
+import logging
+import threading
+from typing import Optional, Protocol
+
+import dotenv
+dotenv.load_dotenv('.env.local')
+
+try:
+    from tokenizers import Tokenizer as HFTokenizer
+except ImportError:  # optional dependency, the approximate tokenizer is used without it
+    HFTokenizer = None
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+TOKENIZER_PATH = os.getenv("TOKENIZER_PATH")  # local tokenizer.json of the embedding model
+TOKENIZER_NAME = os.getenv("TOKENIZER_NAME")  # hub id of the tokenizer, its vocabulary is cached on disk
+# ~one token per short word, per chunk of a long word, per number group and per punctuation mark
+APPROXIMATE_TOKEN_PATTERN = re.compile(r"[^\W\d_]{1,6}|\d{1,3}|[^\w\s]", re.UNICODE)
+
+
+class Tokenizer(Protocol):
+    """Tokenizer of the embedding model."""
+
+    name: str
+
+    def token_starts(self, text: str) -> list[int]:
+        """Start offset in the text of each token."""
+
+
+class ApproximateTokenizer:
+    """Tokenizer estimate from word pieces, for when the model tokenizer is not available."""
+
+    name = "approximate"
+
+    def token_starts(self, text: str) -> list[int]:
+        """Start offset in the text of each token."""
+        return [m.start() for m in APPROXIMATE_TOKEN_PATTERN.finditer(text)]
+
+
+class ModelTokenizer:
+    """Tokenizer of the embedding model, from a HuggingFace `tokenizers` vocabulary."""
+
+    name: str
+
+    def __init__(self, tokenizer, name: str) -> None:
+        """Initialize."""
+        self._tokenizer = tokenizer
+        self.name = name
+
+    def token_starts(self, text: str) -> list[int]:
+        """Start offset in the text of each token."""
+        encoding = self._tokenizer.encode(text, add_special_tokens=False)
+        return [start for start, _ in encoding.offsets]
+
+
+def load_tokenizer(
+        path: Optional[str] = TOKENIZER_PATH,
+        name: Optional[str] = TOKENIZER_NAME,
+) -> Tokenizer:
+    """Load the model tokenizer from a local file or the hub, or fall back to the approximate tokenizer."""
+    if HFTokenizer is not None and (path or name):
+        try:
+            if path:
+                return ModelTokenizer(HFTokenizer.from_file(path), name=path)
+            return ModelTokenizer(HFTokenizer.from_pretrained(name), name=name)
+        except Exception as e:
+            logger.warning("Tokenizer %s not loaded, falling back to the approximate tokenizer: %s", path or name, e)
+    return ApproximateTokenizer()
+
+
+_TOKENIZER: Optional[Tokenizer] = None
+_TOKENIZER_LOCK = threading.Lock()
+
+
+def get_tokenizer() -> Tokenizer:
+    """Process-wide tokenizer, with its vocabulary loaded once."""
+    global _TOKENIZER
+    with _TOKENIZER_LOCK:
+        if _TOKENIZER is None:
+            _TOKENIZER = load_tokenizer()
+            logger.info("Tokenizer: %s", _TOKENIZER.name)
+        return _TOKENIZER
+
+
+def count_tokens(text: str, tokenizer: Optional[Tokenizer] = None) -> int:
+    """Number of tokens of a text."""
+    return len((tokenizer or get_tokenizer()).token_starts(text))
+
+
+class TokenStats:
+    """Token counts of the chunks of a document."""
+
+    chunks: int
+    total: int
+    min: Optional[int]
+    max: Optional[int]
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.chunks = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, item: dict) -> dict:
+        """Record the token count of a chunk item, if it has one, and return the item."""
+        token_count = item.get("tokenCount")
+        if token_count is not None:
+            self.chunks += 1
+            self.total += token_count
+            self.min = token_count if self.min is None else min(self.min, token_count)
+            self.max = token_count if self.max is None else max(self.max, token_count)
+        return item
+
+    def to_dict(self) -> Optional[dict]:
+        """Token statistics, None when no chunk had a token count."""
+        if not self.chunks:
+            return None
+        return {
+            "tokenizer": get_tokenizer().name,
+            "chunks": self.chunks,
+            "total": self.total,
+            "mean": round(self.total / self.chunks, 1),
+            "min": self.min,
+            "max": self.max,
+        }
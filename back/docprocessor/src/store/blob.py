@@ -1,8 +1,9 @@
 import os
 import logging
 import json
+from typing import Iterable, Iterator
 
-from azure.storage.blob import BlobServiceClient
+from src.store import clients
 
 import dotenv
 dotenv.load_dotenv('.env.local')
@@ -12,7 +13,7 @@ STORAGE_ACCOUNT_CONTAINER_NAME = os.getenv("STORAGE_ACCOUNT_CONTAINER_NAME")
 
 def load(filename: str) -> list[str]:
     """Load a file from Azure Blob Storage."""
-    client = BlobServiceClient.from_connection_string(STORAGE_ACCOUNT_CONNECTION_STRING)
+    client = clients.get_blob_service_client(STORAGE_ACCOUNT_CONNECTION_STRING)
 
     blob_client = client.get_blob_client(
         container=STORAGE_ACCOUNT_CONTAINER_NAME,
@@ -29,7 +30,7 @@ def load(filename: str) -> list[str]:
 
 def save(filename: str, data: str) -> None:
     """Save a file to Azure Blob Storage."""
-    client = BlobServiceClient.from_connection_string(STORAGE_ACCOUNT_CONNECTION_STRING)
+    client = clients.get_blob_service_client(STORAGE_ACCOUNT_CONNECTION_STRING)
 
     blob_client = client.get_blob_client(
         container=STORAGE_ACCOUNT_CONTAINER_NAME,
@@ -44,4 +45,66 @@ def save(filename: str, data: str) -> None:
             overwrite=True
         )
     except Exception as e:
-        logging.error(f"Error uploading blob: {e}")
\ No newline at end of file
+        logging.error(f"Error uploading blob: {e}")
+
+def save_lines(filename: str, records: Iterable[dict]) -> None:
+    """Stream records as newline-delimited JSON to Azure Blob Storage."""
+    client = clients.get_blob_service_client(STORAGE_ACCOUNT_CONNECTION_STRING)
+
+    blob_client = client.get_blob_client(
+        container=STORAGE_ACCOUNT_CONTAINER_NAME,
+        blob=filename
+    )
+
+    blob_client.upload_blob(
+        data=(json.dumps(record).encode("utf-8") + b"\n" for record in records),
+        blob_type="BlockBlob",
+        overwrite=True
+    )
+
+def iter_lines(filename: str) -> Iterator[dict]:
+    """Stream the records of a newline-delimited JSON file from Azure Blob Storage."""
+    client = clients.get_blob_service_client(STORAGE_ACCOUNT_CONNECTION_STRING)
+
+    blob_client = client.get_blob_client(
+        container=STORAGE_ACCOUNT_CONTAINER_NAME,
+        blob=filename
+    )
+
+    downloader = blob_client.download_blob(max_concurrency=1)
+    buffer = b""
+    for data in downloader.chunks():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+def save_bytes(filename: str, data: bytes) -> None:
+    """Save raw bytes to Azure Blob Storage."""
+    client = clients.get_blob_service_client(STORAGE_ACCOUNT_CONNECTION_STRING)
+
+    blob_client = client.get_blob_client(
+        container=STORAGE_ACCOUNT_CONTAINER_NAME,
+        blob=filename
+    )
+
+    blob_client.upload_blob(
+        data=data,
+        blob_type="BlockBlob",
+        overwrite=True
+    )
+
+def load_bytes(filename: str) -> bytes:
+    """Load raw bytes from Azure Blob Storage."""
+    client = clients.get_blob_service_client(STORAGE_ACCOUNT_CONNECTION_STRING)
+
+    blob_client = client.get_blob_client(
+        container=STORAGE_ACCOUNT_CONTAINER_NAME,
+        blob=filename
+    )
+
+    return blob_client.download_blob(max_concurrency=1).readall()
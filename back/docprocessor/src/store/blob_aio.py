@@ -0,0 +1,63 @@
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Union
+
+from src.store import clients
+from src.store.blob import STORAGE_ACCOUNT_CONNECTION_STRING, STORAGE_ACCOUNT_CONTAINER_NAME
+
+def _blob_client(filename: str):
+    """Async blob client of a file, on the shared client of the running event loop."""
+    client = clients.get_async_blob_service_client(STORAGE_ACCOUNT_CONNECTION_STRING)
+    return client.get_blob_client(
+        container=STORAGE_ACCOUNT_CONTAINER_NAME,
+        blob=filename
+    )
+
+async def load(filename: str) -> str:
+    """Load a file from Azure Blob Storage."""
+    downloader = await _blob_client(filename).download_blob(
+        max_concurrency=1,
+        encoding='UTF-8'
+    )
+    return await downloader.readall()
+
+async def save_lines(filename: str, records: Union[Iterable[dict], AsyncIterable[dict]]) -> None:
+    """Stream records as newline-delimited JSON to Azure Blob Storage."""
+    async def lines() -> AsyncIterator[bytes]:
+        if hasattr(records, "__aiter__"):
+            async for record in records:
+                yield json.dumps(record).encode("utf-8") + b"\n"
+        else:
+            for record in records:
+                yield json.dumps(record).encode("utf-8") + b"\n"
+
+    await _blob_client(filename).upload_blob(
+        data=lines(),
+        blob_type="BlockBlob",
+        overwrite=True
+    )
+
+async def iter_lines(filename: str) -> AsyncIterator[dict]:
+    """Stream the records of a newline-delimited JSON file from Azure Blob Storage."""
+    downloader = await _blob_client(filename).download_blob(max_concurrency=1)
+    buffer = b""
+    async for data in downloader.chunks():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+async def save_bytes(filename: str, data: bytes) -> None:
+    """Save raw bytes to Azure Blob Storage."""
+    await _blob_client(filename).upload_blob(
+        data=data,
+        blob_type="BlockBlob",
+        overwrite=True
+    )
+
+async def load_bytes(filename: str) -> bytes:
+    """Load raw bytes from Azure Blob Storage."""
+    downloader = await _blob_client(filename).download_blob(max_concurrency=1)
+    return await downloader.readall()
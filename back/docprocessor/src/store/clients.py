@@ -0,0 +1,158 @@
+"""Process-wide registry of SDK clients.
+
+Each client is created once per worker process and shared by concurrent
+invocations, so HTTP connection pools, TLS sessions and resource proxies
+are reused instead of being rebuilt on every call.
+"""
+import asyncio
+import inspect
+import logging
+import threading
+import weakref
+from typing import Any, AsyncIterator, Callable, Hashable
+
+from azure.cosmos.aio import CosmosClient as AsyncCosmosClient
+from azure.cosmos.cosmos_client import CosmosClient
+from azure.storage.blob import BlobServiceClient
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+from mistralai import Mistral
+
+_CLIENTS: dict[Hashable, Any] = {}
+# async clients, by event loop: forgotten with the loop, and closed when the loop shuts down
+_LOOP_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[Hashable, Any]]" = weakref.WeakKeyDictionary()
+# shutdown hooks of the loops, kept alive as long as their loop
+_LOOP_HOOKS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncIterator[None]]" = weakref.WeakKeyDictionary()
+_LOCK = threading.Lock()
+
+
+def get_or_create(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """Get the client registered under `key`, creating it with `factory` on first use."""
+    client = _CLIENTS.get(key)
+    if client is None:
+        with _LOCK:
+            client = _CLIENTS.get(key)
+            if client is None:
+                logging.info("Clients: create %s", key[0] if isinstance(key, tuple) else key)
+                client = factory()
+                _CLIENTS[key] = client
+    return client
+
+
+def drop(key: Hashable) -> None:
+    """Forget the client registered under `key`."""
+    with _LOCK:
+        _CLIENTS.pop(key, None)
+
+
+def clear() -> None:
+    """Forget all clients."""
+    with _LOCK:
+        _CLIENTS.clear()
+        _LOOP_CLIENTS.clear()
+        _LOOP_HOOKS.clear()
+
+
+def get_or_create_for_loop(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """Get the client of the running event loop registered under `key`, creating it with `factory`
+    on first use: async clients are bound to the loop that created them."""
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        loop_clients = _LOOP_CLIENTS.get(loop)
+        if loop_clients is None:
+            loop_clients = _LOOP_CLIENTS[loop] = {}
+            _LOOP_HOOKS[loop] = _close_on_shutdown(loop_clients)
+        client = loop_clients.get(key)
+        if client is None:
+            logging.info("Clients: create %s", key[0] if isinstance(key, tuple) else key)
+            client = loop_clients[key] = factory()
+    return client
+
+
+def drop_for_loop(key: Hashable) -> None:
+    """Forget the client of the running event loop registered under `key`."""
+    with _LOCK:
+        _LOOP_CLIENTS.get(asyncio.get_running_loop(), {}).pop(key, None)
+
+
+def _close_on_shutdown(loop_clients: dict[Hashable, Any]) -> AsyncIterator[None]:
+    """Close the clients of the running loop when it shuts down.
+
+    The loop finalizes the async generators it has started on shutdown, e.g. at the end of
+    `asyncio.run`, while it can still await: the generator is started here, and its `finally`
+    block closes the clients.
+    """
+    async def hook() -> AsyncIterator[None]:
+        try:
+            yield
+        finally:
+            await _aclose_all(loop_clients)
+            # the generator refers to the loop through its finalizer: forget both, so the loop can be collected
+            loop = asyncio.get_running_loop()
+            with _LOCK:
+                _LOOP_CLIENTS.pop(loop, None)
+                _LOOP_HOOKS.pop(loop, None)
+
+    generator = hook()
+    try:
+        generator.asend(None).send(None)  # run up to the `yield`, registering the generator with the loop
+    except StopIteration:
+        pass
+    return generator
+
+
+async def _aclose_all(loop_clients: dict[Hashable, Any]) -> None:
+    """Close and forget clients, e.g. those of a loop shutting down."""
+    with _LOCK:
+        closing = list(loop_clients.items())
+        loop_clients.clear()
+    for key, client in closing:
+        close = getattr(client, "close", None)
+        if not callable(close) or isinstance(client, asyncio.Future):
+            continue
+        try:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logging.warning("Clients: failed to close %s: %s", key[0] if isinstance(key, tuple) else key, e)
+
+
+def get_cosmos_client(url: str, key: str) -> CosmosClient:
+    """Shared CosmosDB client."""
+    return get_or_create(("cosmos", url, key), lambda: CosmosClient(
+        url=url,
+        credential={"masterKey": key},
+        user_agent="CosmosDBPython",
+        user_agent_overwrite=True,
+    ))
+
+
+def get_blob_service_client(connection_string: str) -> BlobServiceClient:
+    """Shared Azure Blob Storage client."""
+    return get_or_create(
+        ("blob", connection_string),
+        lambda: BlobServiceClient.from_connection_string(connection_string),
+    )
+
+
+def get_async_cosmos_client(url: str, key: str) -> AsyncCosmosClient:
+    """Shared async CosmosDB client of the running event loop."""
+    return get_or_create_for_loop(("cosmos_aio", url, key), lambda: AsyncCosmosClient(
+        url=url,
+        credential={"masterKey": key},
+        user_agent="CosmosDBPython",
+        user_agent_overwrite=True,
+    ))
+
+
+def get_async_blob_service_client(connection_string: str) -> AsyncBlobServiceClient:
+    """Shared async Azure Blob Storage client of the running event loop."""
+    return get_or_create_for_loop(
+        ("blob_aio", connection_string),
+        lambda: AsyncBlobServiceClient.from_connection_string(connection_string),
+    )
+
+
+def get_mistral_client(api_key: str) -> Mistral:
+    """Shared Mistral client, for both the sync and the `*_async` methods."""
+    return get_or_create(("mistral", api_key), lambda: Mistral(api_key=api_key))
@@ -1,6 +1,9 @@
 import os
+import json
+import time
 import logging
-from typing import TYPE_CHECKING, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Iterator, Optional
 
 import dotenv
 
@@ -10,6 +13,8 @@ from azure.cosmos.partition_key import PartitionKey
 from azure.cosmos.container import ContainerProxy
 from azure.cosmos.database import DatabaseProxy
 
+from src.store import clients
+
 import dotenv
 dotenv.load_dotenv('.env.local')
 
@@ -18,7 +23,15 @@ COSMOSDB_NOSQL_KEY = os.getenv("COSMOSDB_NOSQL_KEY")
 COSMOSDB_DATABASE_ID = os.getenv("COSMOSDB_DATABASE_ID")
 COSMOSDB_CONTAINER_ID = os.getenv("COSMOSDB_CONTAINER_ID")
 COSMOSDB_PARTITION_KEY = "/tenantId"
-ALLOWED_SELECT_FIELDS = ['id', 'tenantId', 'documentId', 'text', 'vector']
+ALLOWED_SELECT_FIELDS = [
+    'id', 'tenantId', 'documentId', 'label', 'text', 'contentHash', 'metadataHash', 'tokenCount',
+    'section', 'pageStart', 'pageEnd', 'vector', 'vectorQ',
+]
+BULK_MAX_BATCH_ITEMS = 100  # transactional batch limit
+BULK_MAX_BATCH_BYTES = 1_800_000  # transactional batch limit is 2MB
+BULK_MAX_CONCURRENCY = 4
+BULK_MAX_RETRIES = 5
+BULK_BACKOFF_SECONDS = 0.5
 VECTOR_EMBEDDING_POLICY = {
     "vectorEmbeddings": [{
         "path": "/" + 'vector',
@@ -32,6 +45,8 @@ INDEXING_POLICY = {
     "excludedPaths": [{
         "path": '/"_etag"/?',
         "path": "/" + 'vector' + "/*",
+    }, {
+        "path": "/" + 'vectorQ' + "/*",  # compact vector, never queried on
     }],
     "vectorIndexes": [{
         "path": "/" + 'vector',
@@ -39,6 +54,100 @@ INDEXING_POLICY = {
     }],
 }
 
+def raise_for_outcomes(outcomes: list[dict], operation: str) -> None:
+    """Raise if any item of a bulk `operation` (upsert, patch or delete) failed."""
+    failed = [o for o in outcomes if o["error"]]
+    if failed:
+        msg = f"Failed to {operation} {len(failed)} of {len(outcomes)} items: {failed[:5]}"
+        raise ValueError(msg)
+
+def build_find_query(filter: Optional[dict]) -> tuple[str, list[dict]]:
+    """Build the query and its parameters to find the items matching `filter`."""
+    validated_fields = ", ".join("c." + f for f in ALLOWED_SELECT_FIELDS)
+    query = "SELECT " + validated_fields + " FROM c"
+    parameters = []
+    conditions = []
+    if filter:
+        for k, v in filter.items():
+            if v:
+                param_name = f"@{k}"
+                conditions.append(f"c.{k} = {param_name}")
+                parameters.append({"name": param_name, "value": v})
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+    return query, parameters
+
+def build_find_by_ids_query(tenant_id: str, ids: list[str]) -> tuple[str, list[dict]]:
+    """Build the query and its parameters to find the items of a tenant by id."""
+    validated_fields = ", ".join("c." + f for f in ALLOWED_SELECT_FIELDS)
+    query = (
+        "SELECT " + validated_fields + " FROM c"
+        " WHERE c.tenantId = @tenantId AND ARRAY_CONTAINS(@ids, c.id)"
+    )
+    return query, [
+        {"name": "@tenantId", "value": tenant_id},
+        {"name": "@ids", "value": ids},
+    ]
+
+def plan_batches(items: list[dict], partition_key_field: str) -> list[tuple[str, list[int]]]:
+    """Group item indices by partition key, then cut each group into batches within the limits."""
+    for item in items:
+        if "id" not in item:
+            msg = "The field 'id' is required in record."
+            raise ValueError(msg)
+
+    groups: dict[str, list[int]] = {}
+    for idx, item in enumerate(items):
+        groups.setdefault(item.get(partition_key_field), []).append(idx)
+    batches: list[tuple[str, list[int]]] = []
+    for partition_key, idxs in groups.items():
+        batch, batch_bytes = [], 0
+        for idx in idxs:
+            item_bytes = len(json.dumps(items[idx]))
+            if batch and (
+                len(batch) >= BULK_MAX_BATCH_ITEMS
+                or batch_bytes + item_bytes > BULK_MAX_BATCH_BYTES
+            ):
+                batches.append((partition_key, batch))
+                batch, batch_bytes = [], 0
+            batch.append(idx)
+            batch_bytes += item_bytes
+        if batch:
+            batches.append((partition_key, batch))
+    return batches
+
+def batch_operations(items: list[dict], operation: str) -> list[tuple]:
+    """Transactional batch operations of items: upsert the items, or apply their patch operations."""
+    if operation == "upsert":
+        return [("upsert", (item,)) for item in items]
+    if operation == "patch":
+        return [("patch", (item["id"], item["operations"])) for item in items]
+    raise ValueError(f"Unsupported batch operation: {operation}")
+
+def batch_status_codes(error: Exception, n_items: int) -> list[int]:
+    """Status code of each operation of a failed transactional batch."""
+    responses = getattr(error, "operation_responses", None) or []
+    if len(responses) == n_items:
+        return [r.get("statusCode", error.status_code) for r in responses]
+    return [error.status_code] * n_items
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying a throttled request."""
+    retry_after_ms = float((error.headers or {}).get("x-ms-retry-after-ms", 0))
+    return max(retry_after_ms / 1000, BULK_BACKOFF_SECONDS * 2 ** attempt)
+
+def failed_outcomes(
+    items: list[dict],
+    status_codes: list[int],
+    error: Exception,
+) -> list[dict]:
+    """Outcomes of the items of a failed batch."""
+    return [{
+        "id": item["id"],
+        "statusCode": status_code,
+        "error": str(error),
+    } for item, status_code in zip(items, status_codes)]
+
 class CosmosDB:
     """CosmosDB data store."""
 
@@ -63,12 +172,10 @@ class CosmosDB:
         logging.info("CosmosDB: %s", COSMOSDB_CONTAINER_ID)
         logging.info("CosmosDB: %s", COSMOSDB_PARTITION_KEY)
 
-        # Initialize the client
-        self.client = CosmosClient(
+        # Get the shared client
+        self.client = clients.get_cosmos_client(
             url=COSMOSDB_NOSQL_HOST,
-            credential={"masterKey": COSMOSDB_NOSQL_KEY},
-            user_agent="CosmosDBPython",
-            user_agent_overwrite=True,
+            key=COSMOSDB_NOSQL_KEY,
         )
         self.db = None
         self.container = None
@@ -81,41 +188,54 @@ class CosmosDB:
         drop_old_database: bool = False,
         drop_old_container: bool = False,
     ) -> ContainerProxy:
-        
-        self.client = CosmosClient(
-            url=COSMOSDB_NOSQL_HOST,
-            credential={"masterKey": COSMOSDB_NOSQL_KEY},
-            user_agent="CosmosDBPython",
-            user_agent_overwrite=True,
-        )
-        """Create a container."""
+        """Create a container, or get the proxy cached by a previous call in this process."""
         if self.client is None:
             msg = "CosmosDB client not found"
             raise ValueError(msg)
-        if self.db is None:
-            if drop_old_database:
-                self.client.delete_database(id=self.database_id)
-            try:
-                self.db = self.client.create_database(id=self.database_id)
-            except exceptions.CosmosResourceExistsError:
-                self.db = self.client.get_database_client(database=self.database_id)
         if self.container is None:
-            if drop_old_container:
-                self.db.delete_container(id=self.container_id)
-            try:
-                self.container = self.db.create_container(
-                    id=self.container_id,
-                    partition_key=PartitionKey(path=self.partition_key),
-                    indexing_policy=indexing_policy,
-                    vector_embedding_policy=vector_embedding_policy,
-                    offer_throughput=offer_throughput,
-                )
-            except exceptions.CosmosResourceExistsError:
-                self.container = self.db.get_container_client(
-                    container=self.container_id,
-                )
+            key = ("cosmos_container", COSMOSDB_NOSQL_HOST, self.database_id, self.container_id)
+            if drop_old_database or drop_old_container:
+                clients.drop(key)
+            self.db, self.container = clients.get_or_create(key, lambda: self._create_container(
+                indexing_policy=indexing_policy,
+                vector_embedding_policy=vector_embedding_policy,
+                offer_throughput=offer_throughput,
+                drop_old_database=drop_old_database,
+                drop_old_container=drop_old_container,
+            ))
         return self.container
 
+    def _create_container(
+        self,
+        indexing_policy: Optional[dict],
+        vector_embedding_policy: Optional[dict],
+        offer_throughput: Optional[int],
+        drop_old_database: bool,
+        drop_old_container: bool,
+    ) -> tuple[DatabaseProxy, ContainerProxy]:
+        """Create the database and the container, or get them if they exist."""
+        if drop_old_database:
+            self.client.delete_database(id=self.database_id)
+        try:
+            db = self.client.create_database(id=self.database_id)
+        except exceptions.CosmosResourceExistsError:
+            db = self.client.get_database_client(database=self.database_id)
+        if drop_old_container:
+            db.delete_container(id=self.container_id)
+        try:
+            container = db.create_container(
+                id=self.container_id,
+                partition_key=PartitionKey(path=self.partition_key),
+                indexing_policy=indexing_policy,
+                vector_embedding_policy=vector_embedding_policy,
+                offer_throughput=offer_throughput,
+            )
+        except exceptions.CosmosResourceExistsError:
+            container = db.get_container_client(
+                container=self.container_id,
+            )
+        return db, container
+
     def upsert(self, payload: dict) -> None:
         """Upsert an item."""
         
@@ -126,21 +246,176 @@ class CosmosDB:
     
     def find(self, filter: Optional[dict]) -> list:
         """Find items."""
+        return list(self.iter_find(filter=filter))
+
+    def iter_find(self, filter: Optional[dict]) -> Iterator[dict]:
+        """Find items, lazily fetching result pages."""
         self.create()
-        validated_fields = ", ".join("c." + f for f in ALLOWED_SELECT_FIELDS)
-        query = "SELECT " + validated_fields + " FROM c"
-        parameters = []
-        conditions = []
-        if filter:
-            for k, v in filter.items():
-                if v:
-                    param_name = f"@{k}"
-                    conditions.append(f"c.{k} = {param_name}")
-                    parameters.append({"name": param_name, "value": v})
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-        return list(self.container.query_items(
+        query, parameters = build_find_query(filter)
+        yield from self.container.query_items(
             query=query,
             parameters=parameters,
             enable_cross_partition_query=True,
-        ))
\ No newline at end of file
+        )
+
+    def find_by_ids(self, tenant_id: str, ids: list[str]) -> list:
+        """Find the items of a tenant by id."""
+        self.create()
+        query, parameters = build_find_by_ids_query(tenant_id, ids)
+        return list(self.container.query_items(
+            query=query,
+            parameters=parameters,
+            partition_key=tenant_id,
+        ))
+
+    def find_content_hashes(self, tenant_id: str, document_id: str) -> dict[str, Optional[dict]]:
+        """Content and metadata hashes of each stored chunk of a document, by id; None for a chunk without
+        a vector, e.g. stored by a split-only run or a failed encode, so that a re-ingestion encodes it."""
+        self.create()
+        return {
+            item["id"]: {
+                "contentHash": item.get("contentHash"),
+                "metadataHash": item.get("metadataHash"),
+            } if item.get("hasVector") else None
+            for item in self.container.query_items(
+                query=(
+                    "SELECT c.id, c.contentHash, c.metadataHash, IS_DEFINED(c.vector) AS hasVector FROM c"
+                    " WHERE c.tenantId = @tenantId AND c.documentId = @documentId"
+                ),
+                parameters=[
+                    {"name": "@tenantId", "value": tenant_id},
+                    {"name": "@documentId", "value": document_id},
+                ],
+                partition_key=tenant_id,
+            )
+        }
+
+    def iter_find_unencoded(self, tenant_id: str, document_id: str) -> Iterator[dict]:
+        """Find the chunks of a document without a vector, lazily fetching result pages."""
+        self.create()
+        query, parameters = build_find_query({"tenantId": tenant_id, "documentId": document_id})
+        yield from self.container.query_items(
+            query=query + " AND NOT IS_DEFINED(c.vector)",
+            parameters=parameters,
+            partition_key=tenant_id,
+        )
+
+    def bulk_upsert(
+        self,
+        items: list[dict],
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+        max_retries: int = BULK_MAX_RETRIES,
+    ) -> list[dict]:
+        """Upsert items as transactional batches grouped by partition key.
+
+        Returns one outcome per item, in the order of `items`.
+        """
+        return self._bulk(items, "upsert", max_concurrency=max_concurrency, max_retries=max_retries)
+
+    def bulk_patch(
+        self,
+        patches: list[dict],
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+        max_retries: int = BULK_MAX_RETRIES,
+    ) -> list[dict]:
+        """Patch items as transactional batches grouped by partition key, e.g. `src.split.diff.metadata_patch`.
+
+        Returns one outcome per patch, in the order of `patches`.
+        """
+        return self._bulk(patches, "patch", max_concurrency=max_concurrency, max_retries=max_retries)
+
+    def bulk_delete(
+        self,
+        tenant_id: str,
+        ids: list[str],
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+        max_retries: int = BULK_MAX_RETRIES,
+    ) -> list[dict]:
+        """Delete items of a tenant, each on its own so one missing id does not fail the others.
+
+        An id that is already gone counts as deleted. Returns one outcome per id, in the order of `ids`.
+        """
+        items = [{"id": i, self.partition_key.lstrip("/"): tenant_id} for i in ids]
+        return self._bulk(items, "delete", max_concurrency=max_concurrency, max_retries=max_retries)
+
+    def _bulk(
+        self,
+        items: list[dict],
+        operation: str,
+        max_concurrency: int,
+        max_retries: int,
+    ) -> list[dict]:
+        """Run an operation on items as transactional batches grouped by partition key."""
+        batches = plan_batches(items, partition_key_field=self.partition_key.lstrip("/"))
+        logging.info("CosmosDB: bulk %s %d items in %d batches", operation, len(items), len(batches))
+        self.create()
+
+        outcomes: list[Optional[dict]] = [None] * len(items)
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            futures = {
+                executor.submit(
+                    self._execute_batch,
+                    partition_key,
+                    [items[idx] for idx in idxs],
+                    max_retries,
+                    operation,
+                ): idxs
+                for partition_key, idxs in batches
+            }
+            for future in as_completed(futures):
+                for idx, outcome in zip(futures[future], future.result()):
+                    outcomes[idx] = outcome
+        return outcomes
+
+    def _execute_batch(
+        self,
+        partition_key: str,
+        items: list[dict],
+        max_retries: int,
+        operation: str = "upsert",
+    ) -> list[dict]:
+        """Execute one transactional batch, retrying when throttled; deletes run item by item."""
+        if operation == "delete":
+            return [self._delete_item(partition_key, item, max_retries) for item in items]
+        operations = batch_operations(items, operation)
+        for attempt in range(max_retries + 1):
+            try:
+                self.container.execute_item_batch(
+                    batch_operations=operations,
+                    partition_key=partition_key,
+                )
+                return [
+                    {"id": item["id"], "statusCode": 200, "error": None}
+                    for item in items
+                ]
+            except (exceptions.CosmosBatchOperationError, exceptions.CosmosHttpResponseError) as e:
+                error = e
+                status_codes = batch_status_codes(e, len(items))
+            if 429 not in status_codes or attempt == max_retries:
+                break
+            delay = retry_delay(error, attempt)
+            logging.warning("CosmosDB: batch throttled, retry in %.2fs", delay)
+            time.sleep(delay)
+        return failed_outcomes(items, status_codes, error)
+
+    def _delete_item(
+        self,
+        partition_key: str,
+        item: dict,
+        max_retries: int,
+    ) -> dict:
+        """Delete one item, retrying when throttled; an item that is already gone counts as deleted."""
+        for attempt in range(max_retries + 1):
+            try:
+                self.container.delete_item(item=item["id"], partition_key=partition_key)
+                return {"id": item["id"], "statusCode": 204, "error": None}
+            except exceptions.CosmosResourceNotFoundError:
+                return {"id": item["id"], "statusCode": 404, "error": None}
+            except exceptions.CosmosHttpResponseError as e:
+                error = e
+            if error.status_code != 429 or attempt == max_retries:
+                break
+            delay = retry_delay(error, attempt)
+            logging.warning("CosmosDB: delete throttled, retry in %.2fs", delay)
+            time.sleep(delay)
+        return failed_outcomes([item], [error.status_code], error)[0]
@@ -0,0 +1,275 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+from azure.cosmos import exceptions
+from azure.cosmos.aio import ContainerProxy, CosmosClient, DatabaseProxy
+from azure.cosmos.partition_key import PartitionKey
+
+from src.store import clients
+from src.store.cosmosdb import (
+    BULK_MAX_CONCURRENCY,
+    BULK_MAX_RETRIES,
+    COSMOSDB_CONTAINER_ID,
+    COSMOSDB_DATABASE_ID,
+    COSMOSDB_NOSQL_HOST,
+    COSMOSDB_NOSQL_KEY,
+    COSMOSDB_PARTITION_KEY,
+    INDEXING_POLICY,
+    VECTOR_EMBEDDING_POLICY,
+    batch_operations,
+    batch_status_codes,
+    build_find_by_ids_query,
+    build_find_query,
+    failed_outcomes,
+    plan_batches,
+    retry_delay,
+)
+
+class AsyncCosmosDB:
+    """CosmosDB data store on the async client, to share an event loop between requests."""
+
+    database_id: str
+    container_id: str
+    partition_key: str
+
+    client: CosmosClient
+    db: DatabaseProxy
+    container: ContainerProxy
+
+    def __init__(self) -> None:
+        """Initialize. Must be called from a running event loop."""
+        self.database_id = COSMOSDB_DATABASE_ID
+        self.container_id = COSMOSDB_CONTAINER_ID
+        self.partition_key = COSMOSDB_PARTITION_KEY
+        self.client = clients.get_async_cosmos_client(
+            url=COSMOSDB_NOSQL_HOST,
+            key=COSMOSDB_NOSQL_KEY,
+        )
+        self.db = None
+        self.container = None
+
+    async def create(
+        self,
+        indexing_policy: Optional[dict] = INDEXING_POLICY,
+        vector_embedding_policy: Optional[dict] = VECTOR_EMBEDDING_POLICY,
+        offer_throughput: Optional[int] = None,
+    ) -> ContainerProxy:
+        """Create a container, or get the proxy cached by a previous call on this event loop."""
+        if self.client is None:
+            msg = "CosmosDB client not found"
+            raise ValueError(msg)
+        if self.container is None:
+            key = ("cosmos_aio_container", COSMOSDB_NOSQL_HOST, self.database_id, self.container_id)
+            proxies = clients.get_or_create_for_loop(key, lambda: asyncio.ensure_future(self._create_container(
+                indexing_policy=indexing_policy,
+                vector_embedding_policy=vector_embedding_policy,
+                offer_throughput=offer_throughput,
+            )))
+            try:
+                self.db, self.container = await proxies
+            except Exception:
+                clients.drop_for_loop(key)
+                raise
+        return self.container
+
+    async def _create_container(
+        self,
+        indexing_policy: Optional[dict],
+        vector_embedding_policy: Optional[dict],
+        offer_throughput: Optional[int],
+    ) -> tuple[DatabaseProxy, ContainerProxy]:
+        """Create the database and the container, or get them if they exist."""
+        db = await self.client.create_database_if_not_exists(id=self.database_id)
+        try:
+            container = await db.create_container(
+                id=self.container_id,
+                partition_key=PartitionKey(path=self.partition_key),
+                indexing_policy=indexing_policy,
+                vector_embedding_policy=vector_embedding_policy,
+                offer_throughput=offer_throughput,
+            )
+        except exceptions.CosmosResourceExistsError:
+            container = db.get_container_client(container=self.container_id)
+        return db, container
+
+    async def upsert(self, payload: dict) -> dict:
+        """Upsert an item."""
+        if "id" not in payload:
+            msg = "The field 'id' is required in record."
+            raise ValueError(msg)
+        await self.create()
+        return await self.container.upsert_item(body=payload)
+
+    async def find(self, filter: Optional[dict]) -> list:
+        """Find items."""
+        return [item async for item in self.iter_find(filter=filter)]
+
+    async def iter_find(self, filter: Optional[dict]) -> AsyncIterator[dict]:
+        """Find items, lazily fetching result pages."""
+        await self.create()
+        query, parameters = build_find_query(filter)
+        # the async client queries across partitions when no partition key is given
+        async for item in self.container.query_items(query=query, parameters=parameters):
+            yield item
+
+    async def find_by_ids(self, tenant_id: str, ids: list[str]) -> list:
+        """Find the items of a tenant by id."""
+        await self.create()
+        query, parameters = build_find_by_ids_query(tenant_id, ids)
+        return [item async for item in self.container.query_items(
+            query=query,
+            parameters=parameters,
+            partition_key=tenant_id,
+        )]
+
+    async def find_content_hashes(self, tenant_id: str, document_id: str) -> dict[str, Optional[dict]]:
+        """Content and metadata hashes of each stored chunk of a document, by id; None for a chunk without
+        a vector, e.g. stored by a split-only run or a failed encode, so that a re-ingestion encodes it."""
+        await self.create()
+        return {
+            item["id"]: {
+                "contentHash": item.get("contentHash"),
+                "metadataHash": item.get("metadataHash"),
+            } if item.get("hasVector") else None
+            async for item in self.container.query_items(
+                query=(
+                    "SELECT c.id, c.contentHash, c.metadataHash, IS_DEFINED(c.vector) AS hasVector FROM c"
+                    " WHERE c.tenantId = @tenantId AND c.documentId = @documentId"
+                ),
+                parameters=[
+                    {"name": "@tenantId", "value": tenant_id},
+                    {"name": "@documentId", "value": document_id},
+                ],
+                partition_key=tenant_id,
+            )
+        }
+
+    async def iter_find_unencoded(self, tenant_id: str, document_id: str) -> AsyncIterator[dict]:
+        """Find the chunks of a document without a vector, lazily fetching result pages."""
+        await self.create()
+        query, parameters = build_find_query({"tenantId": tenant_id, "documentId": document_id})
+        async for item in self.container.query_items(
+            query=query + " AND NOT IS_DEFINED(c.vector)",
+            parameters=parameters,
+            partition_key=tenant_id,
+        ):
+            yield item
+
+    async def bulk_upsert(
+        self,
+        items: list[dict],
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+        max_retries: int = BULK_MAX_RETRIES,
+    ) -> list[dict]:
+        """Upsert items as transactional batches grouped by partition key.
+
+        Returns one outcome per item, in the order of `items`.
+        """
+        return await self._bulk(items, "upsert", max_concurrency=max_concurrency, max_retries=max_retries)
+
+    async def bulk_patch(
+        self,
+        patches: list[dict],
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+        max_retries: int = BULK_MAX_RETRIES,
+    ) -> list[dict]:
+        """Patch items as transactional batches grouped by partition key, e.g. `src.split.diff.metadata_patch`.
+
+        Returns one outcome per patch, in the order of `patches`.
+        """
+        return await self._bulk(patches, "patch", max_concurrency=max_concurrency, max_retries=max_retries)
+
+    async def bulk_delete(
+        self,
+        tenant_id: str,
+        ids: list[str],
+        max_concurrency: int = BULK_MAX_CONCURRENCY,
+        max_retries: int = BULK_MAX_RETRIES,
+    ) -> list[dict]:
+        """Delete items of a tenant, each on its own so one missing id does not fail the others.
+
+        An id that is already gone counts as deleted. Returns one outcome per id, in the order of `ids`.
+        """
+        items = [{"id": i, self.partition_key.lstrip("/"): tenant_id} for i in ids]
+        return await self._bulk(items, "delete", max_concurrency=max_concurrency, max_retries=max_retries)
+
+    async def _bulk(
+        self,
+        items: list[dict],
+        operation: str,
+        max_concurrency: int,
+        max_retries: int,
+    ) -> list[dict]:
+        """Run an operation on items as transactional batches grouped by partition key."""
+        batches = plan_batches(items, partition_key_field=self.partition_key.lstrip("/"))
+        logging.info("CosmosDB: bulk %s %d items in %d batches", operation, len(items), len(batches))
+        await self.create()
+
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run(partition_key: str, idxs: list[int]) -> list[dict]:
+            async with semaphore:
+                return await self._execute_batch(
+                    partition_key, [items[idx] for idx in idxs], max_retries, operation,
+                )
+
+        results = await asyncio.gather(*(run(pk, idxs) for pk, idxs in batches))
+        outcomes: list[Optional[dict]] = [None] * len(items)
+        for (_, idxs), batch_outcomes in zip(batches, results):
+            for idx, outcome in zip(idxs, batch_outcomes):
+                outcomes[idx] = outcome
+        return outcomes
+
+    async def _execute_batch(
+        self,
+        partition_key: str,
+        items: list[dict],
+        max_retries: int,
+        operation: str = "upsert",
+    ) -> list[dict]:
+        """Execute one transactional batch, retrying when throttled; deletes run item by item."""
+        if operation == "delete":
+            return [await self._delete_item(partition_key, item, max_retries) for item in items]
+        operations = batch_operations(items, operation)
+        for attempt in range(max_retries + 1):
+            try:
+                await self.container.execute_item_batch(
+                    batch_operations=operations,
+                    partition_key=partition_key,
+                )
+                return [
+                    {"id": item["id"], "statusCode": 200, "error": None}
+                    for item in items
+                ]
+            except (exceptions.CosmosBatchOperationError, exceptions.CosmosHttpResponseError) as e:
+                error = e
+                status_codes = batch_status_codes(e, len(items))
+            if 429 not in status_codes or attempt == max_retries:
+                break
+            delay = retry_delay(error, attempt)
+            logging.warning("CosmosDB: batch throttled, retry in %.2fs", delay)
+            await asyncio.sleep(delay)
+        return failed_outcomes(items, status_codes, error)
+
+    async def _delete_item(
+        self,
+        partition_key: str,
+        item: dict,
+        max_retries: int,
+    ) -> dict:
+        """Delete one item, retrying when throttled; an item that is already gone counts as deleted."""
+        for attempt in range(max_retries + 1):
+            try:
+                await self.container.delete_item(item=item["id"], partition_key=partition_key)
+                return {"id": item["id"], "statusCode": 204, "error": None}
+            except exceptions.CosmosResourceNotFoundError:
+                return {"id": item["id"], "statusCode": 404, "error": None}
+            except exceptions.CosmosHttpResponseError as e:
+                error = e
+            if error.status_code != 429 or attempt == max_retries:
+                break
+            delay = retry_delay(error, attempt)
+            logging.warning("CosmosDB: delete throttled, retry in %.2fs", delay)
+            await asyncio.sleep(delay)
+        return failed_outcomes([item], [error.status_code], error)[0]
@@ -0,0 +1,254 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Sequence
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from src.load.pdf import is_pdf, select_pages, split_page_files
+from src.store import blob
+
+import dotenv
+dotenv.load_dotenv('.env.local')
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "2000"))
+OCR_CACHE_PATH = os.getenv("OCR_CACHE_PATH")  # SQLite file, disk tier disabled when unset
+OCR_CACHE_BLOB_PREFIX = os.getenv("OCR_CACHE_BLOB_PREFIX")  # blob folder, blob tier disabled when unset
+
+
+def ocr_cache_key(model: str, file_content: bytes) -> str:
+    """Cache key of a file processed by an OCR model."""
+    return hashlib.sha256(model.encode("utf-8") + b"\0" + file_content).hexdigest()
+
+
+class OcrCache:
+    """OCR result cache with an in-memory LRU tier, an optional SQLite tier and an optional blob tier.
+
+    An entry holds the page markdowns of a file, or of a single page.
+    """
+
+    max_size: int
+    path: Optional[str]
+    blob_prefix: Optional[str]
+
+    def __init__(
+        self,
+        max_size: int = OCR_CACHE_SIZE,
+        path: Optional[str] = OCR_CACHE_PATH,
+        blob_prefix: Optional[str] = OCR_CACHE_BLOB_PREFIX,
+    ) -> None:
+        """Initialize."""
+        self.max_size = max_size
+        self.path = path
+        self.blob_prefix = blob_prefix
+        self._memory: OrderedDict[str, list[str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "blob_hits": 0, "misses": 0}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_pages (key TEXT PRIMARY KEY, pages TEXT)"
+            )
+            self._db.commit()
+        logger.info("OcrCache: size=%d, path=%s, blob_prefix=%s", max_size, path, blob_prefix)
+
+    def _remember(self, key: str, pages: list[str]) -> None:
+        """Insert into the LRU tier, evicting the least recently used entries."""
+        self._memory[key] = pages
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _blob_name(self, key: str) -> str:
+        return f"{self.blob_prefix}/{key}.json"
+
+    def get_many(self, keys: Sequence[str]) -> list[Optional[list[str]]]:
+        """Get the cached page markdowns of keys, None where missing."""
+        with self._lock:
+            entries = []
+            for key in keys:
+                pages = self._memory.get(key)
+                if pages is not None:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                elif self._db is not None and (row := self._db.execute(
+                    "SELECT pages FROM ocr_pages WHERE key = ?", (key,)
+                ).fetchone()):
+                    pages = json.loads(row[0])
+                    self._remember(key, pages)
+                    self._counters["disk_hits"] += 1
+                entries.append(pages)
+
+        # the blob tier is shared by every instance, and read outside the lock
+        for idx, key in enumerate(keys):
+            if entries[idx] is not None:
+                continue
+            if self.blob_prefix:
+                try:
+                    entries[idx] = json.loads(blob.load_bytes(self._blob_name(key)))
+                except ResourceNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.warning("OcrCache: blob tier read failed, counted as a miss: %s", e)
+            with self._lock:
+                if entries[idx] is None:
+                    self._counters["misses"] += 1
+                else:
+                    self._remember(key, entries[idx])
+                    self._counters["blob_hits"] += 1
+        return entries
+
+    def put_many(self, keys: Sequence[str], entries: Sequence[list[str]]) -> None:
+        """Cache the page markdowns of keys; a failing disk or blob write is logged, never raised,
+        so that the OCR result it follows is not lost."""
+        with self._lock:
+            for key, pages in zip(keys, entries):
+                self._remember(key, list(pages))
+            if self._db is not None:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO ocr_pages (key, pages) VALUES (?, ?)",
+                        [(key, json.dumps(pages)) for key, pages in zip(keys, entries)],
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning("OcrCache: disk tier write failed: %s", e)
+        if self.blob_prefix:
+            for key, pages in zip(keys, entries):
+                try:
+                    blob.save_bytes(self._blob_name(key), json.dumps(pages).encode("utf-8"))
+                except Exception as e:
+                    logger.warning("OcrCache: blob tier write failed: %s", e)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and size of the cache."""
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["blob_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hits": hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "size": len(self._memory),
+            }
+
+
+_DEFAULT_CACHE: Optional[OcrCache] = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def get_ocr_cache() -> OcrCache:
+    """Process-wide OCR cache."""
+    global _DEFAULT_CACHE
+    with _DEFAULT_CACHE_LOCK:
+        if _DEFAULT_CACHE is None:
+            _DEFAULT_CACHE = OcrCache()
+        return _DEFAULT_CACHE
+
+
+class _PagePlan:
+    """Cached pages of a multi-page PDF file, and the distinct pages left to OCR."""
+
+    keys: list[str]
+    pages: list[Optional[str]]
+    missing: dict[str, list[int]]
+
+    def __init__(self, cache: OcrCache, model: str, page_files: list[bytes]) -> None:
+        """Initialize, looking the pages up in the cache."""
+        self.keys = [ocr_cache_key(model, page_file) for page_file in page_files]
+        self.pages = [entry[0] if entry else None for entry in cache.get_many(self.keys)]
+        # identical pages share a key, so they are processed once
+        self.missing = {}
+        for idx, (key, page) in enumerate(zip(self.keys, self.pages)):
+            if page is None:
+                self.missing.setdefault(key, []).append(idx)
+
+    def ocr_input(self, file_content: bytes) -> bytes:
+        """The file to OCR: the whole file when every page is missing, else a file of the missing pages."""
+        if len(self.missing) == len(self.keys):
+            return file_content
+        return select_pages(file_content, [idxs[0] for idxs in self.missing.values()])
+
+    def fill(self, cache: OcrCache, ocr_pages: list[str]) -> Optional[list[str]]:
+        """Fill in and cache the processed pages; None when they do not line up with the missing pages."""
+        whole_file = len(self.missing) == len(self.keys)
+        if len(ocr_pages) != (len(self.keys) if whole_file else len(self.missing)):
+            logger.warning("OcrCache: got %d pages for %d missing pages", len(ocr_pages), len(self.missing))
+            return None
+        positions = [idxs[0] for idxs in self.missing.values()] if whole_file else range(len(self.missing))
+        for idxs, position in zip(self.missing.values(), positions):
+            for idx in idxs:
+                self.pages[idx] = ocr_pages[position]
+        cache.put_many(
+            list(self.missing),
+            [[ocr_pages[position]] for position in positions],
+        )
+        return self.pages
+
+
+def _plan_pages(cache: OcrCache, model: str, file_content: bytes) -> Optional[_PagePlan]:
+    """Page plan of a multi-page PDF file; None for other files."""
+    if not is_pdf(file_content):
+        return None
+    page_files = split_page_files(file_content)
+    if len(page_files) < 2:
+        return None
+    return _PagePlan(cache, model, page_files)
+
+
+def ocr_with_cache(
+        cache: OcrCache,
+        model: str,
+        file_content: bytes,
+        ocr_fn: Callable[[bytes], list[str]],
+) -> list[str]:
+    """OCR a file, calling `ocr_fn` only for a file, or the distinct pages of a PDF file, missing from the cache."""
+    file_key = ocr_cache_key(model, file_content)
+    [pages] = cache.get_many([file_key])
+    if pages is not None:
+        return pages
+
+    plan = _plan_pages(cache, model, file_content)
+    if plan is None:
+        pages = ocr_fn(file_content)
+    elif not plan.missing:
+        pages = plan.pages
+    else:
+        pages = plan.fill(cache, ocr_fn(plan.ocr_input(file_content))) or ocr_fn(file_content)
+    cache.put_many([file_key], [pages])
+    return pages
+
+
+async def aocr_with_cache(
+        cache: OcrCache,
+        model: str,
+        file_content: bytes,
+        ocr_fn: Callable[[bytes], Awaitable[list[str]]],
+) -> list[str]:
+    """OCR a file, awaiting `ocr_fn` only for a file, or the distinct pages of a PDF file, missing from the cache."""
+    file_key = ocr_cache_key(model, file_content)
+    # cache lookups and PDF page splitting block, so they run off the event loop
+    [pages] = await asyncio.to_thread(cache.get_many, [file_key])
+    if pages is not None:
+        return pages
+
+    plan = await asyncio.to_thread(_plan_pages, cache, model, file_content)
+    if plan is None:
+        pages = await ocr_fn(file_content)
+    elif not plan.missing:
+        pages = plan.pages
+    else:
+        ocr_input = await asyncio.to_thread(plan.ocr_input, file_content)
+        pages = await asyncio.to_thread(plan.fill, cache, await ocr_fn(ocr_input))
+        pages = pages or await ocr_fn(file_content)
+    await asyncio.to_thread(cache.put_many, [file_key], [pages])
+    return pages
@@ -0,0 +1,94 @@
+import io
+import asyncio
+import pytest
+
+DUMMY_PDF_PATH = "tests/fixtures/dummy.pdf"
+
+@pytest.fixture
+def make_pdf():
+    """Factory of PDF files: "text" adds the dummy page, a number a blank page of that width, "blank" a blank page."""
+    from pypdf import PdfReader, PdfWriter
+
+    def factory(pages):
+        dummy = PdfReader(DUMMY_PDF_PATH).pages[0]
+        writer = PdfWriter()
+        for page in pages:
+            if page == "text":
+                writer.add_page(dummy)
+            else:
+                writer.add_blank_page(width=200 if page == "blank" else page, height=100)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+    return factory
+
+class FakeContainer:
+    """Container stand-in recording transactional batches, deletes and queries."""
+
+    def __init__(self, throttle: int = 0, items: list = ()):
+        self.batches = []
+        self.throttle = throttle
+        self.items = list(items)
+        self.deleted = []
+
+    def execute_item_batch(self, batch_operations, partition_key):
+        from azure.cosmos import exceptions
+        if self.throttle:
+            self.throttle -= 1
+            raise exceptions.CosmosHttpResponseError(status_code=429, message="throttled")
+        self.batches.append((partition_key, [
+            op[1][0] if op[0] == "patch" else op[1][0]["id"]
+            for op in batch_operations
+        ]))
+        self.operations = {op[0] for op in batch_operations}
+        return [{"statusCode": 200} for _ in batch_operations]
+
+    def delete_item(self, item, partition_key):
+        from azure.cosmos import exceptions
+        if item not in [i["id"] for i in self.items]:
+            raise exceptions.CosmosResourceNotFoundError(status_code=404, message="not found")
+        self.items = [i for i in self.items if i["id"] != item]
+        self.deleted.append((partition_key, item))
+
+    def query_items(self, query, parameters, partition_key):
+        self.query = query
+        return list(self.items)
+
+class FakeAsyncContainer(FakeContainer):
+    """Async container stand-in yielding to the event loop on every call."""
+
+    async def execute_item_batch(self, batch_operations, partition_key):
+        await asyncio.sleep(0)
+        return super().execute_item_batch(batch_operations, partition_key)
+
+    async def delete_item(self, item, partition_key):
+        await asyncio.sleep(0)
+        return super().delete_item(item, partition_key)
+
+def new_store(cls, container):
+    cosmos_db = cls.__new__(cls)
+    cosmos_db.partition_key = "/tenantId"
+    cosmos_db.client = object()
+    cosmos_db.container = container
+    return cosmos_db
+
+@pytest.fixture
+def make_container():
+    return FakeContainer
+
+@pytest.fixture
+def make_async_container():
+    return FakeAsyncContainer
+
+@pytest.fixture
+def make_store():
+    """Factory of CosmosDB stores wrapping a fake container, without connecting."""
+    from src.store.cosmosdb import CosmosDB
+    return lambda container: new_store(CosmosDB, container)
+
+@pytest.fixture
+def make_async_store():
+    """Factory of AsyncCosmosDB stores wrapping a fake container, without connecting."""
+    from src.store.cosmosdb_aio import AsyncCosmosDB
+    return lambda container: new_store(AsyncCosmosDB, container)
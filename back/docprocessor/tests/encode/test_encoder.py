@@ -25,3 +25,22 @@ class TestEncoder:
             assert chunk.text == chunks[0].text
             assert chunk.vector is not None
         assert len(result["chunks"]) == len(chunks)
+
+def test_encode_items_keeps_seeded_vectors(monkeypatch):
+    from src.encode import encoder
+
+    class FakeCosmosDB:
+        def bulk_upsert(self, items):
+            return [{"id": item["id"], "error": None} for item in items]
+
+    embedded = []
+
+    def embed(texts):
+        embedded.extend(texts)
+        return [[1.0] for _ in texts]
+
+    monkeypatch.setattr(encoder, "get_embed_fn", lambda: embed)
+    items = [{"id": "a", "text": "a", "vector": [0.5]}, {"id": "b", "text": "b"}]
+    encoded = list(encoder.encode_items(cosmos_db=FakeCosmosDB(), items=items))
+    assert embedded == ["b"]
+    assert [item["vector"] for item in encoded] == [[0.5], [1.0]]
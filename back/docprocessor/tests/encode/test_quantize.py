@@ -0,0 +1,61 @@
+import pytest
+
+def test_importable():
+    from src.encode.quantize import quantize, dequantize # noqa: F401
+
+@pytest.mark.parametrize("encoding, tolerance", [
+    ("float32", 0.0),
+    ("float16", 1e-3),
+    ("int8", 0.5 / 127),
+])
+@pytest.mark.parametrize("packed", [True, False])
+def test_round_trip(encoding, tolerance, packed):
+    import numpy as np
+    from src.encode.quantize import dequantize, quantize
+    vector = np.random.default_rng(0).uniform(-1, 1, size=64).astype(np.float32)
+    quantized = quantize(vector, encoding=encoding, packed=packed)
+    assert quantized["encoding"] == encoding
+    assert isinstance(quantized["data"], str if packed else list)
+    restored = dequantize(quantized)
+    assert restored.dtype == np.float32
+    assert np.abs(restored - vector).max() <= tolerance * np.abs(vector).max() + 1e-7
+
+def test_int8_zero_vector():
+    from src.encode.quantize import dequantize, quantize
+    quantized = quantize([0.0, 0.0], encoding="int8")
+    assert quantized["scale"] == 0.0
+    assert dequantize(quantized).tolist() == [0.0, 0.0]
+
+def test_packed_sizes():
+    import json
+    from src.encode.quantize import quantize
+    vector = [0.123456789] * 1024
+    full = len(json.dumps(vector))
+    assert len(json.dumps(quantize(vector, encoding="float16"))) < full / 4
+    assert len(json.dumps(quantize(vector, encoding="int8"))) < full / 8
+
+@pytest.mark.parametrize("quantized", [
+    {"encoding": "bfloat16", "data": ""},
+    {"data": ""},
+])
+def test_dequantize_unsupported(quantized):
+    from src.encode.quantize import dequantize
+    with pytest.raises(ValueError):
+        dequantize(quantized)
+
+def test_quantize_unsupported():
+    from src.encode.quantize import quantize
+    with pytest.raises(ValueError):
+        quantize([1.0], encoding="int4")
+
+@pytest.mark.parametrize("encoding, expected", [
+    ("float32", [False, False, False]),
+    ("int8", [True, False, False]),
+])
+def test_add_quantized(encoding, expected):
+    from src.encode.quantize import add_quantized
+    existing = {"encoding": "float16", "data": ""}
+    items = [{"vector": [0.5, -1.0]}, {"text": "unencoded"}, {"vector": [1.0], "vectorQ": existing}]
+    add_quantized(items, encoding=encoding)
+    assert ["vectorQ" in item and item["vectorQ"] is not existing for item in items] == expected
+    assert items[2]["vectorQ"] is existing
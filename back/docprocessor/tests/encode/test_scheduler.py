@@ -0,0 +1,75 @@
+import pytest
+
+def test_importable():
+    from src.encode.scheduler import (
+        embed_texts, # noqa: F401
+        make_batches, # noqa: F401
+    )
+
+@pytest.mark.parametrize("texts, max_batch_size, max_batch_chars, expected", [
+    ([], 2, 10, []),
+    (["a", "b", "c"], 2, 10, [[0, 1], [2]]),
+    (["aaaa", "bbbb", "cc"], 10, 8, [[0, 1], [2]]),
+    (["a" * 20, "b"], 10, 8, [[0], [1]]),
+])
+def test_make_batches(texts, max_batch_size, max_batch_chars, expected):
+    from src.encode.scheduler import make_batches
+    assert make_batches(texts, max_batch_size, max_batch_chars) == expected
+
+def test_embed_texts_preserves_order():
+    from src.encode.scheduler import embed_texts
+    texts = [str(i) for i in range(25)]
+
+    vectors = embed_texts(
+        embed_fn=lambda inputs: [[float(t)] for t in inputs],
+        texts=texts,
+        max_batch_size=4,
+        max_concurrency=3,
+    )
+
+    assert vectors == [[float(i)] for i in range(25)]
+
+def test_embed_texts_retries_failed_batch(monkeypatch):
+    import src.encode.scheduler as scheduler
+    monkeypatch.setattr(scheduler, "EMBED_BACKOFF_SECONDS", 0)
+    calls = []
+
+    def flaky_embed(inputs):
+        calls.append(inputs)
+        if inputs == ["b"] and calls.count(["b"]) == 1:
+            raise RuntimeError("rate limited")
+        return [[1.0] for _ in inputs]
+
+    vectors = scheduler.embed_texts(embed_fn=flaky_embed, texts=["a", "b"], max_batch_size=1)
+
+    assert vectors == [[1.0], [1.0]]
+    assert calls.count(["a"]) == 1
+    assert calls.count(["b"]) == 2
+
+def test_embed_texts_raises_after_retries(monkeypatch):
+    import src.encode.scheduler as scheduler
+    monkeypatch.setattr(scheduler, "EMBED_BACKOFF_SECONDS", 0)
+
+    def failing_embed(inputs):
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        scheduler.embed_texts(embed_fn=failing_embed, texts=["a"], max_retries=1)
+
+def test_aembed_texts_preserves_order():
+    import asyncio
+    from src.encode.scheduler import aembed_texts
+    texts = [str(i) for i in range(25)]
+
+    async def embed_fn(inputs):
+        await asyncio.sleep(0)
+        return [[float(t)] for t in inputs]
+
+    vectors = asyncio.run(aembed_texts(
+        embed_fn=embed_fn,
+        texts=texts,
+        max_batch_size=4,
+        max_concurrency=3,
+    ))
+
+    assert vectors == [[float(i)] for i in range(25)]
@@ -7,6 +7,14 @@ def test_importable():
         download_file, # noqa: F401
     )
 
+def test_stable_document_id():
+    from src.load.loader import stable_document_id
+    url = "https://example.com/a.pdf"
+    assert stable_document_id("t", url=url) == stable_document_id("t", url=url)
+    assert stable_document_id("t", url=url) != stable_document_id("u", url=url)
+    assert stable_document_id("t", file_content="abc") == stable_document_id("t", file_content=b"abc")
+    assert len(stable_document_id("t", file_content=b"abc")) == 32
+
 @pytest.mark.parametrize("url", [
     "https://www.w3.org/WAI/ER/tests/xhtml/testfiles/resources/pdf/dummy.pdf",
 ])
@@ -54,4 +62,82 @@ def test_doc_loader_pdf(mime_type, filepath):
     )
     assert isinstance(result, list)
     for page_content in result:
-        assert isinstance(page_content, PageContent)
\ No newline at end of file
+        assert isinstance(page_content, PageContent)
+class FailingLoader:
+    def lazy_load(self, file_content):
+        raise RuntimeError("cannot parse")
+        yield
+
+class PagesLoader:
+    def lazy_load(self, file_content):
+        yield "page 1"
+        yield "page 2"
+
+def test_doc_loader_falls_back_to_the_next_loader(monkeypatch):
+    import src.load.loader as loader
+    saved = []
+    monkeypatch.setattr(loader, "get_loader_classes", lambda mime_type: [FailingLoader, PagesLoader])
+    monkeypatch.setattr(loader, "save_lines", lambda filename, records: saved.append(list(records)))
+
+    result = loader.doc_loader(
+        tenant_id="t", document_id="d", label="l", file_content=b"abc", mime_type="text/plain",
+    )
+
+    assert result["pageCount"] == 2
+    assert [r.get("page_content") for r in saved[-1][1:]] == ["page 1", "page 2"]
+
+def test_doc_loader_storage_error_propagates(monkeypatch):
+    import src.load.loader as loader
+    loaded = []
+
+    class CountingLoader(PagesLoader):
+        def lazy_load(self, file_content):
+            loaded.append(type(self))
+            yield from super().lazy_load(file_content)
+
+    def save_lines(filename, records):
+        list(records)
+        raise OSError("storage unavailable")
+
+    monkeypatch.setattr(loader, "get_loader_classes", lambda mime_type: [CountingLoader, CountingLoader])
+    monkeypatch.setattr(loader, "save_lines", save_lines)
+
+    with pytest.raises(OSError):
+        loader.doc_loader(tenant_id="t", document_id="d", label="l", file_content=b"abc", mime_type="text/plain")
+    assert len(loaded) == 1
+
+class AsyncFailingLoader:
+    async def alazy_load(self, file_content):
+        raise RuntimeError("cannot parse")
+        yield
+
+class AsyncPagesLoader:
+    async def alazy_load(self, file_content):
+        yield "page 1"
+
+@pytest.mark.parametrize("loader_classes, save_error, expected", [
+    ([AsyncFailingLoader, AsyncPagesLoader], None, 1),
+    ([AsyncPagesLoader, AsyncPagesLoader], OSError, OSError),
+])
+def test_doc_loader_async_fallback(monkeypatch, loader_classes, save_error, expected):
+    import asyncio
+    import src.load.loader as loader
+    calls = []
+
+    async def save_lines(filename, records):
+        calls.append(filename)
+        async for _ in records:
+            pass
+        if save_error:
+            raise save_error("storage unavailable")
+
+    monkeypatch.setattr(loader, "get_loader_classes", lambda mime_type: loader_classes)
+    monkeypatch.setattr(loader.blob_aio, "save_lines", save_lines)
+
+    run = loader.doc_loader_async(tenant_id="t", document_id="d", label="l", file_content=b"abc", mime_type="text/plain")
+    if isinstance(expected, type):
+        with pytest.raises(expected):
+            asyncio.run(run)
+        assert len(calls) == 1
+    else:
+        assert asyncio.run(run)["pageCount"] == expected
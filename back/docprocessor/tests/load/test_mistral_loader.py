@@ -0,0 +1,64 @@
+import io
+import time
+import threading
+import pytest
+
+def test_importable():
+    from src.load.mistral_loader import (
+        MistralLoader, # noqa: F401
+    )
+
+def page_widths(file_content):
+    from pypdf import PdfReader
+    return [str(int(page.mediabox.width) - 100) for page in PdfReader(io.BytesIO(file_content)).pages]
+
+@pytest.fixture
+def loader_module(monkeypatch):
+    import src.load.mistral_loader as mistral_loader
+    from src.store.ocr_cache import OcrCache
+    cache = OcrCache(max_size=100, path=None, blob_prefix=None)
+    monkeypatch.setattr(mistral_loader, "get_ocr_cache", lambda: cache)
+    return mistral_loader
+
+@pytest.mark.parametrize("page_count, pages_per_range, expected_jobs", [
+    (1, 2, 1),
+    (5, 2, 3),
+    (6, 10, 1),
+])
+def test_lazy_load_page_ranges(monkeypatch, loader_module, page_count, pages_per_range, expected_jobs, make_pdf):
+    jobs = []
+    running = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def fake_ocr(self, file_content):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+            jobs.append(file_content)
+        return page_widths(file_content)
+
+    monkeypatch.setattr(loader_module.MistralLoader, "_ocr", fake_ocr)
+    loader = loader_module.MistralLoader(pages_per_range=pages_per_range, max_concurrency=2)
+
+    contents = list(loader.lazy_load(make_pdf([100 + idx for idx in range(page_count)])))
+
+    assert contents == [str(i) for i in range(page_count)]
+    assert len(jobs) == expected_jobs
+    assert running["max"] <= 2
+
+def test_alazy_load_page_ranges(monkeypatch, loader_module, make_pdf):
+    import asyncio
+
+    async def fake_aocr(self, file_content):
+        await asyncio.sleep(0)
+        return page_widths(file_content)
+
+    monkeypatch.setattr(loader_module.MistralLoader, "_aocr", fake_aocr)
+    loader = loader_module.MistralLoader(pages_per_range=2, max_concurrency=2)
+
+    contents = asyncio.run(loader.aload(make_pdf([100, 101, 102, 103, 104])))
+
+    assert contents == ["0", "1", "2", "3", "4"]
@@ -0,0 +1,30 @@
+import pytest
+from pathlib import Path
+
+def test_importable():
+    from src.load.pdf import (
+        count_pages, # noqa: F401
+        extract_pages, # noqa: F401
+        page_ranges, # noqa: F401
+    )
+
+@pytest.mark.parametrize("page_count, pages_per_range, expected", [
+    (0, 10, []),
+    (3, 10, [(0, 3)]),
+    (25, 10, [(0, 10), (10, 20), (20, 25)]),
+])
+def test_page_ranges(page_count, pages_per_range, expected):
+    from src.load.pdf import page_ranges
+    assert page_ranges(page_count, pages_per_range) == expected
+
+@pytest.mark.parametrize("filepath, expected", [
+    ("tests/fixtures/dummy.pdf", True),
+])
+def test_pdf_pages(filepath, expected):
+    from src.load.pdf import count_pages, extract_pages, is_pdf
+    file_content = Path(filepath).read_bytes()
+
+    assert is_pdf(file_content) is expected
+    assert not is_pdf(b"plain text")
+    assert count_pages(file_content) == 1
+    assert count_pages(extract_pages(file_content, 0, 1)) == 1
@@ -0,0 +1,61 @@
+import io
+import pytest
+
+def test_importable():
+    from src.load.pdf_text_loader import (
+        PdfTextLoader, # noqa: F401
+        is_text_sufficient, # noqa: F401
+    )
+
+class FakeOcrLoader:
+    """OCR loader stand-in recording the page count of each file it is sent."""
+
+    def __init__(self):
+        self.calls = []
+
+    def lazy_load(self, file_content):
+        from pypdf import PdfReader
+        pages = PdfReader(io.BytesIO(file_content)).pages
+        self.calls.append(len(pages))
+        for page in pages:
+            yield f"ocr {int(page.mediabox.width)}"
+
+    async def alazy_load(self, file_content):
+        for content in self.lazy_load(file_content):
+            yield content
+
+@pytest.mark.parametrize("text, expected", [
+    ("", False),
+    ("short", False),
+    ("a born-digital page with enough words on it", True),
+    ("\x00\x01\x02\x03 ??? ### ... %%% &&& *** ((( ))) !!! ___", False),
+])
+def test_is_text_sufficient(text, expected):
+    from src.load.pdf_text_loader import is_text_sufficient
+    assert is_text_sufficient(text, min_chars=10) is expected
+
+@pytest.mark.parametrize("pages, expected_contents, expected_calls", [
+    (["text"], ["Dummy PDF file"], []),
+    ([101, "text", 102], ["ocr 101", "Dummy PDF file", "ocr 102"], [2]),
+])
+def test_lazy_load_sends_image_only_pages_to_ocr(pages, expected_contents, expected_calls, make_pdf):
+    from src.load.pdf_text_loader import PdfTextLoader
+    ocr_loader = FakeOcrLoader()
+    loader = PdfTextLoader(min_chars=5, ocr_loader=ocr_loader)
+
+    contents = [c.strip() for c in loader.lazy_load(make_pdf(pages))]
+
+    assert contents == expected_contents
+    assert ocr_loader.calls == expected_calls
+
+def test_alazy_load_sends_image_only_pages_to_ocr(make_pdf):
+    import asyncio
+    from src.load.pdf_text_loader import PdfTextLoader
+    ocr_loader = FakeOcrLoader()
+    loader = PdfTextLoader(min_chars=5, ocr_loader=ocr_loader)
+
+    async def load():
+        return [c.strip() async for c in loader.alazy_load(make_pdf(["text", 101]))]
+
+    assert asyncio.run(load()) == ["Dummy PDF file", "ocr 101"]
+    assert ocr_loader.calls == [1]
@@ -0,0 +1,81 @@
+import io
+import pytest
+from pathlib import Path
+
+def test_importable():
+    from src.load.registry import (
+        LoaderRegistry, # noqa: F401
+        get_registry, # noqa: F401
+        normalize_mime_type, # noqa: F401
+        sniff_mime_type, # noqa: F401
+    )
+
+@pytest.mark.parametrize("mime_type, expected", [
+    (None, "application/octet-stream"),
+    ("auto", "application/octet-stream"),
+    ("pdf", "application/pdf"),
+    ("Application/PDF", "application/pdf"),
+    ("text/plain; charset=utf-8", "text/plain"),
+    ("markdown", "text/markdown"),
+    ("image/webp", "image/webp"),
+])
+def test_normalize_mime_type(mime_type, expected):
+    from src.load.registry import normalize_mime_type
+    assert normalize_mime_type(mime_type) == expected
+
+def make_docx():
+    import zipfile
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/document.xml", "<document/>")
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("file_content, expected", [
+    (Path("tests/fixtures/dummy.pdf").read_bytes(), "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n\x00\x00", "image/png"),
+    (b"\xff\xd8\xff\xe0\x00", "image/jpeg"),
+    (make_docx(), "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    (b"plain text", "text/plain"),
+    ("plain text", "text/plain"),
+    ("é".encode("utf-8") * 2000, "text/plain"),
+    (b"  <!DOCTYPE html><html></html>", "text/html"),
+    (b"\x00\x01\x02binary", None),
+    (b"\xc3\x28 invalid utf-8", None),
+])
+def test_sniff_mime_type(file_content, expected):
+    from src.load.registry import sniff_mime_type
+    assert sniff_mime_type(file_content) == expected
+
+@pytest.mark.parametrize("mime_type, file_content, expected", [
+    ("application/octet-stream", b"plain text", "text/plain"),
+    ("application/octet-stream", b"%PDF-1.4", "application/pdf"),
+    ("auto", b"\x00\x01", "application/octet-stream"),
+    ("text/markdown", b"%PDF-1.4", "text/markdown"),
+    ("application/unknown", b"plain text", "text/plain"),
+])
+def test_resolve_mime_type(mime_type, file_content, expected):
+    from src.load.registry import DEFAULT_LOADERS, LoaderRegistry
+    registry = LoaderRegistry(DEFAULT_LOADERS)
+    assert registry.resolve_mime_type(mime_type, file_content) == expected
+
+def test_register():
+    from src.load.registry import LoaderRegistry
+
+    class HtmlLoader:
+        pass
+
+    class FallbackLoader:
+        pass
+
+    registry = LoaderRegistry({"text/html": [FallbackLoader]})
+    registry.register("html", HtmlLoader, first=True)
+
+    assert registry.get("text/html") == [HtmlLoader, FallbackLoader]
+    with pytest.raises(ValueError):
+        registry.get("application/zip")
+
+def test_get_loader_classes_sniffs_generic_mime_types():
+    from src.load.loader import get_loader_classes
+    from src.load.text_loader import TextLoader
+    assert get_loader_classes("application/octet-stream", b"plain text") == [TextLoader]
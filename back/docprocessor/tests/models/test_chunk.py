@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 
 def test_importable():
     from src.models.chunk import (
@@ -7,7 +8,8 @@ def test_importable():
 
 @pytest.mark.parametrize("attr", [
     "text",
-    "vector"
+    "vector",
+    "quantized",
 ])
 def test_has_attributes(attr):
     from src.models.chunk import Chunk
@@ -24,4 +26,60 @@ def test_init():
     )
 
     assert chunk.text == text
-    assert chunk.vector == vector
\ No newline at end of file
+    assert chunk.vector.dtype == np.float32
+    assert chunk.vector.tolist() == pytest.approx(vector)
+
+def test_slots():
+    from src.models.chunk import Chunk
+    chunk = Chunk(text="Sample content")
+    assert not hasattr(chunk, "__dict__")
+    with pytest.raises(AttributeError):
+        chunk.label = "q3"
+
+def test_vector_is_not_copied():
+    from src.models.chunk import Chunk
+    vector = np.arange(4, dtype=np.float32)
+    chunk = Chunk(text="a", vector=vector)
+    assert chunk.vector is vector
+    assert chunk.to_dict(arrays=True)["vector"] is vector
+
+def test_to_dict_is_json_serializable():
+    import json
+    from src.models.chunk import Chunk
+    chunk = Chunk(text="a", vector=[0.5, 1.0])
+    assert json.loads(json.dumps(chunk.to_dict())) == {"text": "a", "vector": [0.5, 1.0], "quantized": None}
+
+@pytest.mark.parametrize("items, has_vectors, has_quantized", [
+    ([], False, False),
+    ([{"text": "a", "vector": [1.0, 2.0]}, {"text": "b", "vector": [3.0, 4.0]}], True, False),
+    ([{"text": "a", "vector": [1.0, 2.0]}, {"text": "b"}], False, False),
+    ([{"text": "a", "vector": [1.0, 2.0], "vectorQ": {"encoding": "int8"}}], True, True),
+])
+def test_chunk_batch_from_items(items, has_vectors, has_quantized):
+    from src.models.chunk import ChunkBatch
+    batch = ChunkBatch.from_items(items)
+    assert len(batch) == len(items)
+    assert batch.texts == [item["text"] for item in items]
+    assert (batch.vectors is not None) == has_vectors
+    assert (batch.quantized is not None) == has_quantized
+
+def test_chunk_batch_rows_are_views():
+    from src.models.chunk import ChunkBatch
+    batch = ChunkBatch(texts=["a", "b"], vectors=[[1.0, 2.0], [3.0, 4.0]])
+    assert batch.vectors.shape == (2, 2)
+    chunks = list(batch)
+    assert [c.text for c in chunks] == ["a", "b"]
+    assert all(np.shares_memory(c.vector, batch.vectors) for c in chunks)
+    assert [d["vector"].tolist() for d in batch.to_dicts(arrays=True)] == [[1.0, 2.0], [3.0, 4.0]]
+    assert [d["vector"] for d in batch.to_dicts()] == [[1.0, 2.0], [3.0, 4.0]]
+
+@pytest.mark.parametrize("vectors, shape", [
+    ([], (0, 0)),
+    (np.zeros((0, 4)), (0, 4)),
+])
+def test_chunk_batch_empty(vectors, shape):
+    from src.models.chunk import ChunkBatch
+    batch = ChunkBatch(texts=[], vectors=vectors)
+    assert len(batch) == 0
+    assert batch.vectors.shape == shape
+    assert batch.to_dicts() == []
@@ -0,0 +1,45 @@
+import pytest
+
+def test_importable():
+    from src.models.response import ( # noqa: F401
+        ResponseChunks,
+        check_response_mode,
+        iter_ndjson,
+        response_body,
+    )
+
+SUMMARY = {"tenantId": "t1", "documentId": "d1", "chunkCount": 2, "elapsed": 0.5}
+ITEMS = [{"id": "d1-a", "text": "a"}, {"id": "d1-b", "text": "b"}]
+
+@pytest.mark.parametrize("mode, expected", [
+    ("summary", {**SUMMARY, "chunkIds": ["d1-a", "d1-b"]}),
+    ("ids", {"tenantId": "t1", "documentId": "d1", "chunkIds": ["d1-a", "d1-b"]}),
+    ("full", {**SUMMARY, "chunks": [{"id": "d1-a", "text": "a"}, {"id": "d1-b", "text": "b"}]}),
+])
+def test_response_body(mode, expected):
+    from src.models.response import ResponseChunks, response_body
+    written = ResponseChunks(mode)
+    for item in ITEMS:
+        assert written.add(item) is item
+    assert len(written) == 2
+    assert len(written.items) == (2 if mode == "full" else 0)
+    chunks = [{"text": item["text"]} for item in written.items] if mode == "full" else None
+    assert response_body(SUMMARY, written.ids, chunks, mode) == expected
+
+def test_unsupported_mode():
+    from src.models.response import ResponseChunks, response_body
+    with pytest.raises(ValueError):
+        ResponseChunks("vectors")
+    with pytest.raises(ValueError):
+        response_body(SUMMARY, [], None, "vectors")
+
+@pytest.mark.parametrize("body, expected_lines", [
+    ({**SUMMARY, "chunkIds": ["d1-a"]}, [{**SUMMARY, "chunkIds": ["d1-a"]}]),
+    ({**SUMMARY, "chunks": ITEMS}, [SUMMARY, *ITEMS]),
+])
+def test_iter_ndjson(body, expected_lines):
+    from src.models.response import iter_ndjson
+    from src.models.serialization import loads
+    lines = list(iter_ndjson(body))
+    assert all(line.endswith(b"\n") and line.count(b"\n") == 1 for line in lines)
+    assert [loads(line) for line in lines] == expected_lines
@@ -0,0 +1,41 @@
+import pytest
+
+def test_importable():
+    from src.models.serialization import dumps, loads # noqa: F401
+
+@pytest.fixture(params=["orjson", "json"])
+def serialization(request, monkeypatch):
+    from src.models import serialization
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    return serialization
+
+def test_dumps_models_and_arrays(serialization):
+    from array import array
+    import numpy as np
+    from src.models.chunk import Chunk, ChunkBatch
+    batch = ChunkBatch(texts=["a", "b"], vectors=[[0.5, 1.0], [1.5, 2.0]])
+    body = {
+        "chunks": batch.to_dicts(arrays=True),
+        "chunk": Chunk(text="c", vector=[0.25]),
+        "array": array("f", [2.5]),
+        "count": np.int64(3),
+    }
+    data = serialization.dumps(body)
+    assert isinstance(data, bytes)
+    assert b" " not in data
+    assert serialization.loads(data) == {
+        "chunks": [
+            {"text": "a", "vector": [0.5, 1.0], "quantized": None},
+            {"text": "b", "vector": [1.5, 2.0], "quantized": None},
+        ],
+        "chunk": {"text": "c", "vector": [0.25], "quantized": None},
+        "array": [2.5],
+        "count": 3,
+    }
+
+def test_dumps_unsupported(serialization):
+    with pytest.raises(TypeError):
+        serialization.dumps({"value": object()})
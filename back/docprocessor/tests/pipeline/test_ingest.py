@@ -0,0 +1,191 @@
+import pytest
+
+def test_importable():
+    from src.pipeline.ingest import (
+        doc_ingest, # noqa: F401
+    )
+
+class FakeCosmosDB:
+    """CosmosDB stand-in recording bulk upserts and deletes."""
+
+    upserted = []
+    deleted = []
+    patched = []
+    content_hashes = {}
+
+    def create(self):
+        pass
+
+    def find_content_hashes(self, tenant_id, document_id):
+        return dict(FakeCosmosDB.content_hashes)
+
+    def bulk_delete(self, tenant_id, ids):
+        FakeCosmosDB.deleted.extend(ids)
+        return [{"id": i, "statusCode": 200, "error": None} for i in ids]
+
+    def bulk_patch(self, patches):
+        FakeCosmosDB.patched.extend(patches)
+        return [{"id": patch["id"], "statusCode": 200, "error": None} for patch in patches]
+
+    def bulk_upsert(self, items):
+        FakeCosmosDB.upserted.extend(dict(item) for item in items)
+        return [{"id": item["id"], "statusCode": 200, "error": None} for item in items]
+
+def test_doc_ingest(monkeypatch):
+    import src.encode.encoder as encoder
+    import src.pipeline.ingest as ingest
+    FakeCosmosDB.upserted = []
+    FakeCosmosDB.content_hashes = {}
+    monkeypatch.setattr(ingest, "CosmosDB", FakeCosmosDB)
+    monkeypatch.setattr(encoder, "get_embed_fn", lambda: lambda texts: [[1.0] for _ in texts])
+
+    result = ingest.doc_ingest(
+        document_id="doc",
+        tenant_id="tenant",
+        label="label",
+        file_content=b"page one\n\npage two",
+        mime_type="text/plain",
+        checkpoint_chunks=True,
+    )
+
+    assert result["pageCount"] == 1
+    assert result["chunkCount"] == 1
+    assert [item.get("vector") for item in FakeCosmosDB.upserted] == [None, [1.0]]
+
+def test_doc_ingest_skips_unchanged_chunks(monkeypatch):
+    import src.encode.encoder as encoder
+    import src.pipeline.ingest as ingest
+    from src.split.diff import content_hash
+    from src.split.spliter import iter_chunk_items
+    stored = next(iter_chunk_items(
+        tenant_id="tenant", document_id="doc", pages=["page one\n\npage two"], label="label",
+    ))
+    FakeCosmosDB.upserted = []
+    FakeCosmosDB.deleted = []
+    FakeCosmosDB.patched = []
+    FakeCosmosDB.content_hashes = {
+        stored["id"]: {"contentHash": stored["contentHash"], "metadataHash": stored["metadataHash"]},
+        "doc_stale": {"contentHash": content_hash("gone"), "metadataHash": None},
+    }
+    monkeypatch.setattr(ingest, "CosmosDB", FakeCosmosDB)
+    monkeypatch.setattr(encoder, "get_embed_fn", lambda: lambda texts: [[1.0] for _ in texts])
+
+    result = ingest.doc_ingest(
+        document_id="doc",
+        tenant_id="tenant",
+        label="label",
+        file_content=b"page one\n\npage two",
+        mime_type="text/plain",
+    )
+
+    assert result["chunkCount"] == 1
+    assert result["encodedCount"] == 0
+    assert result["diff"] == {"changed": 0, "unchanged": 1, "patched": 0, "deleted": 1}
+    assert FakeCosmosDB.upserted == []
+    assert FakeCosmosDB.patched == []
+    assert FakeCosmosDB.deleted == ["doc_stale"]
+
+def test_doc_ingest_patches_the_label_of_unchanged_chunks(monkeypatch):
+    import src.encode.encoder as encoder
+    import src.pipeline.ingest as ingest
+    from src.split.spliter import iter_chunk_items
+    stored = next(iter_chunk_items(
+        tenant_id="tenant", document_id="doc", pages=["page one\n\npage two"], label="2024-01-01",
+    ))
+    FakeCosmosDB.upserted = []
+    FakeCosmosDB.deleted = []
+    FakeCosmosDB.patched = []
+    FakeCosmosDB.content_hashes = {
+        stored["id"]: {"contentHash": stored["contentHash"], "metadataHash": stored["metadataHash"]},
+    }
+    monkeypatch.setattr(ingest, "CosmosDB", FakeCosmosDB)
+    monkeypatch.setattr(encoder, "get_embed_fn", lambda: lambda texts: [[1.0] for _ in texts])
+
+    result = ingest.doc_ingest(
+        document_id="doc",
+        tenant_id="tenant",
+        label="2024-02-01",
+        file_content=b"page one\n\npage two",
+        mime_type="text/plain",
+    )
+
+    assert result["encodedCount"] == 0
+    assert result["diff"] == {"changed": 0, "unchanged": 1, "patched": 1, "deleted": 0}
+    assert FakeCosmosDB.upserted == []
+    assert [patch["id"] for patch in FakeCosmosDB.patched] == [stored["id"]]
+    assert {"op": "set", "path": "/label", "value": "2024-02-01"} in FakeCosmosDB.patched[0]["operations"]
+
+def test_doc_ingest_encodes_chunks_stored_by_split(monkeypatch):
+    import src.encode.encoder as encoder
+    import src.pipeline.ingest as ingest
+    from src.split.spliter import iter_chunk_items
+    stored = next(iter_chunk_items(tenant_id="tenant", document_id="doc", pages=["page one\n\npage two"]))
+    FakeCosmosDB.upserted = []
+    FakeCosmosDB.deleted = []
+    # a split-only run stored the chunk without a vector: the store reports no content hash for it
+    FakeCosmosDB.content_hashes = {stored["id"]: None}
+    monkeypatch.setattr(ingest, "CosmosDB", FakeCosmosDB)
+    monkeypatch.setattr(encoder, "get_embed_fn", lambda: lambda texts: [[1.0] for _ in texts])
+
+    result = ingest.doc_ingest(
+        document_id="doc",
+        tenant_id="tenant",
+        label="label",
+        file_content=b"page one\n\npage two",
+        mime_type="text/plain",
+    )
+
+    assert result["encodedCount"] == 1
+    assert result["diff"] == {"changed": 1, "unchanged": 0, "patched": 0, "deleted": 0}
+    assert [(item["id"], item["vector"]) for item in FakeCosmosDB.upserted] == [(stored["id"], [1.0])]
+
+def test_doc_ingest_falls_back_to_the_next_loader(monkeypatch):
+    import src.encode.encoder as encoder
+    import src.pipeline.ingest as ingest
+
+    class FailingLoader:
+        def lazy_load(self, file_content):
+            yield "partial page"
+            raise RuntimeError("unreadable")
+
+    class TextLoader:
+        def lazy_load(self, file_content):
+            yield file_content.decode()
+
+    FakeCosmosDB.upserted = []
+    FakeCosmosDB.deleted = []
+    FakeCosmosDB.content_hashes = {}
+    monkeypatch.setattr(ingest, "CosmosDB", FakeCosmosDB)
+    monkeypatch.setattr(ingest, "get_loader_classes", lambda mime_type: [FailingLoader, TextLoader])
+    monkeypatch.setattr(encoder, "get_embed_fn", lambda: lambda texts: [[1.0] for _ in texts])
+
+    result = ingest.doc_ingest(
+        document_id="doc",
+        tenant_id="tenant",
+        label="label",
+        file_content=b"page one",
+        mime_type="text/plain",
+    )
+
+    assert result["pageCount"] == 1
+    assert result["encodedCount"] == 1
+    assert FakeCosmosDB.upserted[-1]["text"] == "page one"
+
+def test_doc_ingest_raises_when_every_loader_fails(monkeypatch):
+    import src.pipeline.ingest as ingest
+
+    class FailingLoader:
+        def lazy_load(self, file_content):
+            raise RuntimeError("unreadable")
+            yield
+
+    monkeypatch.setattr(ingest, "CosmosDB", FakeCosmosDB)
+    monkeypatch.setattr(ingest, "get_loader_classes", lambda mime_type: [FailingLoader])
+    with pytest.raises(ValueError):
+        ingest.doc_ingest(
+            document_id="doc",
+            tenant_id="tenant",
+            label="label",
+            file_content=b"page one",
+            mime_type="text/plain",
+        )
@@ -0,0 +1,113 @@
+import pytest
+
+def test_importable():
+    from src.pipeline.orchestration import (
+        doc_processing_orchestrator, # noqa: F401
+        ACTIVITIES, # noqa: F401
+    )
+    from src.pipeline.local_runtime import (
+        run_orchestration, # noqa: F401
+    )
+
+def test_run_orchestration_fan_out_fan_in():
+    from src.pipeline.local_runtime import run_orchestration
+
+    def orchestrator(context):
+        n = yield context.call_activity("count", context.get_input())
+        squares = yield context.task_all([context.call_activity("square", i) for i in range(n)])
+        return sum(squares)
+
+    result = run_orchestration(
+        orchestrator=orchestrator,
+        activities={"count": lambda x: x["n"], "square": lambda i: i * i},
+        input_={"n": 4},
+    )
+
+    assert result == 0 + 1 + 4 + 9
+
+def test_run_orchestration_raises_activity_errors_in_orchestrator():
+    from src.pipeline.local_runtime import run_orchestration
+
+    def failing(_):
+        raise RuntimeError("boom")
+
+    def orchestrator(context):
+        try:
+            yield context.call_activity("failing")
+        except RuntimeError:
+            return "recovered"
+
+    assert run_orchestration(orchestrator, {"failing": failing}) == "recovered"
+
+@pytest.mark.parametrize("page_count, chunks_per_range, expected_calls", [
+    (1, 3, {"plan_document": 1, "ocr_pages": 1, "split_pages": 1, "encode_chunks": 1, "delete_stale_chunks": 1}),
+    (25, 3, {"plan_document": 1, "ocr_pages": 3, "split_pages": 3, "encode_chunks": 2, "delete_stale_chunks": 1}),
+    (3, 0, {"plan_document": 1, "ocr_pages": 1, "split_pages": 1, "delete_stale_chunks": 1}),
+])
+def test_doc_processing_orchestrator(monkeypatch, page_count, chunks_per_range, expected_calls):
+    import src.pipeline.orchestration as orchestration
+    from src.pipeline.local_runtime import run_orchestration
+    monkeypatch.setattr(orchestration, "PAGES_PER_ACTIVITY", 10)
+    monkeypatch.setattr(orchestration, "CHUNKS_PER_ACTIVITY", 5)
+    calls = {}
+
+    def activity(name, fn):
+        def run(payload):
+            calls[name] = calls.get(name, 0) + 1
+            return fn(payload)
+        return run
+
+    activities = {
+        "plan_document": activity("plan_document", lambda p: {"pageCount": page_count}),
+        "ocr_pages": activity("ocr_pages", lambda p: {
+            "start": p["start"], "end": p["end"], "pages": "blob", "pageCount": p["end"] - p["start"],
+        }),
+        "split_pages": activity("split_pages", lambda p: {
+            "chunkIds": [f"{p['start']}_{i}" for i in range(chunks_per_range)],
+            "keptIds": [f"{p['start']}_{i}" for i in range(chunks_per_range)],
+            "unchangedCount": 0,
+            "patchedCount": 0,
+        }),
+        "encode_chunks": activity("encode_chunks", lambda p: {"encodedCount": len(p["chunkIds"])}),
+        "delete_stale_chunks": activity("delete_stale_chunks", lambda p: {"deletedCount": 0}),
+    }
+
+    result = run_orchestration(
+        orchestrator=orchestration.doc_processing_orchestrator,
+        activities=activities,
+        input_={"tenantId": "t", "documentId": "d", "mimeType": "application/pdf", "source": "s"},
+    )
+
+    assert calls == expected_calls
+    assert result["pageCount"] == page_count
+    assert result["chunkCount"] == result["encodedCount"] == len(range(0, page_count, 10)) * chunks_per_range
+
+def test_doc_processing_orchestrator_encodes_changed_chunks_only():
+    import src.pipeline.orchestration as orchestration
+    from src.pipeline.local_runtime import run_orchestration
+    deleted = {}
+
+    def delete_stale_chunks(payload):
+        deleted["keptIds"] = payload["keptIds"]
+        return {"deletedCount": 2}
+
+    activities = {
+        "plan_document": lambda p: {"pageCount": 1},
+        "ocr_pages": lambda p: {"start": p["start"], "end": p["end"], "pages": "blob", "pageCount": 1},
+        "split_pages": lambda p: {
+            "chunkIds": ["c"], "keptIds": ["a", "b", "c"], "unchangedCount": 2, "patchedCount": 1,
+        },
+        "encode_chunks": lambda p: {"encodedCount": len(p["chunkIds"])},
+        "delete_stale_chunks": delete_stale_chunks,
+    }
+
+    result = run_orchestration(
+        orchestrator=orchestration.doc_processing_orchestrator,
+        activities=activities,
+        input_={"tenantId": "t", "documentId": "d", "mimeType": "application/pdf", "source": "s"},
+    )
+
+    assert deleted["keptIds"] == ["a", "b", "c"]
+    assert result["chunkCount"] == 3
+    assert result["encodedCount"] == 1
+    assert result["diff"] == {"changed": 1, "unchanged": 2, "patched": 1, "deleted": 2}
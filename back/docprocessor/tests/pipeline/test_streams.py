@@ -0,0 +1,83 @@
+import pytest
+
+def test_importable():
+    from src.pipeline.streams import (
+        batched, # noqa: F401
+        prefetch, # noqa: F401
+        tee, # noqa: F401
+    )
+
+@pytest.mark.parametrize("items, size, expected", [
+    ([], 2, []),
+    ([1, 2, 3], 2, [[1, 2], [3]]),
+    ([1, 2], 5, [[1, 2]]),
+])
+def test_batched(items, size, expected):
+    from src.pipeline.streams import batched
+    assert list(batched(items, size)) == expected
+
+@pytest.mark.parametrize("items, size, expected", [
+    ([], 2, []),
+    ([1, 2, 3], 2, [[1, 2], [3]]),
+])
+def test_abatched(items, size, expected):
+    import asyncio
+    from src.pipeline.streams import abatched
+
+    async def collect():
+        async def source():
+            for item in items:
+                yield item
+        return [window async for window in abatched(source(), size)]
+
+    assert asyncio.run(collect()) == expected
+
+def test_prefetch_preserves_order():
+    from src.pipeline.streams import prefetch
+    assert list(prefetch(iter(range(100)), maxsize=3)) == list(range(100))
+
+def test_prefetch_reraises():
+    from src.pipeline.streams import prefetch
+
+    def failing():
+        yield 1
+        raise RuntimeError("boom")
+
+    items = prefetch(failing())
+    assert next(items) == 1
+    with pytest.raises(RuntimeError):
+        next(items)
+
+def test_prefetch_stops_producer_on_close():
+    import threading
+    from src.pipeline.streams import prefetch
+    produced = []
+    done = threading.Event()
+
+    def endless():
+        try:
+            for i in range(10_000):
+                produced.append(i)
+                yield i
+        finally:
+            done.set()
+
+    items = prefetch(endless(), maxsize=1)
+    next(items)
+    items.close()
+    assert done.wait(timeout=5)
+    assert len(produced) < 10_000
+
+def test_tee():
+    from src.pipeline.streams import tee
+    copied = []
+    assert list(tee(iter([1, 2, 3]), sink=lambda items: copied.extend(items))) == [1, 2, 3]
+    assert copied == [1, 2, 3]
+
+def test_tee_ignores_sink_failure():
+    from src.pipeline.streams import tee
+
+    def sink(items):
+        raise RuntimeError("checkpoint failed")
+
+    assert list(tee(iter([1, 2]), sink=sink)) == [1, 2]
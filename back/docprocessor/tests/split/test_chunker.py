@@ -0,0 +1,51 @@
+import pytest
+
+def test_importable():
+    from src.split.chunker import (
+        RecursiveChunker, # noqa: F401
+    )
+
+TEXTS = [
+    "",
+    "   ",
+    "short text",
+    "Section 1\n\nfirst paragraph with some words.\n\n\n\nSection 2\nsecond line\nthird line",
+    "word " * 300,
+    "x" * 50 + "\n" + "y" * 7 + " z",
+    "Note: one\n\nTable 1 two three Figure 2 four Step 3 five " * 20,
+]
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [
+    (10, 0),
+    (20, 5),
+    (100, 25),
+])
+@pytest.mark.parametrize("separators", [
+    None,
+    ["\n\n", "Section", "Table", "Figure", "Note", "Step"],
+])
+def test_same_chunks_as_langchain(text, chunk_size, chunk_overlap, separators):
+    # langchain is a benchmark dependency only (requirements-bench.txt)
+    RecursiveCharacterTextSplitter = pytest.importorskip("langchain.text_splitter").RecursiveCharacterTextSplitter
+    from src.split.chunker import RecursiveChunker
+    kwargs = {"separators": separators} if separators else {}
+    expected = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, **kwargs,
+    ).split_text(text)
+
+    chunks = RecursiveChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap, **kwargs).split_text(text)
+
+    assert chunks == expected
+
+def test_split_offsets():
+    from src.split.chunker import RecursiveChunker
+    text = "aaa bbb ccc ddd"
+    offsets = RecursiveChunker(chunk_size=8, chunk_overlap=4).split_offsets(text)
+    assert offsets == [(0, 7), (4, 11), (8, 15)]
+    assert [text[start:end] for start, end in offsets] == ["aaa bbb", "bbb ccc", "ccc ddd"]
+
+def test_overlap_larger_than_chunk_size():
+    from src.split.chunker import RecursiveChunker
+    with pytest.raises(ValueError):
+        RecursiveChunker(chunk_size=10, chunk_overlap=20)
@@ -0,0 +1,64 @@
+import pytest
+
+def test_importable():
+    from src.split.diff import (
+        ChunkDiff, # noqa: F401
+        chunk_id, # noqa: F401
+        content_hash, # noqa: F401
+    )
+
+@pytest.mark.parametrize("occurrence, expected", [
+    (0, "doc_0123456789abcdef"),
+    (2, "doc_0123456789abcdef_2"),
+])
+def test_chunk_id(occurrence, expected):
+    from src.split.diff import chunk_id
+    assert chunk_id("doc", "0123456789abcdef0123", occurrence) == expected
+
+def test_content_hash_is_stable():
+    from src.split.diff import content_hash
+    assert content_hash("a") == content_hash("a")
+    assert content_hash("a") != content_hash("b")
+
+def test_chunk_diff():
+    from src.split.diff import ChunkDiff
+    diff = ChunkDiff({
+        "a": {"contentHash": "h1", "metadataHash": "m1"},
+        "b": {"contentHash": "h2", "metadataHash": "m2"},
+        "c": {"contentHash": "h3", "metadataHash": "m3"},
+    })
+    items = [
+        {"id": "a", "contentHash": "h1", "metadataHash": "m1"},
+        {"id": "b", "contentHash": "changed", "metadataHash": "m2"},
+        {"id": "d", "contentHash": "h4", "metadataHash": "m4"},
+    ]
+
+    changed = list(diff.filter_changed(items))
+
+    assert [item["id"] for item in changed] == ["b", "d"]
+    assert diff.vanished_ids() == ["c"]
+    assert diff.stats() == {"changed": 2, "unchanged": 1, "patched": 0, "deleted": 1}
+    assert diff.take_patches() == []
+
+def test_chunk_diff_patches_metadata_of_unchanged_chunks():
+    from src.split.diff import ChunkDiff, metadata_hash
+    old = {"id": "a", "tenantId": "t", "contentHash": "h1", "label": "v1", "pageStart": 1, "pageEnd": 1}
+    new = {**old, "label": "v2", "pageStart": 2, "pageEnd": 2}
+    new["metadataHash"] = metadata_hash(new)
+    diff = ChunkDiff({"a": {"contentHash": "h1", "metadataHash": metadata_hash(old)}})
+
+    assert not diff.is_changed(new)
+
+    patches = diff.take_patches()
+    assert [patch["id"] for patch in patches] == ["a"]
+    assert {op["path"]: op["value"] for op in patches[0]["operations"]} == {
+        "/label": "v2", "/section": None, "/pageStart": 2, "/pageEnd": 2, "/metadataHash": new["metadataHash"],
+    }
+    assert diff.take_patches() == []
+    assert diff.stats()["patched"] == 1
+
+def test_metadata_hash():
+    from src.split.diff import metadata_hash
+    item = {"id": "a", "text": "x", "label": "v1"}
+    assert metadata_hash(item) == metadata_hash({**item, "text": "y"})
+    assert metadata_hash(item) != metadata_hash({**item, "label": "v2"})
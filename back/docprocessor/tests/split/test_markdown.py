@@ -0,0 +1,82 @@
+import pytest
+
+PAGES = [
+    "# Report\n\nIntro text.\n\n## Scope\n\nScope text.",
+    "More scope.\n\n| a | b |\n|---|---|\n| 1 | 2 |\n\n## Results\n\n```\n# not a heading\n```",
+]
+
+
+def test_importable():
+    from src.split.markdown import MarkdownChunker # noqa: F401
+
+@pytest.mark.parametrize("page, expected", [
+    ("", []),
+    ("# Title\ntext\nmore", [("heading", "# Title"), ("paragraph", "text\nmore")]),
+    ("a\n\n| x |\n| y |\nb", [("paragraph", "a"), ("table", "| x |\n| y |"), ("paragraph", "b")]),
+    ("```py\n# c\n\nd\n```\ne", [("code", "```py\n# c\n\nd\n```"), ("paragraph", "e")]),
+    ("```\nopen", [("code", "```\nopen")]),
+])
+def test_iter_blocks(page, expected):
+    from src.split.markdown import iter_blocks
+    assert [(block.kind, block.text) for block in iter_blocks(page)] == expected
+
+def test_split_pages_sections_and_pages():
+    from src.split.markdown import MarkdownChunker
+    chunks = list(MarkdownChunker(chunk_size=800).split_pages(PAGES))
+    assert [(c.section, c.page_start, c.page_end) for c in chunks] == [
+        ("Report", 1, 1),
+        ("Report > Scope", 1, 2),
+        ("Report > Results", 2, 2),
+    ]
+    assert chunks[0].text == "# Report\n\nIntro text."
+    assert chunks[1].text == "## Scope\n\nScope text.\n\nMore scope.\n\n| a | b |\n|---|---|\n| 1 | 2 |"
+    assert chunks[2].text.startswith("## Results\n\n```")
+
+def test_split_pages_keeps_tables_whole():
+    from src.split.markdown import MarkdownChunker
+    table = "\n".join(f"| row {i} | value {i} |" for i in range(20))
+    chunks = MarkdownChunker(chunk_size=100).split_text("Before.\n\n" + table + "\n\nAfter.")
+    assert chunks == ["Before.", table, "After."]
+
+def test_split_pages_splits_long_paragraphs():
+    from src.split.markdown import MarkdownChunker
+    paragraph = " ".join(f"word{i}" for i in range(100))
+    chunks = MarkdownChunker(chunk_size=100).split_text("# H\n\n" + paragraph)
+    assert len(chunks) > 1
+    assert chunks[0].startswith("# H\n\n")
+    assert all(len(chunk) <= 100 + len("# H\n\n") for chunk in chunks)
+
+def test_split_pages_nested_headings():
+    from src.split.markdown import MarkdownChunker
+    text = "# A\n## B\n### C\ntext c\n## D\ntext d\n# E"
+    chunks = list(MarkdownChunker(chunk_size=800).split_pages([text], first_page=5))
+    assert [(c.text, c.section) for c in chunks] == [
+        ("# A\n\n## B\n\n### C\n\ntext c", "A > B > C"),
+        ("## D\n\ntext d", "A > D"),
+        ("# E", "E"),
+    ]
+    assert {(c.page_start, c.page_end) for c in chunks} == {(5, 5)}
+
+def test_asplit_pages_matches_split_pages():
+    import asyncio
+    from src.split.markdown import MarkdownChunker
+    chunker = MarkdownChunker(chunk_size=40)
+
+    async def collect():
+        async def source():
+            for page in PAGES:
+                yield page
+        return [chunk async for chunk in chunker.asplit_pages(source())]
+
+    assert asyncio.run(collect()) == list(chunker.split_pages(PAGES))
+
+def test_iter_chunk_items_markdown_strategy():
+    from src.split.spliter import iter_chunk_items
+    items = list(iter_chunk_items(
+        tenant_id="t", document_id="d", pages=PAGES, chunking_strategy="markdown", first_page=11,
+    ))
+    assert [(item.get("section"), item["pageStart"], item["pageEnd"]) for item in items] == [
+        ("Report", 11, 11),
+        ("Report > Scope", 11, 12),
+        ("Report > Results", 12, 12),
+    ]
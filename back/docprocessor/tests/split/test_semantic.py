@@ -0,0 +1,104 @@
+import pytest
+
+TOPICS = {"cat": [1.0, 0.0, 0.0], "car": [0.0, 1.0, 0.0], "sea": [0.0, 0.0, 1.0]}
+
+
+def embed(texts):
+    """Embed a sentence on the axis of the topic word it mentions."""
+    return [next(v for k, v in TOPICS.items() if k in text) for text in texts]
+
+
+def test_importable():
+    from src.split.semantic import SemanticChunker # noqa: F401
+
+@pytest.mark.parametrize("text, expected", [
+    ("", []),
+    ("One. Two!  Three?", ["One.", "Two!", "Three?"]),
+    ("Title\n\nFirst line.\nSecond line", ["Title", "First line.", "Second line"]),
+    ("v1.2 is out. Yes", ["v1.2 is out.", "Yes"]),
+])
+def test_sentence_spans(text, expected):
+    from src.split.semantic import sentence_spans
+    assert [text[start:end] for start, end in sentence_spans(text, max_size=100)] == expected
+
+def test_sentence_spans_split_long_sentences():
+    from src.split.semantic import sentence_spans
+    text = "a " * 50 + "end."
+    spans = sentence_spans(text, max_size=20)
+    assert len(spans) > 1
+    assert all(end - start <= 20 for start, end in spans)
+
+def test_adjacent_distances():
+    import numpy as np
+    from src.split.semantic import adjacent_distances
+    vectors = np.array([[1.0, 0.0], [2.0, 0.0], [0.0, 3.0], [0.0, 0.0]])
+    np.testing.assert_allclose(adjacent_distances(vectors), [0.0, 1.0, 1.0])
+
+def test_breakpoints():
+    import numpy as np
+    from src.split.semantic import breakpoints
+    assert breakpoints(np.array([]), 95).tolist() == []
+    assert breakpoints(np.array([0.1, 0.9, 0.1, 0.2]), 50).tolist() == [1, 3]
+
+def test_split_text_cuts_at_topic_shifts():
+    from src.split.semantic import SemanticChunker
+    text = "The cat sat. A cat purred. The car drove. My car stalled. The sea rose."
+    chunker = SemanticChunker(embed_fn=embed, chunk_size=800, breakpoint_percentile=50)
+    assert chunker.split_text(text) == ["The cat sat. A cat purred.", "The car drove. My car stalled.", "The sea rose."]
+
+def test_split_text_bounds_chunk_size():
+    from src.split.semantic import SemanticChunker
+    text = " ".join(f"The cat {i}." for i in range(50))
+    chunks = SemanticChunker(embed_fn=embed, chunk_size=40).split_text(text)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert " ".join(chunks) == text
+
+def test_split_text_seeds_normalized_mean():
+    import numpy as np
+    from src.split.semantic import SemanticChunker
+    chunker = SemanticChunker(embed_fn=lambda texts: [[1.0, 0.0], [0.0, 1.0]][:len(texts)], chunk_size=800, breakpoint_percentile=100)
+    assert chunker.split_text("x. y.") == ["x. y."]
+    np.testing.assert_allclose(chunker.vector_of("x. y."), [2 ** -0.5, 2 ** -0.5], rtol=1e-6)
+    assert chunker.vector_of("missing") is None
+
+def test_split_text_without_seeding():
+    from src.split.semantic import SemanticChunker
+    chunker = SemanticChunker(embed_fn=embed, chunk_size=800, seed_vectors=False)
+    assert chunker.split_text("The cat sat.") == ["The cat sat."]
+    assert chunker.vector_of("The cat sat.") is None
+
+def test_invalid_percentile():
+    from src.split.semantic import SemanticChunker
+    with pytest.raises(ValueError):
+        SemanticChunker(embed_fn=embed, chunk_size=800, breakpoint_percentile=101)
+
+def test_iter_chunk_items_semantic_strategy(monkeypatch):
+    import asyncio
+    from src.encode import encoder
+    from src.split.spliter import aiter_chunk_items, iter_chunk_items
+    monkeypatch.setattr(encoder, "get_embed_fn", lambda: embed)
+    pages = ["The cat sat. A cat purred.", "The car drove. The sea rose."]
+    items = list(iter_chunk_items(tenant_id="t", document_id="d", pages=pages, chunking_strategy="semantic"))
+    assert items
+    assert all(len(item["vector"]) == 3 for item in items)
+
+    async def collect():
+        async def source():
+            for page in pages:
+                yield page
+        return [item async for item in aiter_chunk_items(
+            tenant_id="t", document_id="d", pages=source(), chunking_strategy="semantic",
+        )]
+
+    assert asyncio.run(collect()) == items
+
+def test_iter_chunk_items_semantic_strategy_quantizes_seeded_vectors(monkeypatch):
+    from src.encode import encoder, quantize
+    from src.split.spliter import iter_chunk_items
+    monkeypatch.setattr(encoder, "get_embed_fn", lambda: embed)
+    monkeypatch.setattr(quantize, "VECTOR_ENCODING", "int8")
+    pages = ["The cat sat. A cat purred.", "The car drove. The sea rose."]
+    items = list(iter_chunk_items(tenant_id="t", document_id="d", pages=pages, chunking_strategy="semantic"))
+    assert items
+    assert all(item["vectorQ"]["encoding"] == "int8" for item in items)
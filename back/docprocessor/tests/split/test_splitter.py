@@ -22,3 +22,66 @@ class TestSplitter:
         assert "chunks" in result
         assert "chunking_strategy" in result
         assert len(result["chunks"]) == expected_chunk_count
+
+@pytest.mark.parametrize("pages, expected", [
+    ([], []),
+    (["a b"], ["a b"]),
+    (["a b c d", "e f"], ["a b", "c d\ne", "f"]),
+    (["a b", "", "c"], ["a b\n\nc"]),
+])
+def test_split_pages(pages, expected):
+    from src.split.spliter import split_pages
+
+    def split_text(text):
+        words = text.split(" ")
+        return [" ".join(words[i:i + 2]) for i in range(0, len(words), 2) if text]
+
+    assert list(split_pages(pages, split_text)) == expected
+
+@pytest.mark.parametrize("pages", [
+    [],
+    ["a b c d", "e f"],
+    ["a b", "", "c"],
+])
+def test_asplit_pages_matches_split_pages(pages):
+    import asyncio
+    from src.split.spliter import asplit_pages, split_pages
+
+    def split_text(text):
+        words = text.split(" ")
+        return [" ".join(words[i:i + 2]) for i in range(0, len(words), 2) if text]
+
+    async def collect():
+        async def source():
+            for page in pages:
+                yield page
+        return [chunk async for chunk in asplit_pages(source(), split_text)]
+
+    assert asyncio.run(collect()) == list(split_pages(pages, split_text))
+
+def test_split_pages_is_lazy():
+    from src.split.spliter import split_pages
+
+    def pages():
+        yield "a b c"
+        raise AssertionError("second page read too early")
+
+    chunks = split_pages(pages(), lambda text: text.split(" "))
+    assert next(chunks) == "a"
+
+@pytest.mark.parametrize("label, expected", [
+    (None, None),
+    ("q3-report", "q3-report"),
+])
+def test_iter_chunk_items_label(label, expected):
+    from src.split.spliter import iter_chunk_items
+    items = list(iter_chunk_items(tenant_id="t", document_id="d", pages=["a b"], label=label))
+    assert [item["id"] for item in items] == [f"d_{items[0]['contentHash'][:16]}"]
+    assert items[0].get("label") == expected
+
+def test_iter_chunk_items_token_strategy():
+    from src.split.spliter import TOKEN_CHUNK_SIZE, iter_chunk_items
+    pages = [" ".join(f"word{i}" for i in range(400)) for _ in range(3)]
+    items = list(iter_chunk_items(tenant_id="t", document_id="d", pages=pages, chunking_strategy="token"))
+    assert items
+    assert all(0 < item["tokenCount"] <= TOKEN_CHUNK_SIZE for item in items)
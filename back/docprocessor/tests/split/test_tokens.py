@@ -0,0 +1,54 @@
+import pytest
+
+def test_importable():
+    from src.split.tokens import (
+        ApproximateTokenizer, # noqa: F401
+        TokenStats, # noqa: F401
+        count_tokens, # noqa: F401
+        get_tokenizer, # noqa: F401
+    )
+
+@pytest.mark.parametrize("text, expected", [
+    ("", 0),
+    ("the cat sat.", 4),
+    ("tokenization", 2),
+    ("12345", 2),
+])
+def test_approximate_tokenizer(text, expected):
+    from src.split.tokens import ApproximateTokenizer, count_tokens
+    assert count_tokens(text, ApproximateTokenizer()) == expected
+
+def test_load_tokenizer_falls_back_to_approximate():
+    from src.split.tokens import load_tokenizer
+    assert load_tokenizer(path="missing/tokenizer.json", name=None).name == "approximate"
+
+def test_token_stats():
+    from src.split.tokens import TokenStats
+    stats = TokenStats()
+    for item in [{"tokenCount": 10}, {"tokenCount": 30}, {"text": "no count"}]:
+        stats.add(item)
+
+    result = stats.to_dict()
+
+    assert {k: result[k] for k in ["chunks", "total", "mean", "min", "max"]} == {
+        "chunks": 2, "total": 40, "mean": 20.0, "min": 10, "max": 30,
+    }
+    assert TokenStats().to_dict() is None
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [
+    (8, 0),
+    (16, 4),
+])
+def test_token_chunker_respects_token_budget(chunk_size, chunk_overlap):
+    from src.split.chunker import TokenChunker
+    from src.split.tokens import ApproximateTokenizer, count_tokens
+    tokenizer = ApproximateTokenizer()
+    text = "\n\n".join(" ".join(f"word{i} of paragraph {p}." for i in range(12)) for p in range(5))
+    chunker = TokenChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap, tokenizer=tokenizer)
+
+    chunks = chunker.split_text(text)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk, tokenizer) <= chunk_size for chunk in chunks)
+    # chunks are packed close to the budget
+    assert max(count_tokens(chunk, tokenizer) for chunk in chunks) >= chunk_size - 3
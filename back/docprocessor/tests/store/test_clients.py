@@ -0,0 +1,56 @@
+def test_importable():
+    from src.store.clients import (
+        get_blob_service_client, # noqa: F401
+        get_cosmos_client, # noqa: F401
+        get_mistral_client, # noqa: F401
+    )
+
+def test_get_or_create_once_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    from src.store import clients
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        created = list(executor.map(lambda _: clients.get_or_create(("test", 1), factory), range(32)))
+
+    assert len(calls) == 1
+    assert all(c is created[0] for c in created)
+    clients.drop(("test", 1))
+    assert clients.get_or_create(("test", 1), factory) is not created[0]
+    clients.drop(("test", 1))
+
+def test_get_mistral_client_is_shared():
+    from src.store import clients
+    assert clients.get_mistral_client("key") is clients.get_mistral_client("key")
+    assert clients.get_mistral_client("key") is not clients.get_mistral_client("other")
+
+class FakeAsyncClient:
+    """Async client stand-in recording its close."""
+
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+def test_get_or_create_for_loop_closes_on_shutdown():
+    import asyncio
+    import gc
+    from src.store import clients
+
+    async def main():
+        client = clients.get_or_create_for_loop(("test_aio",), FakeAsyncClient)
+        assert clients.get_or_create_for_loop(("test_aio",), FakeAsyncClient) is client
+        return client
+
+    first = asyncio.run(main())
+    second = asyncio.run(main())
+    gc.collect()
+
+    assert first is not second
+    assert first.closed and second.closed
+    assert len(clients._LOOP_CLIENTS) == 0
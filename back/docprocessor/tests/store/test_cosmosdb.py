@@ -0,0 +1,108 @@
+import pytest
+
+def test_importable():
+    from src.store.cosmosdb import (
+        CosmosDB, # noqa: F401
+    )
+
+@pytest.mark.parametrize("n_items, expected_batches", [
+    (1, 2),
+    (150, 3),
+])
+def test_bulk_upsert_groups_by_partition_key(n_items, expected_batches, make_container, make_store):
+    container = make_container()
+    cosmos_db = make_store(container)
+    items = [{"id": f"a_{i}", "tenantId": "a"} for i in range(n_items)]
+    items += [{"id": "b_0", "tenantId": "b"}]
+
+    outcomes = cosmos_db.bulk_upsert(items=items)
+
+    assert [o["id"] for o in outcomes] == [item["id"] for item in items]
+    assert all(o["error"] is None for o in outcomes)
+    assert len(container.batches) == expected_batches
+    for partition_key, ids in container.batches:
+        assert all(i.startswith(partition_key) for i in ids)
+
+def test_bulk_upsert_retries_throttled(monkeypatch, make_container, make_store):
+    import src.store.cosmosdb as cosmosdb
+    monkeypatch.setattr(cosmosdb, "BULK_BACKOFF_SECONDS", 0)
+    container = make_container(throttle=2)
+    cosmos_db = make_store(container)
+
+    outcomes = cosmos_db.bulk_upsert(items=[{"id": "a_0", "tenantId": "a"}])
+
+    assert outcomes == [{"id": "a_0", "statusCode": 200, "error": None}]
+
+def test_bulk_upsert_reports_failures(monkeypatch, make_container, make_store):
+    import src.store.cosmosdb as cosmosdb
+    monkeypatch.setattr(cosmosdb, "BULK_BACKOFF_SECONDS", 0)
+    container = make_container(throttle=10)
+    cosmos_db = make_store(container)
+
+    outcomes = cosmos_db.bulk_upsert(items=[{"id": "a_0", "tenantId": "a"}], max_retries=1)
+
+    assert outcomes[0]["statusCode"] == 429
+    assert outcomes[0]["error"]
+
+def test_bulk_upsert_creates_container(make_container, make_store):
+    container = make_container()
+    cosmos_db = make_store(None)
+    cosmos_db.create = lambda: setattr(cosmos_db, "container", container)
+
+    outcomes = cosmos_db.bulk_upsert(items=[{"id": "a_0", "tenantId": "a"}])
+
+    assert outcomes == [{"id": "a_0", "statusCode": 200, "error": None}]
+    assert container.batches == [("a", ["a_0"])]
+
+def test_bulk_delete(make_container, make_store):
+    container = make_container(items=[{"id": "a_0"}, {"id": "a_2"}])
+    cosmos_db = make_store(container)
+
+    outcomes = cosmos_db.bulk_delete(tenant_id="a", ids=["a_0", "a_1", "a_2"])
+
+    assert [o["id"] for o in outcomes] == ["a_0", "a_1", "a_2"]
+    assert [o["statusCode"] for o in outcomes] == [204, 404, 204]
+    assert all(o["error"] is None for o in outcomes)
+    assert container.deleted == [("a", "a_0"), ("a", "a_2")]
+    assert container.batches == []
+
+def test_bulk_upsert_requires_id(make_container, make_store):
+    cosmos_db = make_store(make_container())
+    with pytest.raises(ValueError):
+        cosmos_db.bulk_upsert(items=[{"tenantId": "a"}])
+
+def test_find_content_hashes_without_vector(make_container, make_store):
+    container = make_container(items=[
+        {"id": "a_0", "contentHash": "h0", "metadataHash": "m0", "hasVector": True},
+        {"id": "a_1", "contentHash": "h1", "hasVector": False},
+    ])
+    cosmos_db = make_store(container)
+    cosmos_db.create = lambda: None
+
+    hashes = cosmos_db.find_content_hashes(tenant_id="a", document_id="doc")
+
+    assert "IS_DEFINED(c.vector)" in container.query
+    assert hashes == {"a_0": {"contentHash": "h0", "metadataHash": "m0"}, "a_1": None}
+
+def test_bulk_patch(make_container, make_store):
+    container = make_container()
+    cosmos_db = make_store(container)
+    operations = [{"op": "set", "path": "/label", "value": "v2"}]
+
+    outcomes = cosmos_db.bulk_patch(patches=[{"id": "a_0", "tenantId": "a", "operations": operations}])
+
+    assert outcomes == [{"id": "a_0", "statusCode": 200, "error": None}]
+    assert container.batches == [("a", ["a_0"])]
+    assert container.operations == {"patch"}
+
+@pytest.mark.parametrize("operation", ["upsert", "patch", "delete"])
+def test_raise_for_outcomes_names_the_operation(operation):
+    from src.store.cosmosdb import raise_for_outcomes
+    outcomes = [
+        {"id": "a_0", "statusCode": 200, "error": None},
+        {"id": "a_1", "statusCode": 429, "error": "throttled"},
+    ]
+
+    raise_for_outcomes(outcomes[:1], operation)
+    with pytest.raises(ValueError, match=f"Failed to {operation} 1 of 2 items"):
+        raise_for_outcomes(outcomes, operation)
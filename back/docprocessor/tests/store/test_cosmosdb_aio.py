@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+
+def test_importable():
+    from src.store.cosmosdb_aio import (
+        AsyncCosmosDB, # noqa: F401
+    )
+
+@pytest.mark.parametrize("n_items, expected_batches", [
+    (1, 2),
+    (150, 3),
+])
+def test_bulk_upsert_groups_by_partition_key(n_items, expected_batches, make_async_container, make_async_store):
+    container = make_async_container()
+    cosmos_db = make_async_store(container)
+    items = [{"id": f"a_{i}", "tenantId": "a"} for i in range(n_items)]
+    items += [{"id": "b_0", "tenantId": "b"}]
+
+    outcomes = asyncio.run(cosmos_db.bulk_upsert(items=items))
+
+    assert [o["id"] for o in outcomes] == [item["id"] for item in items]
+    assert all(o["error"] is None for o in outcomes)
+    assert len(container.batches) == expected_batches
+
+def test_bulk_upsert_retries_throttled(monkeypatch, make_async_container, make_async_store):
+    import src.store.cosmosdb as cosmosdb
+    monkeypatch.setattr(cosmosdb, "BULK_BACKOFF_SECONDS", 0)
+    container = make_async_container(throttle=2)
+    cosmos_db = make_async_store(container)
+
+    outcomes = asyncio.run(cosmos_db.bulk_upsert(items=[{"id": "a_0", "tenantId": "a"}]))
+
+    assert outcomes == [{"id": "a_0", "statusCode": 200, "error": None}]
+
+def test_bulk_upsert_reports_failures(monkeypatch, make_async_container, make_async_store):
+    import src.store.cosmosdb as cosmosdb
+    monkeypatch.setattr(cosmosdb, "BULK_BACKOFF_SECONDS", 0)
+    cosmos_db = make_async_store(make_async_container(throttle=10))
+
+    outcomes = asyncio.run(cosmos_db.bulk_upsert(items=[{"id": "a_0", "tenantId": "a"}], max_retries=1))
+
+    assert outcomes[0]["statusCode"] == 429
+    assert outcomes[0]["error"]
+
+def test_bulk_delete_tolerates_missing_ids(make_async_container, make_async_store):
+    container = make_async_container(items=[{"id": "a_0"}, {"id": "a_2"}])
+    cosmos_db = make_async_store(container)
+
+    outcomes = asyncio.run(cosmos_db.bulk_delete(tenant_id="a", ids=["a_0", "a_1", "a_2"]))
+
+    assert [o["statusCode"] for o in outcomes] == [204, 404, 204]
+    assert all(o["error"] is None for o in outcomes)
+    assert container.deleted == [("a", "a_0"), ("a", "a_2")]
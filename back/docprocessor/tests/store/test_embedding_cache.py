@@ -0,0 +1,91 @@
+import pytest
+
+def test_importable():
+    from src.store.embedding_cache import (
+        EmbeddingCache, # noqa: F401
+        embed_with_cache, # noqa: F401
+    )
+
+@pytest.mark.parametrize("text_a, text_b, same_key", [
+    ("foo bar", "foo  bar\n", True),
+    ("foo bar", "foo baz", False),
+])
+def test_cache_key(text_a, text_b, same_key):
+    from src.store.embedding_cache import cache_key
+    assert (cache_key("m", text_a) == cache_key("m", text_b)) is same_key
+    assert cache_key("m1", text_a) != cache_key("m2", text_a)
+
+def test_lru_eviction():
+    from src.store.embedding_cache import EmbeddingCache
+    cache = EmbeddingCache(max_size=2, path=None)
+    cache.put_many("m", ["a", "b"], [[1.0], [2.0]])
+    cache.get_many("m", ["a"])
+    cache.put_many("m", ["c"], [[3.0]])
+
+    assert cache.get_many("m", ["a", "b", "c"]) == [[1.0], None, [3.0]]
+    assert cache.stats()["size"] == 2
+
+def test_memory_tier_is_packed():
+    from array import array
+    from src.store.embedding_cache import EmbeddingCache, cache_key
+    cache = EmbeddingCache(max_size=10, path=None)
+    vector = [0.5, 0.25, -1.0]
+    cache.put_many("m", ["a"], [vector])
+    vector.append(2.0)  # the cache keeps its own copy
+
+    packed = cache._memory[cache_key("m", "a")]
+    assert isinstance(packed, array) and packed.typecode == "f"
+    assert cache.get_many("m", ["a"]) == [[0.5, 0.25, -1.0]]
+
+def test_disk_tier(tmp_path):
+    from src.store.embedding_cache import EmbeddingCache
+    path = str(tmp_path / "embeddings.sqlite")
+    EmbeddingCache(max_size=10, path=path).put_many("m", ["a"], [[0.5, 0.25]])
+
+    cache = EmbeddingCache(max_size=10, path=path)
+
+    assert cache.get_many("m", ["a"]) == [[0.5, 0.25]]
+    assert cache.stats()["disk_hits"] == 1
+
+def test_embed_with_cache_embeds_misses_once():
+    from src.store.embedding_cache import EmbeddingCache, embed_with_cache
+    cache = EmbeddingCache(max_size=10, path=None)
+    calls = []
+
+    def embed_fn(texts):
+        calls.append(texts)
+        return [[float(len(t))] for t in texts]
+
+    assert embed_with_cache(cache, "m", ["a", "bb", "a"], embed_fn) == [[1.0], [2.0], [1.0]]
+    assert embed_with_cache(cache, "m", ["bb", "ccc"], embed_fn) == [[2.0], [3.0]]
+    assert calls == [["a", "bb"], ["ccc"]]
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+
+def test_aembed_with_cache_runs_the_cache_off_the_event_loop():
+    import asyncio
+    import threading
+    from src.store.embedding_cache import EmbeddingCache, aembed_with_cache
+    threads = []
+
+    class RecordingCache(EmbeddingCache):
+        def get_many(self, model, texts):
+            threads.append(threading.get_ident())
+            return super().get_many(model, texts)
+
+        def put_many(self, model, texts, vectors):
+            threads.append(threading.get_ident())
+            super().put_many(model, texts, vectors)
+
+    async def embed_fn(texts):
+        return [[float(len(t))] for t in texts]
+
+    async def run():
+        vectors = await aembed_with_cache(RecordingCache(max_size=10, path=None), "m", ["a", "bb"], embed_fn)
+        return vectors, threading.get_ident()
+
+    vectors, loop_thread = asyncio.run(run())
+    assert vectors == [[1.0], [2.0]]
+    assert len(threads) == 2
+    assert loop_thread not in threads
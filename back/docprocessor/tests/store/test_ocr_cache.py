@@ -0,0 +1,88 @@
+import io
+import pytest
+from pathlib import Path
+
+def test_importable():
+    from src.store.ocr_cache import (
+        OcrCache, # noqa: F401
+        ocr_with_cache, # noqa: F401
+        aocr_with_cache, # noqa: F401
+    )
+
+def fake_ocr(calls):
+    def ocr_fn(file_content):
+        from pypdf import PdfReader
+        pages = ["text" if p.extract_text().strip() else "blank" for p in PdfReader(io.BytesIO(file_content)).pages]
+        calls.append(pages)
+        return pages
+    return ocr_fn
+
+def test_disk_tier(tmp_path):
+    from src.store.ocr_cache import OcrCache
+    path = str(tmp_path / "ocr.sqlite")
+    OcrCache(max_size=10, path=path, blob_prefix=None).put_many(["k"], [["# page"]])
+
+    cache = OcrCache(max_size=10, path=path, blob_prefix=None)
+
+    assert cache.get_many(["k", "other"]) == [["# page"], None]
+    assert cache.stats()["disk_hits"] == 1
+
+def test_ocr_with_cache_returns_duplicate_files_from_cache():
+    from src.store.ocr_cache import OcrCache, ocr_with_cache
+    cache = OcrCache(max_size=10, path=None, blob_prefix=None)
+    calls = []
+    file_content = Path("tests/fixtures/dummy.pdf").read_bytes()
+
+    assert ocr_with_cache(cache, "m", file_content, fake_ocr(calls)) == ["text"]
+    assert ocr_with_cache(cache, "m", file_content, fake_ocr(calls)) == ["text"]
+    assert calls == [["text"]]
+
+def test_ocr_with_cache_processes_new_pages_only(make_pdf):
+    from src.store.ocr_cache import OcrCache, ocr_with_cache
+    cache = OcrCache(max_size=10, path=None, blob_prefix=None)
+    calls = []
+
+    first = ocr_with_cache(cache, "m", make_pdf(["text", "blank"]), fake_ocr(calls))
+    # a new file with one known page, and a page repeated within the file
+    second = ocr_with_cache(cache, "m", make_pdf(["blank", "text", "text"]), fake_ocr(calls))
+
+    assert first == ["text", "blank"]
+    assert second == ["blank", "text", "text"]
+    assert calls == [["text", "blank"]]
+
+@pytest.mark.parametrize("pages", [
+    ["text", "text", "blank"],
+])
+def test_aocr_with_cache_deduplicates_pages(pages, make_pdf):
+    import asyncio
+    from src.store.ocr_cache import OcrCache, aocr_with_cache
+    cache = OcrCache(max_size=10, path=None, blob_prefix=None)
+    calls = []
+    ocr_fn = fake_ocr(calls)
+
+    async def aocr_fn(file_content):
+        return ocr_fn(file_content)
+
+    assert asyncio.run(aocr_with_cache(cache, "m", make_pdf(pages), aocr_fn)) == pages
+    assert calls == [["text", "blank"]]
+
+def test_ocr_with_cache_survives_a_failing_blob_tier(monkeypatch):
+    import src.store.ocr_cache as ocr_cache
+    from src.store.ocr_cache import OcrCache, ocr_with_cache
+
+    def unavailable(*args):
+        raise OSError("storage unavailable")
+
+    monkeypatch.setattr(ocr_cache.blob, "load_bytes", unavailable)
+    monkeypatch.setattr(ocr_cache.blob, "save_bytes", unavailable)
+    cache = OcrCache(max_size=10, path=None, blob_prefix="ocr")
+    calls = []
+
+    def ocr_fn(file_content):
+        calls.append(file_content)
+        return ["# page"]
+
+    assert ocr_with_cache(cache, "m", b"image", ocr_fn) == ["# page"]
+    assert ocr_with_cache(cache, "m", b"image", ocr_fn) == ["# page"]
+    assert calls == [b"image"]
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,151 @@
+"""Benchmark the RU charge and latency of a chat vector query: cross-partition scan against the tenant's partition.
+
+By default the queries run against an in-process emulator stand-in: a container holding
+`--tenants` tenants spread over `--physical-partitions` physical partitions, which scans the
+partitions a query targets and charges request units with a simple cost model
+(RU_PER_PARTITION per physical partition touched plus RU_PER_1K_VECTORS per thousand vectors scanned).
+With `--emulator`, the queries run against the CosmosDB container configured in `.env.local`
+(e.g. the Azure Cosmos DB emulator, with the container and its vector policy created by the backend),
+seeded with random vectors, and report its actual charges.
+
+usage (from the `front` directory):
+    python -m benchmarks.bench_partitioned_query --tenants 20 --chunks 2000 --dim 256 --queries 50
+"""
+import argparse
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+
+from src.store.cosmosdb import CosmosDB
+
+RU_PER_PARTITION = 2.5
+RU_PER_1K_VECTORS = 10.0
+
+# the query `search_knowledge` ran before it was scoped to the tenant's partition
+CROSS_PARTITION_QUERY = (
+    "SELECT TOP @top_k c.id, c.text, VectorDistance(c.vector, @embedding) AS SimilarityScore"
+    " FROM c ORDER BY VectorDistance(c.vector, @embedding)"
+)
+
+
+class EmulatorStandIn:
+    """Container stand-in: evaluates vector queries from their parameters and charges modeled RUs."""
+
+    def __init__(self, items: list[dict], physical_partitions: int) -> None:
+        self.client_connection = SimpleNamespace(last_response_headers={})
+        self.physical_partitions = physical_partitions
+        self.partitions: dict[str, tuple[list[dict], np.ndarray]] = {}
+        for tenant_id in sorted({item["tenantId"] for item in items}):
+            tenant_items = [item for item in items if item["tenantId"] == tenant_id]
+            vectors = np.asarray([item["vector"] for item in tenant_items], dtype=np.float32)
+            self.partitions[tenant_id] = (tenant_items, vectors)
+
+    def query_items(
+        self,
+        query: str,
+        parameters: list[dict],
+        partition_key: Optional[str] = None,
+        enable_cross_partition_query: bool = False,
+        **kwargs,
+    ):
+        params = {p["name"]: p["value"] for p in parameters}
+        if partition_key is None and not enable_cross_partition_query:
+            raise ValueError("Cross partition query is required but disabled")
+        tenant_ids = [partition_key] if partition_key is not None else list(self.partitions)
+        touched = 1 if partition_key is not None else self.physical_partitions
+
+        query_vector = np.asarray(params["@embedding"], dtype=np.float32)
+        candidates, distances = [], []
+        for tenant_id in tenant_ids:
+            items, vectors = self.partitions.get(tenant_id, ([], np.zeros((0, len(query_vector)))))
+            if not items:
+                continue
+            mask = np.ones(len(items), dtype=bool)
+            if "@documentIds" in params:
+                mask &= np.isin([item["documentId"] for item in items], params["@documentIds"])
+            candidates.extend(item for item, keep in zip(items, mask) if keep)
+            distances.append(np.linalg.norm(vectors[mask] - query_vector, axis=1))
+        scanned = len(candidates)
+        self.client_connection.last_response_headers = {
+            "x-ms-request-charge": str(RU_PER_PARTITION * touched + RU_PER_1K_VECTORS * scanned / 1000),
+        }
+        if not scanned:
+            return iter([])
+        distances = np.concatenate(distances)
+        best = np.argsort(distances)[:params["@top_k"]]
+        return iter([{
+            "id": candidates[i]["id"],
+            "text": candidates[i]["text"],
+            "SimilarityScore": float(distances[i]),
+        } for i in best])
+
+
+def make_items(tenants: int, chunks: int, dim: int, documents: int, rng: np.random.Generator) -> list[dict]:
+    return [{
+        "id": f"t{t}_{i}",
+        "tenantId": f"t{t}",
+        "documentId": f"t{t}_doc{i % documents}",
+        "text": f"chunk {i} of tenant {t}",
+        "vector": rng.normal(size=dim).astype(np.float32).tolist(),
+    } for t in range(tenants) for i in range(chunks)]
+
+
+def measure(cosmos_db: CosmosDB, run_query, queries: np.ndarray) -> tuple[float, float]:
+    """Mean latency (ms) and RU charge per query."""
+    charges = []
+    start = time.perf_counter()
+    for query_vector in queries:
+        run_query(query_vector.tolist())
+        charges.append(cosmos_db.request_charge())
+    return (time.perf_counter() - start) / len(queries) * 1e3, float(np.mean(charges))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--chunks", type=int, default=2000, help="chunks per tenant")
+    parser.add_argument("--documents", type=int, default=20, help="documents per tenant")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--physical-partitions", type=int, default=4)
+    parser.add_argument("--emulator", action="store_true", help="query the container configured in .env.local")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    items = make_items(args.tenants, args.chunks, args.dim, args.documents, rng)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    if args.emulator:
+        cosmos_db = CosmosDB()
+        cosmos_db.create()
+        for item in items:
+            cosmos_db.upsert(item)
+    else:
+        cosmos_db = CosmosDB.__new__(CosmosDB)
+        cosmos_db.container = EmulatorStandIn(items, physical_partitions=args.physical_partitions)
+        cosmos_db.create = lambda **kwargs: cosmos_db.container
+
+    print(f"{args.tenants} tenants x {args.chunks} chunks, dim={args.dim}")
+    runs = {
+        "cross-partition": lambda v: list(cosmos_db.container.query_items(
+            query=CROSS_PARTITION_QUERY,
+            parameters=[{"name": "@top_k", "value": args.top_k}, {"name": "@embedding", "value": v}],
+            enable_cross_partition_query=True,
+        )),
+        "tenant partition": lambda v: cosmos_db.vector_search(
+            tenant_id="t0", query_vector=v, top_k=args.top_k,
+        ),
+        "tenant partition + documentId": lambda v: cosmos_db.vector_search(
+            tenant_id="t0", query_vector=v, top_k=args.top_k, document_ids=["t0_doc0"],
+        ),
+    }
+    for name, run_query in runs.items():
+        latency_ms, charge = measure(cosmos_db, run_query, queries)
+        print(f"{name:<32} {latency_ms:8.2f} ms/query {charge:8.2f} RU/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark compact vectors: payload size, index memory, query latency and recall with and without rescoring.
+
+Each chunk vector is serialized as in a CosmosDB document or a JSON response: the full-precision
+JSON list of floats, and the compact `vectorQ` of each encoding, as a JSON list or base64-packed.
+The quantized flat indexes are searched for `top_k * oversampling` candidates, which are then
+re-ranked on the full-precision vectors; recall is measured against the exact float32 flat search.
+
+usage (from the `front` directory):
+    python -m benchmarks.bench_quantization --n 20000 --dim 1024 --queries 100
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.store.quantize import quantize
+from src.store.vector_index import FlatIndex, QuantizedFlatIndex, recall_at_k, rescore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--oversampling", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # clustered, unit-norm data, closer to real embeddings than uniform noise
+    centers = rng.normal(size=(64, args.dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), size=args.n)]
+    vectors += 0.3 * rng.normal(size=vectors.shape).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.integers(0, args.n, size=args.queries)]
+    queries += 0.05 * rng.normal(size=queries.shape).astype(np.float32) / np.sqrt(args.dim)
+    ids = [str(i) for i in range(args.n)]
+    texts = [""] * args.n
+    full = {i: v for i, v in zip(ids, vectors)}
+
+    sample = vectors[0].tolist()
+    full_bytes = len(json.dumps(sample))
+    print(f"payload per vector: float32 JSON list {full_bytes} B")
+    for encoding in ["float16", "int8"]:
+        for packed in [False, True]:
+            size = len(json.dumps(quantize(sample, encoding=encoding, packed=packed)))
+            layout = "base64" if packed else "JSON list"
+            print(f"payload per vector: {encoding:<7} {layout:<9} {size:6d} B ({full_bytes / size:4.1f}x smaller)")
+
+    flat = FlatIndex(ids=ids, texts=texts, vectors=vectors)
+    start = time.perf_counter()
+    exact, _ = flat.search_batch(queries, top_k=args.top_k)
+    elapsed = (time.perf_counter() - start) / args.queries * 1e3
+    print(f"float32 flat: {flat.vectors.nbytes / 1e6:7.1f} MB, {elapsed:.3f} ms/query (batch)")
+    start = time.perf_counter()
+    for query in queries:
+        flat.search(query, top_k=args.top_k)
+    elapsed = (time.perf_counter() - start) / args.queries * 1e3
+    print(f"float32 flat single query: {elapsed:.3f} ms/query")
+
+    for encoding in ["float16", "int8"]:
+        index = QuantizedFlatIndex(ids=ids, texts=texts, vectors=vectors, encoding=encoding)
+        start = time.perf_counter()
+        approx, _ = index.search_batch(queries, top_k=args.top_k)
+        elapsed = (time.perf_counter() - start) / args.queries * 1e3
+        recall = recall_at_k(exact, approx)
+        print(
+            f"{encoding:<7} flat: {index.vectors.nbytes / 1e6:7.1f} MB, {elapsed:.3f} ms/query (batch),"
+            f" recall@{args.top_k}={recall:.4f} without rescoring"
+        )
+        for oversampling in args.oversampling:
+            start = time.perf_counter()
+            rescored = []
+            for query in queries:
+                candidates = index.search(query, top_k=args.top_k * oversampling)
+                vectors_by_id = {c["id"]: full[c["id"]] for c in candidates}
+                results = rescore(query, candidates, vectors_by_id, top_k=args.top_k)
+                rescored.append([int(r["id"]) for r in results])
+            elapsed = (time.perf_counter() - start) / args.queries * 1e3
+            recall = recall_at_k(exact, np.asarray(rescored))
+            print(
+                f"{encoding:<7} single query rescored x{oversampling}: {elapsed:.3f} ms/query,"
+                f" recall@{args.top_k}={recall:.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark the in-process vector indexes: query latency and recall of IVF against the exact flat search.
+
+usage (from the `front` directory):
+    python -m benchmarks.bench_vector_index --n 50000 --dim 1024 --queries 100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.store.vector_index import FlatIndex, IVFIndex, recall_at_k
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # clustered data, closer to real embeddings than uniform noise
+    centers = rng.normal(size=(64, args.dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), size=args.n)]
+    vectors += 0.3 * rng.normal(size=vectors.shape).astype(np.float32)
+    queries = vectors[rng.integers(0, args.n, size=args.queries)]
+    queries += 0.1 * rng.normal(size=queries.shape).astype(np.float32)
+    ids = [str(i) for i in range(args.n)]
+    texts = [""] * args.n
+
+    start = time.perf_counter()
+    flat = FlatIndex(ids=ids, texts=texts, vectors=vectors)
+    print(f"flat build: {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    exact, _ = flat.search_batch(queries, top_k=args.top_k)
+    print(f"flat batch query: {(time.perf_counter() - start) / args.queries * 1e3:.3f} ms/query")
+    start = time.perf_counter()
+    for q in queries:
+        flat.search_batch([q], top_k=args.top_k)
+    print(f"flat single query: {(time.perf_counter() - start) / args.queries * 1e3:.3f} ms/query")
+
+    start = time.perf_counter()
+    ivf = IVFIndex(ids=ids, texts=texts, vectors=vectors)
+    print(f"ivf build (nlist={ivf.nlist}): {time.perf_counter() - start:.3f}s")
+    for nprobe in args.nprobe:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+        start = time.perf_counter()
+        approx, _ = ivf.search_batch(queries, top_k=args.top_k)
+        elapsed = (time.perf_counter() - start) / args.queries * 1e3
+        recall = recall_at_k(exact, approx)
+        print(f"ivf nprobe={ivf.nprobe}: {elapsed:.3f} ms/query, recall@{args.top_k}={recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
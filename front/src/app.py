@@ -31,6 +31,9 @@ def initialize_session_state() -> None:
         "COSMOSDB_CONTAINER_ID": "COSMOSDB_CONTAINER_ID",
         "MISTRAL_API_KEY": "MISTRAL_API_KEY",
         "MISTRAL_MODEL_NAME": "MISTRAL_MODEL_NAME",
+        "VECTOR_INDEX": "VECTOR_INDEX",
+        "SEARCH_MODE": "SEARCH_MODE",
+        "LEXICAL_INDEX": "LEXICAL_INDEX",
     }
     for var, env in env_vars.items():
         if var not in st.session_state:
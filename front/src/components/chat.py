@@ -1,14 +1,18 @@
 import time
 import logging
 from textwrap import dedent
+from typing import Optional
 
 import streamlit as st
 from openai import OpenAI
-from mistralai import Mistral
 from langchain.schema import AIMessage
 from langchain_openai.chat_models import ChatOpenAI
 
+from src.store.clients import get_mistral_client
 from src.store.cosmosdb import CosmosDB
+from src.store.embedding_cache import embed_with_cache, get_embedding_cache
+from src.store.retrieval import hybrid_search
+from src.store.vector_index import QUANTIZED_INDEX_TYPES, RESCORE_OVERSAMPLING, rescore
 
 
 logger = logging.getLogger(__name__)
@@ -48,52 +52,116 @@ def stream_response(messages) -> str:
         stream=True,
     )
 
+def embed_query(query_text: str, api_key: str, model: str) -> list[float]:
+    """Embed the query text, through the embedding cache."""
+    mistral_client = get_mistral_client(api_key=api_key)
+
+    def embed_batch(inputs: list[str]) -> list[list[float]]:
+        embeddings_batch_response = mistral_client.embeddings.create(
+            model=model,
+            inputs=inputs,
+        )
+        return [e.embedding for e in embeddings_batch_response.data]
+
+    embedding_cache = get_embedding_cache()
+    query_vector = embed_with_cache(
+        cache=embedding_cache,
+        model=model,
+        texts=[query_text],
+        embed_fn=embed_batch,
+    )[0]
+    logger.info(f"embedding cache: {embedding_cache.stats()}")
+    return query_vector
+
+def vector_search(
+        tenant_id: str,
+        query_vector: list[float],
+        top_k: int = 5,
+        vector_index: str = "cosmos",
+        document_ids: Optional[list[str]] = None,
+        labels: Optional[list[str]] = None,
+        sections: Optional[list[str]] = None,
+) -> list[dict]:
+    """Rank the chunks of a tenant by vector distance to the query."""
+    cosmosdb_client = CosmosDB()
+
+    # query the in-process vector index, if enabled: it covers the whole tenant, so filtered searches go to CosmosDB
+    if vector_index != "cosmos" and not (document_ids or labels or sections):
+        index = cosmosdb_client.vector_index(tenant_id=tenant_id, kind=vector_index)
+        if vector_index not in QUANTIZED_INDEX_TYPES:
+            return index.search(query_vector=query_vector, top_k=top_k)
+        # the quantized index ranks approximately: re-rank its top candidates on the full vectors
+        candidates = index.search(query_vector=query_vector, top_k=top_k * RESCORE_OVERSAMPLING)
+        vectors = cosmosdb_client.load_vectors_by_ids(tenant_id=tenant_id, ids=[c["id"] for c in candidates])
+        return rescore(query_vector=query_vector, candidates=candidates, vectors=vectors, top_k=top_k)
+
+    # query the tenant's partition of the knowledge base
+    return cosmosdb_client.vector_search(
+        tenant_id=tenant_id,
+        query_vector=query_vector,
+        top_k=top_k,
+        document_ids=document_ids,
+        labels=labels,
+        sections=sections,
+    )
+
 def search_knowledge(
         tenant_id: str,
         query_text: str,
         top_k: int = 5,
+        document_ids: Optional[list[str]] = None,
+        labels: Optional[list[str]] = None,
+        sections: Optional[list[str]] = None,
 ) -> str:
-    """Search knowledge."""
+    """Search the knowledge of a tenant, optionally restricted to documents, labels or sections."""
 
-    # encode the query text
-    mistral_client = Mistral(api_key=st.session_state["MISTRAL_API_KEY"])
-    embeddings_batch_response = mistral_client.embeddings.create(
-        model=st.session_state["MISTRAL_MODEL_NAME"],
-        inputs=[query_text],
-    )
-    query_vector = embeddings_batch_response.data[0].embedding
-
-    # build the query
-    # query=dedent("""
-    #     SELECT TOP @top_k
-    #       c.text, VectorDistance(c.vector,@embedding) AS SimilarityScore
-    #     FROM @container_id AS c
-    #     ORDER BY VectorDistance(c.vector,@embedding)
-    # """.strip())
-    query=dedent("""
-        SELECT TOP 5 
-        c1.text, VectorDistance(c1.vector,@embedding) AS SimilarityScore
-        FROM c1
-        ORDER BY VectorDistance(c1.vector,@embedding)
-    """.strip())
-    parameters=[
-        {"name": "@container_id", "value": st.session_state["COSMOSDB_CONTAINER_ID"]},
-        {"name": "@top_k", "value": top_k},
-        {"name": "@embedding", "value": query_vector},
-        {"name": "@tenant_id", "value": tenant_id},
-    ]
-    logger.info(f"query_template: {query}")
-    logger.info(f"query_parameters: {[str(p)[:100] for p in parameters]}")
-
-    # query the knowledge base
-    cosmosdb_client = CosmosDB()
-    cosmosdb_client.create()
-    query_results = cosmosdb_client.container.query_items(
-        query=query,
-        parameters=parameters,
-        enable_cross_partition_query=True,
-    )
-    return [str(qr) for qr in query_results]
+    # read the settings up front: the session state is not available in the retriever threads
+    api_key = st.session_state["MISTRAL_API_KEY"]
+    model = st.session_state["MISTRAL_MODEL_NAME"]
+    vector_index = st.session_state.get("VECTOR_INDEX") or "cosmos"
+    lexical_index = st.session_state.get("LEXICAL_INDEX") or "bm25"
+    search_mode = st.session_state.get("SEARCH_MODE") or "hybrid"
+
+    def vector_retriever(k: int) -> list[dict]:
+        query_vector = embed_query(query_text=query_text, api_key=api_key, model=model)
+        return vector_search(
+            tenant_id=tenant_id,
+            query_vector=query_vector,
+            top_k=k,
+            vector_index=vector_index,
+            document_ids=document_ids,
+            labels=labels,
+            sections=sections,
+        )
+
+    def lexical_retriever(k: int) -> list[dict]:
+        return CosmosDB().lexical_search(
+            tenant_id=tenant_id,
+            query_text=query_text,
+            top_k=k,
+            kind=lexical_index,
+            document_ids=document_ids,
+            labels=labels,
+            sections=sections,
+        )
+
+    if search_mode == "hybrid":
+        # the keyword query runs while the query text is embedded and searched
+        query_results = hybrid_search(retrievers=[lexical_retriever, vector_retriever], top_k=top_k)
+        return [str({
+            "text": qr["text"],
+            "RRFScore": qr["RRFScore"],
+        }) for qr in query_results]
+
+    query_results = vector_retriever(top_k)
+    return [str({
+        "text": qr["text"],
+        "SimilarityScore": qr["SimilarityScore"],
+    }) for qr in query_results]
+
+def parse_csv(value: str) -> list[str]:
+    """Split a comma separated input into its non-empty values."""
+    return [v.strip() for v in value.split(",") if v.strip()]
 
 def component() -> None:
     """Main component for the tab."""
@@ -102,6 +170,12 @@ def component() -> None:
     if "messages" not in st.session_state:
         st.session_state.messages = []
 
+    # Optional search filters, pushed into the knowledge query
+    with st.expander("Search filters"):
+        document_ids = parse_csv(st.text_input(label="documentIds (comma separated)", key="FILTER_DOCUMENT_IDS"))
+        labels = parse_csv(st.text_input(label="labels (comma separated)", key="FILTER_LABELS"))
+        sections = parse_csv(st.text_input(label="sections (comma separated, markdown chunking)", key="FILTER_SECTIONS"))
+
     # Display chat messages from history on app rerun
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
@@ -122,9 +196,13 @@ def component() -> None:
                 tenant_id = st.session_state["TENANT_ID"]
                 query_results = search_knowledge(
                     tenant_id=tenant_id,
-                    query_text=prompt
+                    query_text=prompt,
+                    document_ids=document_ids,
+                    labels=labels,
+                    sections=sections,
                 )
                 st.write("query results:", query_results)
+                st.write("embedding cache:", get_embedding_cache().stats())
                 prompt = RAG_PROMPT_TEMPLATE.format(
                     context=query_results,
                     question=prompt,
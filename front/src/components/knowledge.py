@@ -1,11 +1,15 @@
 import json
 import logging
+from typing import Optional
 
 import streamlit as st
 import requests
 
 from src.store.cosmosdb import CosmosDB
 
+STORE_PAGE_SIZES = [25, 50, 100, 200]
+STORE_PAGE_FIELDS = ["id", "documentId", "section", "pageStart", "textPreview", "hasVector"]
+
 
 def download_file(
         url: str
@@ -19,20 +23,106 @@ def download_file(
     else:
         raise ValueError(f"Failed to download file. Status code: {response.status_code}")
 
-def query_store(
+def query_documents(
         tenant_id: str
-) -> dict:
-    """Query the data store for a specific tenant ID."""
+) -> list[dict]:
+    """Query the documents of a tenant, with their chunk counts aggregated in the data store."""
+    cosmosdb_client = CosmosDB()
+    documents = cosmosdb_client.document_stats(tenant_id=tenant_id)
+    return sorted(documents, key=lambda d: d["documentId"])
+
+def query_store(
+        tenant_id: str,
+        document_id: str,
+        page_size: int,
+        continuation_token: Optional[str] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """Query one page of the chunks of a document, and the continuation token of the next page."""
     cosmosdb_client = CosmosDB()
-    cosmosdb_client.create()
-    items = cosmosdb_client.find(filter={"tenantId": tenant_id})
-    return [{
-        "id": item["id"],
-        "tenantId": item["tenantId"],
-        "documentId": item["documentId"],
-        "text": item["text"],
-        "has_vector": True if "vector" in item else False,
-    } for item in items]
+    # the chunks without their vectors and full texts, the store only tells whether they have a vector
+    return cosmosdb_client.find_page(
+        filter={"tenantId": tenant_id, "documentId": document_id},
+        fields=STORE_PAGE_FIELDS,
+        page_size=page_size,
+        continuation_token=continuation_token,
+    )
+
+def reset_store_pages() -> None:
+    """Go back to the first page of chunks, e.g. when the document or the page size changes."""
+    st.session_state["STORE_PAGE_TOKENS"] = [None]
+    st.session_state.pop("STORE_PAGE", None)
+
+def store_browser() -> None:
+    """Browse the knowledge store one document and one page of chunks at a time."""
+    st.header('View knowledge store')
+    tenant_id = st.session_state["TENANT_ID"]
+
+    if st.button('Refresh'):
+        try:
+            with st.spinner("Processing..."):
+                st.session_state["STORE_DOCUMENTS"] = query_documents(tenant_id=tenant_id)
+            reset_store_pages()
+        except Exception as ex:
+            st.toast(
+                body="An error occurred while processing the request.",
+                icon="⚠️",
+            )
+            logging.exception(msg=ex)
+            st.exception(ex)
+    documents = st.session_state.get("STORE_DOCUMENTS")
+    if not documents:
+        if documents is not None:
+            st.info("No document in the knowledge store.")
+        return
+
+    st.dataframe(documents, hide_index=True, use_container_width=True)
+    col_document, col_page_size = st.columns([3, 1])
+    document_id = col_document.selectbox(
+        label="document",
+        options=[d["documentId"] for d in documents],
+        key="STORE_DOCUMENT_ID",
+        on_change=reset_store_pages,
+    )
+    page_size = col_page_size.selectbox(
+        label="chunks per page",
+        options=STORE_PAGE_SIZES,
+        key="STORE_PAGE_SIZE",
+        on_change=reset_store_pages,
+    )
+
+    # continuation token of each page visited so far, None for the first page
+    tokens = st.session_state.setdefault("STORE_PAGE_TOKENS", [None])
+    page_key = (tenant_id, document_id, page_size, tokens[-1])
+    page = st.session_state.get("STORE_PAGE")
+    if page is None or page["key"] != page_key:
+        try:
+            items, next_token = query_store(
+                tenant_id=tenant_id,
+                document_id=document_id,
+                page_size=page_size,
+                continuation_token=tokens[-1],
+            )
+        except Exception as ex:
+            logging.exception(msg=ex)
+            st.exception(ex)
+            return
+        page = {"key": page_key, "items": items, "next_token": next_token}
+        st.session_state["STORE_PAGE"] = page
+
+    st.dataframe(page["items"], hide_index=True, use_container_width=True)
+    col_previous, col_page, col_next = st.columns([1, 2, 1])
+    col_previous.button(
+        "Previous page",
+        disabled=len(tokens) <= 1,
+        on_click=tokens.pop,
+    )
+    col_page.caption(f"page {len(tokens)}, {len(page['items'])} chunks")
+    col_next.button(
+        "Next page",
+        disabled=page["next_token"] is None,
+        on_click=tokens.append,
+        args=(page["next_token"],),
+    )
 
 def load_request(
         url: str,
@@ -93,34 +183,7 @@ def encode_request(
 def component() -> None:
     """Main component for the tab."""
     
-    with st.form(key='store') as f_input:
-        
-        st.header('View knowledge store')
-
-        button = st.form_submit_button('Refresh')
-
-        if button:
-            try:
-                st.toast('Start store query', icon="⏳")
-                with st.spinner("Processing..."):
-                    tenant_id = st.session_state["TENANT_ID"]
-                    response = query_store(
-                        tenant_id=tenant_id,
-                    )
-                if response:
-                    st.toast('Processing done', icon="✅")
-                    st.success("Processing completed successfully.")
-                    with st.expander("See chunks", expanded=True):
-                        st.table(response)
-            except Exception as ex:
-                st.toast(
-                    body="An error occurred while processing the request.",
-                    icon="⚠️",
-                )
-                logging.exception(msg=ex)
-                st.exception(ex)
-
-
+    store_browser()
 
     with st.form(key='load') as f_input:
 
@@ -159,7 +222,7 @@ def component() -> None:
                         file_content = download_file(text_input)
                         response = load_request(
                             url=f"{api_base}/{route}",
-                            mime_type="application/octet-stream",
+                            mime_type=mime_type,
                             data=file_content
                         )
                     else:
@@ -202,6 +265,7 @@ def component() -> None:
                         url=f"{api_base}/{route}",
                         documentId=text_input
                     )
+                    CosmosDB.drop_indexes(tenant_id=tenant_id)
                 if response:
                     st.toast('Processing done', icon="✅")
                     st.success("Processing completed successfully.")
@@ -236,6 +300,7 @@ def component() -> None:
                         url=f"{api_base}/{route}",
                         documentId=text_input
                     )
+                    CosmosDB.drop_indexes(tenant_id=tenant_id)
                 if response:
                     st.toast('Processing done', icon="✅")
                     st.success("Processing completed successfully.")
@@ -0,0 +1,55 @@
+"""Process-wide registry of SDK clients.
+
+Each client is created once per worker process and shared by concurrent
+invocations, so HTTP connection pools, TLS sessions and resource proxies
+are reused instead of being rebuilt on every call.
+"""
+import logging
+import threading
+from typing import Any, Callable, Hashable
+
+from azure.cosmos.cosmos_client import CosmosClient
+from mistralai import Mistral
+
+_CLIENTS: dict[Hashable, Any] = {}
+_LOCK = threading.Lock()
+
+
+def get_or_create(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """Get the client registered under `key`, creating it with `factory` on first use."""
+    client = _CLIENTS.get(key)
+    if client is None:
+        with _LOCK:
+            client = _CLIENTS.get(key)
+            if client is None:
+                logging.info("Clients: create %s", key[0] if isinstance(key, tuple) else key)
+                client = factory()
+                _CLIENTS[key] = client
+    return client
+
+
+def drop(key: Hashable) -> None:
+    """Forget the client registered under `key`."""
+    with _LOCK:
+        _CLIENTS.pop(key, None)
+
+
+def clear() -> None:
+    """Forget all clients."""
+    with _LOCK:
+        _CLIENTS.clear()
+
+
+def get_cosmos_client(url: str, key: str) -> CosmosClient:
+    """Shared CosmosDB client."""
+    return get_or_create(("cosmos", url, key), lambda: CosmosClient(
+        url=url,
+        credential={"masterKey": key},
+        user_agent="CosmosDBPython",
+        user_agent_overwrite=True,
+    ))
+
+
+def get_mistral_client(api_key: str) -> Mistral:
+    """Shared Mistral client."""
+    return get_or_create(("mistral", api_key), lambda: Mistral(api_key=api_key))
@@ -1,6 +1,9 @@
 import os
 import logging
-from typing import TYPE_CHECKING, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Hashable, Iterator, Optional, Sequence
 
 import dotenv
 
@@ -10,6 +13,11 @@ from azure.cosmos.partition_key import PartitionKey
 from azure.cosmos.container import ContainerProxy
 from azure.cosmos.database import DatabaseProxy
 
+from src.store import clients
+from src.store.lexical_index import BM25Index, tokenize
+from src.store.quantize import dequantize
+from src.store.vector_index import QUANTIZED_INDEX_TYPES, FlatIndex, build_index
+
 import dotenv
 dotenv.load_dotenv('.env.local')
 
@@ -18,7 +26,150 @@ COSMOSDB_NOSQL_KEY = os.getenv("COSMOSDB_NOSQL_KEY")
 COSMOSDB_DATABASE_ID = os.getenv("COSMOSDB_DATABASE_ID")
 COSMOSDB_CONTAINER_ID = os.getenv("COSMOSDB_CONTAINER_ID")
 COSMOSDB_PARTITION_KEY = "/tenantId"
-ALLOWED_SELECT_FIELDS = ['id', 'tenantId', 'documentId', 'text', 'vector']
+ALLOWED_SELECT_FIELDS = [
+    'id', 'tenantId', 'documentId', 'label', 'text', 'section', 'pageStart', 'pageEnd', 'vector', 'vectorQ',
+]
+TEXT_PREVIEW_CHARS = 200
+# computed fields a projection can select, by alias
+COMPUTED_FIELDS = {
+    "hasVector": "IS_DEFINED(c.vector)",
+    "textPreview": f"LEFT(c.text, {TEXT_PREVIEW_CHARS})",
+}
+# fields selected by default: the vector is only shipped when asked for
+DEFAULT_FIND_FIELDS = [f for f in ALLOWED_SELECT_FIELDS if f not in ('vector', 'vectorQ')]
+FIND_PAGE_SIZE = 100
+FULL_TEXT_MAX_TERMS = 16
+
+LEXICAL_INDEX_KIND = "lexical"
+# seconds a cached index is served before its tenant is probed for writes, see `CosmosDB.index_version`
+INDEX_CHECK_SECONDS = float(os.getenv("INDEX_CHECK_SECONDS", "60"))
+# tenants whose indexes are kept in process, the least recently used ones are evicted
+INDEX_MAX_TENANTS = int(os.getenv("INDEX_MAX_TENANTS", "32"))
+
+
+class CachedIndex:
+    """An in-process index, with the version of the tenant it was built from."""
+
+    __slots__ = ("index", "version", "checked_at")
+
+    def __init__(self, index: object, version: Hashable, checked_at: float) -> None:
+        """Initialize."""
+        self.index = index
+        self.version = version
+        self.checked_at = checked_at
+
+
+# in-process vector and lexical indexes, keyed on (tenant_id, kind), least recently used first
+_INDEXES: OrderedDict[tuple[str, str], CachedIndex] = OrderedDict()
+# guards the index cache, build locks and generations, never held while loading from Cosmos
+_INDEXES_LOCK = threading.Lock()
+# one build lock per (tenant_id, kind), so a tenant loading does not block the others
+_INDEX_BUILD_LOCKS: dict[tuple[str, str], threading.Lock] = {}
+# bumped when the indexes of a tenant are dropped, so a build racing the drop is not cached
+_INDEX_GENERATIONS: dict[str, int] = {}
+
+def _use_index(key: tuple[str, str], entry: CachedIndex) -> object:
+    """Mark the tenant of an index as recently used, and return the index; the lock must be held."""
+    for other in [k for k in _INDEXES if k[0] == key[0]]:
+        _INDEXES.move_to_end(other)
+    return entry.index
+
+def _store_index(key: tuple[str, str], entry: CachedIndex) -> None:
+    """Cache an index, evicting the least recently used tenants; the lock must be held."""
+    _INDEXES[key] = entry
+    _use_index(key, entry)
+    while len({k[0] for k in _INDEXES}) > INDEX_MAX_TENANTS:
+        evicted = next(iter(_INDEXES))[0]
+        for other in [k for k in _INDEXES if k[0] == evicted]:
+            del _INDEXES[other]
+
+def cached_index(
+    tenant_id: str,
+    kind: str,
+    build: Callable[[], object],
+    version: Callable[[], Hashable],
+    refresh: bool = False,
+):
+    """Get an in-process index from the cache, or build it under the lock of its (tenant_id, kind).
+
+    A cached index is served for `INDEX_CHECK_SECONDS`, then `version` is probed: the index is rebuilt
+    when the tenant was written to since, e.g. by the ingestion API or another replica.
+    """
+    key = (tenant_id, kind)
+    with _INDEXES_LOCK:
+        entry = _INDEXES.get(key)
+        if entry is not None and not refresh and time.monotonic() - entry.checked_at < INDEX_CHECK_SECONDS:
+            return _use_index(key, entry)
+        build_lock = _INDEX_BUILD_LOCKS.setdefault(key, threading.Lock())
+    with build_lock:
+        current = version()
+        with _INDEXES_LOCK:
+            entry = _INDEXES.get(key)
+            if entry is not None and not refresh and entry.version == current:
+                entry.checked_at = time.monotonic()
+                return _use_index(key, entry)
+            generation = _INDEX_GENERATIONS.get(tenant_id, 0)
+        index = build()
+        with _INDEXES_LOCK:
+            if _INDEX_GENERATIONS.get(tenant_id, 0) == generation:
+                _store_index(key, CachedIndex(index, current, time.monotonic()))
+        return index
+
+def build_scope_filter(
+        tenant_id: str,
+        document_ids: Optional[list[str]] = None,
+        labels: Optional[list[str]] = None,
+        sections: Optional[list[str]] = None,
+) -> tuple[list[str], list[dict]]:
+    """Conditions and parameters restricting a query to a tenant, and optionally to documents, labels
+    or sections; a section matches the chunks under it, by prefix of their section path."""
+    conditions = ["c.tenantId = @tenantId"]
+    parameters = [{"name": "@tenantId", "value": tenant_id}]
+    if document_ids:
+        conditions.append("ARRAY_CONTAINS(@documentIds, c.documentId)")
+        parameters.append({"name": "@documentIds", "value": list(document_ids)})
+    if labels:
+        conditions.append("ARRAY_CONTAINS(@labels, c.label)")
+        parameters.append({"name": "@labels", "value": list(labels)})
+    if sections:
+        names = [f"@section{i}" for i in range(len(sections))]
+        conditions.append("(" + " OR ".join(f"STARTSWITH(c.section, {name})" for name in names) + ")")
+        parameters.extend({"name": name, "value": section} for name, section in zip(names, sections))
+    return conditions, parameters
+
+def build_projection(fields: Optional[Sequence[str]] = None) -> str:
+    """SELECT list of allowed and computed fields, the default fields when None."""
+    projection = []
+    for field in DEFAULT_FIND_FIELDS if fields is None else fields:
+        if field in COMPUTED_FIELDS:
+            projection.append(f"{COMPUTED_FIELDS[field]} AS {field}")
+        elif field in ALLOWED_SELECT_FIELDS:
+            projection.append("c." + field)
+        else:
+            raise ValueError(f"Unsupported field: {field}")
+    if not projection:
+        raise ValueError("At least one field is required in a projection.")
+    return ", ".join(projection)
+
+def build_find_query(
+        filter: Optional[dict],
+        fields: Optional[Sequence[str]] = None,
+) -> tuple[str, list[dict]]:
+    """Build the query and its parameters to find the items matching `filter`, projected on `fields`."""
+    query = "SELECT " + build_projection(fields) + " FROM c"
+    parameters = []
+    conditions = []
+    if filter:
+        for k, v in filter.items():
+            if k not in ALLOWED_SELECT_FIELDS:
+                raise ValueError(f"Unsupported filter field: {k}")
+            if v:
+                param_name = f"@{k}"
+                conditions.append(f"c.{k} = {param_name}")
+                parameters.append({"name": param_name, "value": v})
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+    return query, parameters
 
 class CosmosDB:
     """CosmosDB data store."""
@@ -44,12 +195,10 @@ class CosmosDB:
         logging.info("CosmosDB: %s", COSMOSDB_CONTAINER_ID)
         logging.info("CosmosDB: %s", COSMOSDB_PARTITION_KEY)
 
-        # Initialize the client
-        self.client = CosmosClient(
+        # Get the shared client
+        self.client = clients.get_cosmos_client(
             url=COSMOSDB_NOSQL_HOST,
-            credential={"masterKey": COSMOSDB_NOSQL_KEY},
-            user_agent="CosmosDBPython",
-            user_agent_overwrite=True,
+            key=COSMOSDB_NOSQL_KEY,
         )
         self.db = None
         self.container = None
@@ -62,41 +211,54 @@ class CosmosDB:
         drop_old_database: bool = False,
         drop_old_container: bool = False,
     ) -> ContainerProxy:
-        
-        self.client = CosmosClient(
-            url=COSMOSDB_NOSQL_HOST,
-            credential={"masterKey": COSMOSDB_NOSQL_KEY},
-            user_agent="CosmosDBPython",
-            user_agent_overwrite=True,
-        )
-        """Create a container."""
+        """Create a container, or get the proxy cached by a previous call in this process."""
         if self.client is None:
             msg = "CosmosDB client not found"
             raise ValueError(msg)
-        if self.db is None:
-            if drop_old_database:
-                self.client.delete_database(id=self.database_id)
-            try:
-                self.db = self.client.create_database(id=self.database_id)
-            except exceptions.CosmosResourceExistsError:
-                self.db = self.client.get_database_client(database=self.database_id)
         if self.container is None:
-            if drop_old_container:
-                self.db.delete_container(id=self.container_id)
-            try:
-                self.container = self.db.create_container(
-                    id=self.container_id,
-                    partition_key=PartitionKey(path=self.partition_key),
-                    indexing_policy=indexing_policy,
-                    vector_embedding_policy=vector_embedding_policy,
-                    offer_throughput=offer_throughput,
-                )
-            except exceptions.CosmosResourceExistsError:
-                self.container = self.db.get_container_client(
-                    container=self.container_id,
-                )
+            key = ("cosmos_container", COSMOSDB_NOSQL_HOST, self.database_id, self.container_id)
+            if drop_old_database or drop_old_container:
+                clients.drop(key)
+            self.db, self.container = clients.get_or_create(key, lambda: self._create_container(
+                indexing_policy=indexing_policy,
+                vector_embedding_policy=vector_embedding_policy,
+                offer_throughput=offer_throughput,
+                drop_old_database=drop_old_database,
+                drop_old_container=drop_old_container,
+            ))
         return self.container
 
+    def _create_container(
+        self,
+        indexing_policy: Optional[dict],
+        vector_embedding_policy: Optional[dict],
+        offer_throughput: Optional[int],
+        drop_old_database: bool,
+        drop_old_container: bool,
+    ) -> tuple[DatabaseProxy, ContainerProxy]:
+        """Create the database and the container, or get them if they exist."""
+        if drop_old_database:
+            self.client.delete_database(id=self.database_id)
+        try:
+            db = self.client.create_database(id=self.database_id)
+        except exceptions.CosmosResourceExistsError:
+            db = self.client.get_database_client(database=self.database_id)
+        if drop_old_container:
+            db.delete_container(id=self.container_id)
+        try:
+            container = db.create_container(
+                id=self.container_id,
+                partition_key=PartitionKey(path=self.partition_key),
+                indexing_policy=indexing_policy,
+                vector_embedding_policy=vector_embedding_policy,
+                offer_throughput=offer_throughput,
+            )
+        except exceptions.CosmosResourceExistsError:
+            container = db.get_container_client(
+                container=self.container_id,
+            )
+        return db, container
+
     def upsert(self, payload: dict) -> None:
         """Upsert an item."""
         
@@ -105,23 +267,259 @@ class CosmosDB:
             raise ValueError(msg)
         return self.container.upsert_item(body=payload)
     
-    def find(self, filter: Optional[dict]) -> list:
-        """Find items."""
+    def find(self, filter: Optional[dict], fields: Optional[Sequence[str]] = None) -> list:
+        """Find items, projected on `fields`: every field but the vector by default."""
+        return list(self.iter_find(filter=filter, fields=fields))
+
+    def _query_find(self, filter: Optional[dict], fields: Optional[Sequence[str]], page_size: int):
+        """Query the items matching `filter`, within the tenant's partition when the filter has one."""
         self.create()
-        validated_fields = ", ".join("c." + f for f in ALLOWED_SELECT_FIELDS)
-        query = "SELECT " + validated_fields + " FROM c"
-        parameters = []
-        conditions = []
-        if filter:
-            for k, v in filter.items():
-                if v:
-                    param_name = f"@{k}"
-                    conditions.append(f"c.{k} = {param_name}")
-                    parameters.append({"name": param_name, "value": v})
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-        return list(self.container.query_items(
+        query, parameters = build_find_query(filter, fields)
+        tenant_id = (filter or {}).get("tenantId")
+        scope = {"partition_key": tenant_id} if tenant_id else {"enable_cross_partition_query": True}
+        return self.container.query_items(
             query=query,
             parameters=parameters,
-            enable_cross_partition_query=True,
-        ))
\ No newline at end of file
+            max_item_count=page_size,
+            **scope,
+        )
+
+    def iter_find(
+        self,
+        filter: Optional[dict],
+        fields: Optional[Sequence[str]] = None,
+        page_size: int = FIND_PAGE_SIZE,
+    ) -> Iterator[dict]:
+        """Find items, lazily fetching result pages of up to `page_size` items."""
+        yield from self._query_find(filter=filter, fields=fields, page_size=page_size)
+
+    def find_page(
+        self,
+        filter: Optional[dict],
+        fields: Optional[Sequence[str]] = None,
+        page_size: int = FIND_PAGE_SIZE,
+        continuation_token: Optional[str] = None,
+    ) -> tuple[list, Optional[str]]:
+        """Find one page of items, and the continuation token of the next page, None after the last page."""
+        pages = self._query_find(filter=filter, fields=fields, page_size=page_size).by_page(continuation_token)
+        items = list(next(pages, []))
+        return items, pages.continuation_token
+
+    def document_stats(self, tenant_id: str) -> list:
+        """Chunk and encoded chunk counts of each document of a tenant, aggregated in CosmosDB."""
+        self.create()
+        return list(self.container.query_items(
+            query=(
+                "SELECT c.documentId, COUNT(1) AS chunkCount,"
+                " SUM(IS_DEFINED(c.vector) ? 1 : 0) AS encodedCount"
+                " FROM c WHERE c.tenantId = @tenantId GROUP BY c.documentId"
+            ),
+            parameters=[{"name": "@tenantId", "value": tenant_id}],
+            partition_key=tenant_id,
+        ))
+
+    def load_vectors(self, tenant_id: str, compact: bool = False) -> list:
+        """Load the id, text and vector of the encoded chunks of a tenant; when `compact`, the
+        vector is loaded from its compact `vectorQ` representation where the chunk has one."""
+        self.create()
+        vector = "(IS_DEFINED(c.vectorQ) ? null : c.vector) AS vector, c.vectorQ" if compact else "c.vector"
+        items = list(self.container.query_items(
+            query=(
+                f"SELECT c.id, c.text, {vector} FROM c"
+                " WHERE c.tenantId = @tenantId AND IS_DEFINED(c.vector)"
+            ),
+            parameters=[{"name": "@tenantId", "value": tenant_id}],
+            partition_key=tenant_id,
+        ))
+        for item in items:
+            if item.get("vectorQ"):
+                item["vector"] = dequantize(item.pop("vectorQ"))
+        return items
+
+    def load_vectors_by_ids(self, tenant_id: str, ids: list[str]) -> dict[str, list[float]]:
+        """Load the full-precision vectors of chunks of a tenant, by id."""
+        self.create()
+        return {
+            item["id"]: item.get("vector")
+            for item in self.container.query_items(
+                query="SELECT c.id, c.vector FROM c WHERE c.tenantId = @tenantId AND ARRAY_CONTAINS(@ids, c.id)",
+                parameters=[
+                    {"name": "@tenantId", "value": tenant_id},
+                    {"name": "@ids", "value": ids},
+                ],
+                partition_key=tenant_id,
+            )
+        }
+
+    def index_version(self, tenant_id: str) -> tuple:
+        """Chunk count and last write time of a tenant: a cheap aggregate telling whether its indexes are stale."""
+        self.create()
+        result = next(iter(self.container.query_items(
+            query="SELECT COUNT(1) AS chunkCount, MAX(c._ts) AS lastWrite FROM c WHERE c.tenantId = @tenantId",
+            parameters=[{"name": "@tenantId", "value": tenant_id}],
+            partition_key=tenant_id,
+        )), {})
+        return result.get("chunkCount"), result.get("lastWrite")
+
+    def vector_index(
+        self,
+        tenant_id: str,
+        kind: str = "flat",
+        refresh: bool = False,
+    ) -> FlatIndex:
+        """Get the in-process vector index of a tenant, building it on first use or when stale."""
+        def build() -> FlatIndex:
+            items = self.load_vectors(tenant_id=tenant_id, compact=kind in QUANTIZED_INDEX_TYPES)
+            return build_index(
+                kind=kind,
+                ids=[item["id"] for item in items],
+                texts=[item["text"] for item in items],
+                vectors=[item["vector"] for item in items],
+            )
+
+        return cached_index(
+            tenant_id, kind, build, lambda: self.index_version(tenant_id), refresh=refresh,
+        )
+
+    def load_texts(
+        self,
+        tenant_id: str,
+        document_ids: Optional[list[str]] = None,
+        labels: Optional[list[str]] = None,
+        sections: Optional[list[str]] = None,
+    ) -> list:
+        """Load the id and text of the chunks of a tenant."""
+        self.create()
+        conditions, parameters = build_scope_filter(
+            tenant_id, document_ids=document_ids, labels=labels, sections=sections,
+        )
+        return list(self.container.query_items(
+            query="SELECT c.id, c.text FROM c WHERE " + " AND ".join(conditions),
+            parameters=parameters,
+            partition_key=tenant_id,
+        ))
+
+    def request_charge(self) -> float:
+        """Request units charged for the last request of the container."""
+        headers = self.container.client_connection.last_response_headers or {}
+        return float(headers.get("x-ms-request-charge", 0.0))
+
+    def vector_search(
+        self,
+        tenant_id: str,
+        query_vector: list[float],
+        top_k: int = 5,
+        document_ids: Optional[list[str]] = None,
+        labels: Optional[list[str]] = None,
+        sections: Optional[list[str]] = None,
+    ) -> list:
+        """Rank the chunks of a tenant by `VectorDistance`, within the tenant's partition."""
+        self.create()
+        conditions, parameters = build_scope_filter(
+            tenant_id, document_ids=document_ids, labels=labels, sections=sections,
+        )
+        results = list(self.container.query_items(
+            query=(
+                "SELECT TOP @top_k c.id, c.text, VectorDistance(c.vector, @embedding) AS SimilarityScore"
+                " FROM c WHERE " + " AND ".join(conditions) +
+                " ORDER BY VectorDistance(c.vector, @embedding)"
+            ),
+            parameters=parameters + [
+                {"name": "@top_k", "value": top_k},
+                {"name": "@embedding", "value": query_vector},
+            ],
+            partition_key=tenant_id,
+        ))
+        logging.info("CosmosDB: vector search in %s, %.2f RU", tenant_id, self.request_charge())
+        return results
+
+    def lexical_index(
+        self,
+        tenant_id: str,
+        refresh: bool = False,
+    ) -> BM25Index:
+        """Get the in-process BM25 index of a tenant, building it on first use or when stale."""
+        def build() -> BM25Index:
+            items = self.load_texts(tenant_id=tenant_id)
+            return BM25Index(
+                ids=[item["id"] for item in items],
+                texts=[item["text"] for item in items],
+            )
+
+        return cached_index(
+            tenant_id, LEXICAL_INDEX_KIND, build, lambda: self.index_version(tenant_id), refresh=refresh,
+        )
+
+    def full_text_search(
+        self,
+        tenant_id: str,
+        query_text: str,
+        top_k: int = 5,
+        document_ids: Optional[list[str]] = None,
+        labels: Optional[list[str]] = None,
+        sections: Optional[list[str]] = None,
+    ) -> list:
+        """Rank the chunks of a tenant with `FullTextScore`, within the tenant's partition.
+
+        Requires a full-text policy and index on `/text` in the container.
+        """
+        terms = list(dict.fromkeys(tokenize(query_text)))[:FULL_TEXT_MAX_TERMS]
+        if not terms:
+            return []
+        self.create()
+        conditions, parameters = build_scope_filter(
+            tenant_id, document_ids=document_ids, labels=labels, sections=sections,
+        )
+        term_params = [f"@term{i}" for i in range(len(terms))]
+        return list(self.container.query_items(
+            query=(
+                f"SELECT TOP {int(top_k)} c.id, c.text FROM c"
+                " WHERE " + " AND ".join(conditions) +
+                f" ORDER BY RANK FullTextScore(c.text, {', '.join(term_params)})"
+            ),
+            parameters=parameters + [
+                {"name": name, "value": term} for name, term in zip(term_params, terms)
+            ],
+            partition_key=tenant_id,
+        ))
+
+    def lexical_search(
+        self,
+        tenant_id: str,
+        query_text: str,
+        top_k: int = 5,
+        kind: str = "bm25",
+        document_ids: Optional[list[str]] = None,
+        labels: Optional[list[str]] = None,
+        sections: Optional[list[str]] = None,
+    ) -> list:
+        """Rank the chunks of a tenant by keyword match, in CosmosDB or in the in-process BM25 index."""
+        if kind == "cosmos":
+            try:
+                return self.full_text_search(
+                    tenant_id=tenant_id,
+                    query_text=query_text,
+                    top_k=top_k,
+                    document_ids=document_ids,
+                    labels=labels,
+                    sections=sections,
+                )
+            except exceptions.CosmosHttpResponseError as e:
+                logging.warning("CosmosDB: full-text search unavailable, using the BM25 index: %s", e.message)
+        if document_ids or labels or sections:
+            # the cached index covers the whole tenant: index the filtered chunks only
+            items = self.load_texts(
+                tenant_id=tenant_id, document_ids=document_ids, labels=labels, sections=sections,
+            )
+            index = BM25Index(ids=[item["id"] for item in items], texts=[item["text"] for item in items])
+        else:
+            index = self.lexical_index(tenant_id=tenant_id)
+        return index.search(query_text=query_text, top_k=top_k)
+
+    @staticmethod
+    def drop_indexes(tenant_id: str) -> None:
+        """Drop the in-process vector and lexical indexes of a tenant, e.g. after new chunks are encoded."""
+        with _INDEXES_LOCK:
+            for key in [k for k in _INDEXES if k[0] == tenant_id]:
+                del _INDEXES[key]
+            _INDEX_GENERATIONS[tenant_id] = _INDEX_GENERATIONS.get(tenant_id, 0) + 1
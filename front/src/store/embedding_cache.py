@@ -0,0 +1,176 @@
+import os
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Sequence
+
+import dotenv
+dotenv.load_dotenv('.env.local')
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")  # SQLite file, disk tier disabled when unset
+
+
+def normalize_text(text: str) -> str:
+    """Normalize whitespace so that trivially different texts share an embedding."""
+    return " ".join(text.split())
+
+
+def cache_key(model: str, text: str) -> str:
+    """Cache key of a text embedded by a model."""
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Embedding cache with an in-memory LRU tier and an optional SQLite tier.
+
+    Both tiers hold packed float32 vectors, about 4 kB per 1024-dim vector instead of the
+    33 kB of a list of Python floats; vectors are converted to lists only when returned.
+    """
+
+    max_size: int
+    path: Optional[str]
+
+    def __init__(
+        self,
+        max_size: int = EMBEDDING_CACHE_SIZE,
+        path: Optional[str] = EMBEDDING_CACHE_PATH,
+    ) -> None:
+        """Initialize."""
+        self.max_size = max_size
+        self.path = path
+        self._memory: OrderedDict[str, array] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+            )
+            self._db.commit()
+        logging.info("EmbeddingCache: size=%d, path=%s", max_size, path)
+
+    def _remember(self, key: str, vector: array) -> None:
+        """Insert into the LRU tier, evicting the least recently used entries."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: Sequence[str]) -> list[Optional[list[float]]]:
+        """Get the cached embeddings of texts, None where missing."""
+        keys = [cache_key(model, t) for t in texts]
+        with self._lock:
+            vectors = []
+            for key in keys:
+                packed = self._memory.get(key)
+                if packed is not None:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                elif self._db is not None and (row := self._db.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()):
+                    packed = array("f", row[0])
+                    self._remember(key, packed)
+                    self._counters["disk_hits"] += 1
+                else:
+                    self._counters["misses"] += 1
+                vectors.append(packed.tolist() if packed is not None else None)
+            return vectors
+
+    def put_many(
+        self,
+        model: str,
+        texts: Sequence[str],
+        vectors: Sequence[list[float]],
+    ) -> None:
+        """Cache the embeddings of texts."""
+        keys = [cache_key(model, t) for t in texts]
+        packed = [array("f", vector) for vector in vectors]
+        with self._lock:
+            for key, vector in zip(keys, packed):
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in zip(keys, packed)],
+                )
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and size of the cache."""
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hits": hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "size": len(self._memory),
+            }
+
+
+_DEFAULT_CACHE: Optional[EmbeddingCache] = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache."""
+    global _DEFAULT_CACHE
+    with _DEFAULT_CACHE_LOCK:
+        if _DEFAULT_CACHE is None:
+            _DEFAULT_CACHE = EmbeddingCache()
+        return _DEFAULT_CACHE
+
+
+def _group_misses(model: str, texts: Sequence[str], vectors: list) -> dict[str, list[int]]:
+    """Indices of the texts without a vector, grouped by cache key."""
+    missing: dict[str, list[int]] = {}
+    for idx, (text, vector) in enumerate(zip(texts, vectors)):
+        if vector is None:
+            missing.setdefault(cache_key(model, text), []).append(idx)
+    return missing
+
+
+def embed_with_cache(
+        cache: EmbeddingCache,
+        model: str,
+        texts: Sequence[str],
+        embed_fn: Callable[[list[str]], list[list[float]]],
+) -> list[list[float]]:
+    """Embed texts, calling `embed_fn` only once per distinct cache miss."""
+    vectors = cache.get_many(model, texts)
+    missing = _group_misses(model, texts, vectors)
+    if missing:
+        miss_texts = [texts[idxs[0]] for idxs in missing.values()]
+        miss_vectors = embed_fn(miss_texts)
+        cache.put_many(model, miss_texts, miss_vectors)
+        for idxs, vector in zip(missing.values(), miss_vectors):
+            for idx in idxs:
+                vectors[idx] = vector
+    return vectors
+
+
+async def aembed_with_cache(
+        cache: EmbeddingCache,
+        model: str,
+        texts: Sequence[str],
+        embed_fn: Callable[[list[str]], Awaitable[list[list[float]]]],
+) -> list[list[float]]:
+    """Embed texts, awaiting `embed_fn` only once per distinct cache miss."""
+    # cache lookups and writes may hit SQLite, so they run off the event loop
+    vectors = await asyncio.to_thread(cache.get_many, model, texts)
+    missing = _group_misses(model, texts, vectors)
+    if missing:
+        miss_texts = [texts[idxs[0]] for idxs in missing.values()]
+        miss_vectors = await embed_fn(miss_texts)
+        await asyncio.to_thread(cache.put_many, model, miss_texts, miss_vectors)
+        for idxs, vector in zip(missing.values(), miss_vectors):
+            for idx in idxs:
+                vectors[idx] = vector
+    return vectors
@@ -0,0 +1,91 @@
+import re
+import logging
+from typing import Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens of a text."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """In-memory inverted index scored with Okapi BM25."""
+
+    ids: list[str]
+    texts: list[str]
+    k1: float
+    b: float
+    doc_lengths: np.ndarray
+    postings: dict[str, tuple[np.ndarray, np.ndarray]]
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+    ) -> None:
+        """Initialize and build the posting lists."""
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.k1 = k1
+        self.b = b
+
+        lengths = []
+        term_docs: dict[str, dict[int, int]] = {}
+        for doc, text in enumerate(self.texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for token in tokens:
+                counts = term_docs.setdefault(token, {})
+                counts[doc] = counts.get(doc, 0) + 1
+        self.doc_lengths = np.asarray(lengths, dtype=np.float32)
+        # posting list of a term: (doc indices, term frequencies)
+        self.postings = {
+            term: (
+                np.fromiter(counts.keys(), dtype=np.int64, count=len(counts)),
+                np.fromiter(counts.values(), dtype=np.float32, count=len(counts)),
+            )
+            for term, counts in term_docs.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, query_text: str) -> np.ndarray:
+        """BM25 score of every document for a query."""
+        n = len(self)
+        scores = np.zeros(n, dtype=np.float32)
+        if n == 0:
+            return scores
+        avg_length = max(float(self.doc_lengths.mean()), 1.0)
+        norms = self.k1 * (1.0 - self.b + self.b * self.doc_lengths / avg_length)
+        for term in set(tokenize(query_text)):
+            if term not in self.postings:
+                continue
+            docs, tfs = self.postings[term]
+            idf = np.log(1.0 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tfs * (self.k1 + 1.0) / (tfs + norms[docs])
+        return scores
+
+    def search(self, query_text: str, top_k: int = 5) -> list[dict]:
+        """Search the `top_k` best matching chunks, shaped like a FullTextScore query result."""
+        scores = self.scores(query_text)
+        matches = np.flatnonzero(scores > 0)
+        if matches.size > top_k:
+            matches = matches[np.argpartition(-scores[matches], top_k - 1)[:top_k]]
+        matches = matches[np.argsort(-scores[matches], kind="stable")]
+        return [{
+            "id": self.ids[i],
+            "text": self.texts[i],
+            "TextScore": float(scores[i]),
+        } for i in matches]
@@ -0,0 +1,56 @@
+import base64
+from typing import Sequence, Union
+
+import numpy as np
+
+# compact vectors written by the backend encoder, in the `vectorQ` field of the chunks
+VECTOR_ENCODINGS = ["float32", "float16", "int8"]
+INT8_MAX = 127
+
+
+def quantize_rows(
+        matrix: np.ndarray,
+        encoding: str = "int8",
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compact rows of a float32 matrix and their per-row scale (1.0 unless int8)."""
+    if encoding not in VECTOR_ENCODINGS:
+        raise ValueError(f"Unsupported vector encoding: {encoding}")
+    scales = np.ones(len(matrix), dtype=np.float32)
+    if encoding == "float16":
+        return matrix.astype("<f2"), scales
+    if encoding == "int8":
+        scales = np.abs(matrix).max(axis=1, initial=0.0) / INT8_MAX
+        return np.round(matrix / np.where(scales == 0, 1.0, scales)[:, None]).astype(np.int8), scales
+    return matrix.astype("<f4"), scales
+
+
+def quantize(
+        vector: Sequence[float],
+        encoding: str = "int8",
+        packed: bool = True,
+) -> dict:
+    """Compact representation of a vector: float16, or int8 with a per-vector scale."""
+    rows, scales = quantize_rows(np.asarray(vector, dtype=np.float32)[None, :], encoding=encoding)
+    values = rows[0]
+    quantized = {"encoding": encoding}
+    if encoding == "int8":
+        quantized["scale"] = float(scales[0])
+    quantized["data"] = base64.b64encode(values.tobytes()).decode("ascii") if packed else values.tolist()
+    return quantized
+
+
+def dequantize(quantized: dict) -> np.ndarray:
+    """Float32 vector of a compact representation."""
+    encoding = quantized.get("encoding")
+    if encoding not in VECTOR_ENCODINGS:
+        raise ValueError(f"Unsupported vector encoding: {encoding}")
+    dtype = {"float32": "<f4", "float16": "<f2", "int8": np.int8}[encoding]
+    data: Union[str, list] = quantized["data"]
+    if isinstance(data, str):
+        values = np.frombuffer(base64.b64decode(data), dtype=dtype)
+    else:
+        values = np.asarray(data, dtype=dtype)
+    values = values.astype(np.float32)
+    if encoding == "int8":
+        values *= quantized["scale"]
+    return values
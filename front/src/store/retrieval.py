@@ -0,0 +1,40 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Sequence
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+RRF_K = 60  # rank constant of reciprocal rank fusion
+CANDIDATES_PER_RETRIEVER = 20
+
+Retriever = Callable[[int], list[dict]]
+
+
+def reciprocal_rank_fusion(
+        rankings: Sequence[Sequence[dict]],
+        top_k: int = 5,
+        k: int = RRF_K,
+) -> list[dict]:
+    """Merge ranked result lists by summing 1 / (k + rank) per chunk id."""
+    fused: dict[str, dict] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            entry = fused.setdefault(result["id"], {"id": result["id"], "text": result["text"], "RRFScore": 0.0})
+            entry["RRFScore"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda r: r["RRFScore"], reverse=True)[:top_k]
+
+
+def hybrid_search(
+        retrievers: Sequence[Retriever],
+        top_k: int = 5,
+        candidates: int = CANDIDATES_PER_RETRIEVER,
+) -> list[dict]:
+    """Run the retrievers concurrently for `candidates` results each, then fuse their rankings.
+
+    A retriever is called with the number of results to return, e.g. a lexical and a vector search.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(retrievers))) as executor:
+        rankings = list(executor.map(lambda retrieve: retrieve(candidates), retrievers))
+    logger.info("Hybrid search: fused %s candidates", [len(r) for r in rankings])
+    return reciprocal_rank_fusion(rankings, top_k=top_k)
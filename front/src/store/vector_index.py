@@ -0,0 +1,281 @@
+import logging
+from functools import partial
+from typing import Optional, Sequence
+
+import numpy as np
+
+from src.store.quantize import quantize_rows
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 10
+KMEANS_SEED = 42
+QUANTIZED_BLOCK_ROWS = 1024  # rows converted to float32 at a time by the quantized index, cache-sized
+RESCORE_OVERSAMPLING = 4  # candidates of a quantized search per result, re-ranked on the full vectors
+
+
+def _as_matrix(vectors: Sequence[Sequence[float]], n_rows: int) -> np.ndarray:
+    """Convert a sequence of vectors to a contiguous float32 matrix."""
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    if matrix.size == 0:
+        return np.zeros((n_rows, 0), dtype=np.float32)
+    return matrix.reshape(n_rows, -1)
+
+
+def _squared_distances(
+        vectors: np.ndarray,
+        sq_norms: np.ndarray,
+        queries: np.ndarray,
+) -> np.ndarray:
+    """Squared euclidean distances between queries (rows) and vectors (columns)."""
+    q_sq_norms = np.einsum("ij,ij->i", queries, queries)
+    distances = q_sq_norms[:, None] - 2.0 * (queries @ vectors.T) + sq_norms[None, :]
+    return np.maximum(distances, 0.0, out=distances)
+
+
+def _top_k(distances: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the `top_k` smallest distances per row, sorted ascending."""
+    n = distances.shape[1]
+    k = min(top_k, n)
+    if k < n:
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(n), (distances.shape[0], 1))
+    order = np.take_along_axis(distances, candidates, axis=1).argsort(axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class FlatIndex:
+    """Exact in-memory euclidean index (brute force, single matrix op)."""
+
+    ids: list[str]
+    texts: list[str]
+    vectors: np.ndarray
+    sq_norms: np.ndarray
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        """Initialize."""
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.vectors = _as_matrix(vectors, len(self.ids))
+        self.sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 5,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return (indices, distances) of the `top_k` nearest vectors per query."""
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if len(self) == 0:
+            empty = np.zeros((queries.shape[0], 0))
+            return empty.astype(np.int64), empty
+        distances = _squared_distances(self.vectors, self.sq_norms, queries)
+        indices = _top_k(distances, top_k)
+        return indices, np.sqrt(np.take_along_axis(distances, indices, axis=1))
+
+    def search(self, query_vector: Sequence[float], top_k: int = 5) -> list[dict]:
+        """Search the `top_k` nearest chunks, shaped like a VectorDistance query result."""
+        indices, distances = self.search_batch([query_vector], top_k=top_k)
+        return [{
+            "id": self.ids[i],
+            "text": self.texts[i],
+            "SimilarityScore": float(d),
+        } for i, d in zip(indices[0], distances[0]) if i >= 0]
+
+
+class IVFIndex(FlatIndex):
+    """Approximate inverted-file index: k-means coarse quantizer plus exact search in the probed lists."""
+
+    nlist: int
+    nprobe: int
+    centroids: np.ndarray
+    centroid_sq_norms: np.ndarray
+    lists: list[np.ndarray]
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        nlist: Optional[int] = None,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> None:
+        """Initialize and train the coarse quantizer."""
+        super().__init__(ids=ids, texts=texts, vectors=vectors)
+        n = len(self)
+        self.nlist = max(1, min(nlist or int(np.sqrt(n)), n))
+        self.nprobe = max(1, min(nprobe, self.nlist))
+        self.centroids = np.zeros((0, self.vectors.shape[1]), dtype=np.float32)
+        self.centroid_sq_norms = np.zeros(0, dtype=np.float32)
+        self.lists = []
+        if n:
+            self._train()
+
+    def _train(self) -> None:
+        """Cluster the vectors with Lloyd's k-means and build the inverted lists."""
+        rng = np.random.default_rng(KMEANS_SEED)
+        centroids = self.vectors[rng.choice(len(self), size=self.nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            c_sq_norms = np.einsum("ij,ij->i", centroids, centroids)
+            assignment = _squared_distances(centroids, c_sq_norms, self.vectors).argmin(axis=1)
+            counts = np.bincount(assignment, minlength=self.nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, self.vectors)
+            non_empty = counts > 0
+            centroids[non_empty] = sums[non_empty] / counts[non_empty, None]
+        self.centroids = centroids
+        self.centroid_sq_norms = np.einsum("ij,ij->i", centroids, centroids)
+        assignment = _squared_distances(centroids, self.centroid_sq_norms, self.vectors).argmin(axis=1)
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(self.nlist + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(self.nlist)]
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 5,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return (indices, distances) of the approximate `top_k` nearest vectors per query."""
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if len(self) == 0:
+            empty = np.zeros((queries.shape[0], 0))
+            return empty.astype(np.int64), empty
+        probes = _top_k(
+            _squared_distances(self.centroids, self.centroid_sq_norms, queries),
+            self.nprobe,
+        )
+        k = min(top_k, len(self))
+        all_indices = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        all_distances = np.full((queries.shape[0], k), np.inf)
+        for row, (query, probe) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([self.lists[p] for p in probe])
+            distances = _squared_distances(
+                self.vectors[candidates], self.sq_norms[candidates], query[None, :],
+            )
+            best = _top_k(distances, k)[0]
+            all_indices[row, :len(best)] = candidates[best]
+            all_distances[row, :len(best)] = np.sqrt(distances[0, best])
+        return all_indices, all_distances
+
+
+class QuantizedFlatIndex(FlatIndex):
+    """Flat index holding its vectors as float16, or as int8 with a per-vector scale.
+
+    Takes 2x (float16) or 4x (int8) less memory than the float32 flat index. Distances are
+    computed on the dequantized vectors without materializing them, so they are approximate:
+    `rescore` re-ranks the top candidates on the full-precision vectors.
+    """
+
+    encoding: str
+    scales: np.ndarray
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        encoding: str = "int8",
+    ) -> None:
+        """Initialize."""
+        if encoding not in ("float16", "int8"):
+            raise ValueError(f"Unsupported vector encoding: {encoding}")
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.encoding = encoding
+        self.vectors, self.scales = quantize_rows(_as_matrix(vectors, len(self.ids)), encoding=encoding)
+        self.sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors, dtype=np.float32) * self.scales ** 2
+
+    def _dots(self, queries: np.ndarray) -> np.ndarray:
+        """Dot products between queries (rows) and the dequantized vectors (columns)."""
+        if len(queries) == 1:
+            # one pass over the compact matrix, accumulating in float32
+            dots = np.einsum("ij,j->i", self.vectors, queries[0], dtype=np.float32)[None, :]
+        else:
+            dots = np.concatenate([
+                queries @ self.vectors[start:start + QUANTIZED_BLOCK_ROWS].astype(np.float32).T
+                for start in range(0, len(self), QUANTIZED_BLOCK_ROWS)
+            ], axis=1)
+        return dots * self.scales[None, :]
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 5,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return (indices, distances) of the approximate `top_k` nearest vectors per query."""
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if len(self) == 0:
+            empty = np.zeros((queries.shape[0], 0))
+            return empty.astype(np.int64), empty
+        q_sq_norms = np.einsum("ij,ij->i", queries, queries)
+        distances = q_sq_norms[:, None] - 2.0 * self._dots(queries) + self.sq_norms[None, :]
+        np.maximum(distances, 0.0, out=distances)
+        indices = _top_k(distances, top_k)
+        return indices, np.sqrt(np.take_along_axis(distances, indices, axis=1))
+
+
+def rescore(
+        query_vector: Sequence[float],
+        candidates: list[dict],
+        vectors: dict[str, Sequence[float]],
+        top_k: int = 5,
+) -> list[dict]:
+    """Re-rank the candidates of an approximate search by their exact distance to the query,
+    from their full-precision `vectors` by id; candidates without a vector are dropped."""
+    candidates = [c for c in candidates if vectors.get(c["id"]) is not None]
+    if not candidates:
+        return []
+    matrix = _as_matrix([vectors[c["id"]] for c in candidates], len(candidates))
+    distances = np.linalg.norm(matrix - np.asarray(query_vector, dtype=np.float32), axis=1)
+    order = np.argsort(distances, kind="stable")[:top_k]
+    return [{**candidates[i], "SimilarityScore": float(distances[i])} for i in order]
+
+
+INDEX_TYPES = {
+    "flat": FlatIndex,
+    "ivf": IVFIndex,
+    "float16": partial(QuantizedFlatIndex, encoding="float16"),
+    "int8": partial(QuantizedFlatIndex, encoding="int8"),
+}
+# indexes searched approximately on compact vectors, then rescored on the full vectors
+QUANTIZED_INDEX_TYPES = {"float16", "int8"}
+
+
+def build_index(
+        kind: str,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        **kwargs,
+) -> FlatIndex:
+    """Build a vector index of the given kind."""
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unsupported vector index: {kind}")
+    index = INDEX_TYPES[kind](ids=ids, texts=texts, vectors=vectors, **kwargs)
+    logger.info("Built %s index with %d vectors", kind, len(index))
+    return index
+
+
+def recall_at_k(
+        exact_indices: np.ndarray,
+        approx_indices: np.ndarray,
+) -> float:
+    """Mean fraction of the exact top-k neighbours found by the approximate search."""
+    if exact_indices.size == 0:
+        return 1.0
+    hits = [
+        len(set(exact.tolist()) & set(approx.tolist())) / len(exact)
+        for exact, approx in zip(exact_indices, approx_indices)
+    ]
+    return float(np.mean(hits))
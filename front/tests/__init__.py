@@ -0,0 +1,2 @@
+import dotenv
+dotenv.load_dotenv('.env.local')
@@ -0,0 +1,121 @@
+import pytest
+
+def test_importable():
+    from src.store.cosmosdb import (
+        CosmosDB, # noqa: F401
+    )
+
+@pytest.fixture
+def indexes(monkeypatch):
+    from collections import OrderedDict
+    import src.store.cosmosdb as cosmosdb
+    monkeypatch.setattr(cosmosdb, "_INDEXES", OrderedDict())
+    monkeypatch.setattr(cosmosdb, "_INDEX_GENERATIONS", {})
+    return cosmosdb
+
+def test_cached_index_is_rebuilt_when_the_tenant_changed(indexes, monkeypatch):
+    monkeypatch.setattr(indexes, "INDEX_CHECK_SECONDS", 0)
+    version = {"t": (1, 100)}
+    builds = []
+
+    def get(tenant_id="t"):
+        return indexes.cached_index(
+            tenant_id, "flat",
+            build=lambda: builds.append(tenant_id) or len(builds),
+            version=lambda: version[tenant_id],
+        )
+
+    assert get() == get() == 1
+    version["t"] = (2, 200)
+    assert get() == 2
+    assert builds == ["t", "t"]
+
+def test_cached_index_is_not_probed_within_the_check_interval(indexes, monkeypatch):
+    monkeypatch.setattr(indexes, "INDEX_CHECK_SECONDS", 3600)
+    probes = []
+    get = lambda: indexes.cached_index("t", "flat", build=object, version=lambda: probes.append(1))
+    assert get() is get()
+    assert len(probes) == 1
+
+def test_cached_index_evicts_the_least_recently_used_tenants(indexes, monkeypatch):
+    monkeypatch.setattr(indexes, "INDEX_MAX_TENANTS", 2)
+    for tenant_id, kind in [("a", "flat"), ("a", "lexical"), ("b", "flat"), ("a", "flat"), ("c", "flat")]:
+        indexes.cached_index(tenant_id, kind, build=object, version=lambda: 0)
+    assert sorted(indexes._INDEXES) == [("a", "flat"), ("a", "lexical"), ("c", "flat")]
+
+def test_drop_indexes(indexes):
+    indexes.cached_index("a", "flat", build=object, version=lambda: 0)
+    indexes.cached_index("b", "flat", build=object, version=lambda: 0)
+    indexes.CosmosDB.drop_indexes(tenant_id="a")
+    assert list(indexes._INDEXES) == [("b", "flat")]
+
+@pytest.mark.parametrize("kwargs, expected_conditions, expected_parameters", [
+    ({}, ["c.tenantId = @tenantId"], [{"name": "@tenantId", "value": "t"}]),
+    (
+        {"document_ids": ["d1", "d2"], "labels": ["q3"]},
+        [
+            "c.tenantId = @tenantId",
+            "ARRAY_CONTAINS(@documentIds, c.documentId)",
+            "ARRAY_CONTAINS(@labels, c.label)",
+        ],
+        [
+            {"name": "@tenantId", "value": "t"},
+            {"name": "@documentIds", "value": ["d1", "d2"]},
+            {"name": "@labels", "value": ["q3"]},
+        ],
+    ),
+    (
+        {"sections": ["Intro", "Terms > Payment"]},
+        ["c.tenantId = @tenantId", "(STARTSWITH(c.section, @section0) OR STARTSWITH(c.section, @section1))"],
+        [
+            {"name": "@tenantId", "value": "t"},
+            {"name": "@section0", "value": "Intro"},
+            {"name": "@section1", "value": "Terms > Payment"},
+        ],
+    ),
+])
+def test_build_scope_filter(kwargs, expected_conditions, expected_parameters):
+    from src.store.cosmosdb import build_scope_filter
+    conditions, parameters = build_scope_filter("t", **kwargs)
+    assert conditions == expected_conditions
+    assert parameters == expected_parameters
+
+def test_build_scope_filter_keeps_values_out_of_the_sql():
+    from src.store.cosmosdb import build_scope_filter
+    injected = "x' OR 1=1 --"
+    conditions, parameters = build_scope_filter(injected, labels=[injected], sections=[injected])
+    assert all(injected not in condition for condition in conditions)
+    assert conditions[0] == "c.tenantId = @tenantId"
+    assert [p["value"] for p in parameters] == [injected, [injected], injected]
+
+@pytest.mark.parametrize("fields, expected", [
+    (["id", "text"], "c.id, c.text"),
+    (["id", "hasVector", "textPreview"], "c.id, IS_DEFINED(c.vector) AS hasVector, LEFT(c.text, 200) AS textPreview"),
+])
+def test_build_projection(fields, expected):
+    from src.store.cosmosdb import build_projection
+    assert build_projection(fields) == expected
+
+def test_build_projection_default_leaves_out_vectors():
+    from src.store.cosmosdb import build_projection
+    projection = build_projection()
+    assert "c.tenantId" in projection
+    assert "c.vector" not in projection
+
+@pytest.mark.parametrize("fields", [
+    [],
+    ["id", "c.text"],
+    ["secret"],
+])
+def test_build_projection_rejects_unsupported_fields(fields):
+    from src.store.cosmosdb import build_projection
+    with pytest.raises(ValueError):
+        build_projection(fields)
+
+def test_build_find_query():
+    from src.store.cosmosdb import build_find_query
+    query, parameters = build_find_query({"tenantId": "t", "documentId": None}, fields=["id"])
+    assert query == "SELECT c.id FROM c WHERE c.tenantId = @tenantId"
+    assert parameters == [{"name": "@tenantId", "value": "t"}]
+    with pytest.raises(ValueError):
+        build_find_query({"tenantId = 't' OR 1=1 --": "x"})
@@ -0,0 +1,41 @@
+import pytest
+
+def test_importable():
+    from src.store.lexical_index import (
+        BM25Index, # noqa: F401
+        tokenize, # noqa: F401
+    )
+
+def test_tokenize():
+    from src.store.lexical_index import tokenize
+    assert tokenize("Invoice #42, due: Q3-2024!") == ["invoice", "42", "due", "q3", "2024"]
+
+def make_index():
+    from src.store.lexical_index import BM25Index
+    texts = [
+        "the invoice is due in march",
+        "invoice invoice payment terms",
+        "shipping address and delivery",
+    ]
+    return BM25Index(ids=["a", "b", "c"], texts=texts)
+
+def test_search_ranks_by_term_frequency():
+    results = make_index().search("invoice", top_k=5)
+    assert [r["id"] for r in results] == ["b", "a"]
+    assert results[0]["TextScore"] > results[1]["TextScore"] > 0
+
+def test_search_rare_terms_weigh_more():
+    results = make_index().search("invoice delivery", top_k=5)
+    assert results[0]["id"] == "c"
+
+@pytest.mark.parametrize("query_text, top_k, expected", [
+    ("unknown words", 5, []),
+    ("invoice", 1, ["b"]),
+    ("", 5, []),
+])
+def test_search_matches_only(query_text, top_k, expected):
+    assert [r["id"] for r in make_index().search(query_text, top_k=top_k)] == expected
+
+def test_search_empty_index():
+    from src.store.lexical_index import BM25Index
+    assert BM25Index(ids=[], texts=[]).search("invoice") == []
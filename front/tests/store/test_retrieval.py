@@ -0,0 +1,41 @@
+import pytest
+
+def test_importable():
+    from src.store.retrieval import (
+        hybrid_search, # noqa: F401
+        reciprocal_rank_fusion, # noqa: F401
+    )
+
+def ranking(*ids):
+    return [{"id": i, "text": i.upper()} for i in ids]
+
+def test_reciprocal_rank_fusion():
+    from src.store.retrieval import reciprocal_rank_fusion
+    fused = reciprocal_rank_fusion([ranking("a", "b", "c"), ranking("b", "d", "a")], top_k=4, k=60)
+
+    # ranks 2 and 1 beat ranks 1 and 3, a chunk in one ranking only comes last
+    assert [r["id"] for r in fused] == ["b", "a", "d", "c"]
+    assert fused[0]["RRFScore"] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused[1]["RRFScore"] == pytest.approx(1 / 61 + 1 / 63)
+    assert fused[-1]["RRFScore"] == pytest.approx(1 / 63)
+    assert fused[0]["text"] == "B"
+
+def test_reciprocal_rank_fusion_top_k():
+    from src.store.retrieval import reciprocal_rank_fusion
+    assert [r["id"] for r in reciprocal_rank_fusion([ranking("a", "b", "c")], top_k=2)] == ["a", "b"]
+    assert reciprocal_rank_fusion([[], []]) == []
+
+def test_hybrid_search_asks_each_retriever_for_candidates():
+    from src.store.retrieval import hybrid_search
+    calls = []
+
+    def retriever(ids):
+        def retrieve(n):
+            calls.append(n)
+            return ranking(*ids)[:n]
+        return retrieve
+
+    results = hybrid_search([retriever("ab"), retriever("ba")], top_k=1, candidates=7)
+
+    assert calls == [7, 7]
+    assert len(results) == 1
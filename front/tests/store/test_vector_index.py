@@ -0,0 +1,100 @@
+import pytest
+import numpy as np
+
+def test_importable():
+    from src.store.vector_index import (
+        FlatIndex, # noqa: F401
+        IVFIndex, # noqa: F401
+        QuantizedFlatIndex, # noqa: F401
+        build_index, # noqa: F401
+        rescore, # noqa: F401
+    )
+
+def make_vectors(n: int = 500, dim: int = 16, clusters: int = 10) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(clusters, dim)) * 5
+    return (centers[rng.integers(clusters, size=n)] + rng.normal(size=(n, dim))).astype(np.float32)
+
+@pytest.mark.parametrize("kind", ["flat", "ivf", "float16", "int8"])
+def test_search_top_k_order(kind):
+    from src.store.vector_index import build_index
+    vectors = [[0.0, 0.0], [1.0, 0.0], [3.0, 0.0], [10.0, 0.0]]
+    index = build_index(kind=kind, ids=["a", "b", "c", "d"], texts=["A", "B", "C", "D"], vectors=vectors)
+
+    results = index.search([0.9, 0.0], top_k=3)
+
+    assert [r["id"] for r in results] == ["b", "a", "c"]
+    assert [r["text"] for r in results] == ["B", "A", "C"]
+    scores = [r["SimilarityScore"] for r in results]
+    assert scores == sorted(scores)
+    assert scores[0] == pytest.approx(0.1, abs=0.05)
+
+@pytest.mark.parametrize("kind", ["flat", "ivf", "int8"])
+def test_search_empty_index(kind):
+    from src.store.vector_index import build_index
+    index = build_index(kind=kind, ids=[], texts=[], vectors=[])
+    assert len(index) == 0
+    assert index.search([1.0, 2.0], top_k=3) == []
+
+def test_build_index_unsupported():
+    from src.store.vector_index import build_index
+    with pytest.raises(ValueError):
+        build_index(kind="hnsw", ids=[], texts=[], vectors=[])
+
+@pytest.mark.parametrize("nprobe, min_recall", [
+    (22, 1.0),  # every list probed: exact
+    (8, 0.9),
+])
+def test_ivf_recall_against_flat(nprobe, min_recall):
+    from src.store.vector_index import FlatIndex, IVFIndex, recall_at_k
+    vectors = make_vectors()
+    ids = [str(i) for i in range(len(vectors))]
+    queries = vectors[:50] + 0.1
+    flat = FlatIndex(ids=ids, texts=ids, vectors=vectors)
+    ivf = IVFIndex(ids=ids, texts=ids, vectors=vectors, nprobe=nprobe)
+
+    exact, _ = flat.search_batch(queries, top_k=10)
+    approx, _ = ivf.search_batch(queries, top_k=10)
+
+    assert ivf.nlist == 22
+    assert recall_at_k(exact, approx) >= min_recall
+
+@pytest.mark.parametrize("encoding, itemsize", [
+    ("float16", 2),
+    ("int8", 1),
+])
+def test_quantized_index_recall_after_rescore(encoding, itemsize):
+    from src.store.vector_index import RESCORE_OVERSAMPLING, FlatIndex, QuantizedFlatIndex, rescore
+    vectors = make_vectors()
+    ids = [str(i) for i in range(len(vectors))]
+    flat = FlatIndex(ids=ids, texts=ids, vectors=vectors)
+    index = QuantizedFlatIndex(ids=ids, texts=ids, vectors=vectors, encoding=encoding)
+    full = dict(zip(ids, vectors.tolist()))
+
+    assert index.vectors.dtype.itemsize == itemsize
+    for query in vectors[:20] + 0.1:
+        candidates = index.search(query, top_k=5 * RESCORE_OVERSAMPLING)
+        rescored = rescore(query, candidates, full, top_k=5)
+        assert [r["id"] for r in rescored] == [r["id"] for r in flat.search(query, top_k=5)]
+
+@pytest.mark.parametrize("encoding", ["float16", "int8"])
+def test_quantized_index_matches_the_chunk_quantization(encoding):
+    from src.store.quantize import dequantize, quantize
+    from src.store.vector_index import QuantizedFlatIndex
+    vectors = make_vectors()[:10]
+    ids = [str(i) for i in range(len(vectors))]
+    index = QuantizedFlatIndex(ids=ids, texts=ids, vectors=vectors, encoding=encoding)
+
+    for row, vector, scale in zip(index.vectors, vectors, index.scales):
+        expected = dequantize(quantize(vector, encoding=encoding))
+        np.testing.assert_allclose(row.astype(np.float32) * scale, expected, rtol=1e-6)
+
+def test_rescore_drops_candidates_without_vector():
+    from src.store.vector_index import rescore
+    candidates = [{"id": "a", "text": "A"}, {"id": "b", "text": "B"}, {"id": "c", "text": "C"}]
+    vectors = {"a": [5.0, 0.0], "c": [1.0, 0.0]}
+
+    results = rescore([0.0, 0.0], candidates, vectors, top_k=5)
+
+    assert [r["id"] for r in results] == ["c", "a"]
+    assert [r["SimilarityScore"] for r in results] == [1.0, 5.0]
@@ -0,0 +1,22 @@
+import importlib
+
+import pytest
+
+@pytest.mark.parametrize("module, requires", [
+    ("src.store.clients", []),
+    ("src.store.cosmosdb", []),
+    ("src.store.embedding_cache", []),
+    ("src.store.lexical_index", []),
+    ("src.store.quantize", []),
+    ("src.store.retrieval", []),
+    ("src.store.vector_index", []),
+    ("src.components.chat", ["streamlit", "openai", "langchain_openai"]),
+    ("src.components.knowledge", ["streamlit"]),
+    ("benchmarks.bench_partitioned_query", []),
+    ("benchmarks.bench_quantization", []),
+    ("benchmarks.bench_vector_index", []),
+])
+def test_importable(module, requires):
+    for requirement in requires:
+        pytest.importorskip(requirement)
+    importlib.import_module(module)